@@ -0,0 +1,108 @@
+"""Roster-based no-show detection.
+
+A guard's roster is the shifts assigned through ``Guard.shifts``: every
+active guard is expected at each assigned shift starting on a day that is not
+one of the guard's weekend days. Guards without assigned shifts have no
+roster and are never marked absent.
+
+Expected slots are anti-joined against ``Attendance`` (any session
+overlapping the slot) and against existing ``AttendanceDay`` rows in one
+query over the guard/shift assignment table, with each shift's window for
+the day folded in as ``CASE`` expressions and weekends excluded on the
+guard's ``weekend_mask``. Slots are only checked once
+``ATTENDANCE_NO_SHOW_GRACE_MIN`` has passed since the shift started. Missed
+days are stored as ``absent`` AttendanceDay rows, which a late check-in
+overwrites; optionally a ``no_show`` alert is raised for each.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from apps.authentication.versioning import bump_version
+from apps.guards.models import Guard, works_on
+from apps.reports.models import Alert
+from .models import Attendance, AttendanceDay, Shift
+from .shifts import shift_length
+
+
+def _windows(shifts, day, now):
+    """``{shift_id: (start, end)}`` for shifts starting on ``day`` whose grace period is over."""
+    grace = timedelta(minutes=settings.ATTENDANCE_NO_SHOW_GRACE_MIN)
+    windows = {}
+    for shift in shifts:
+        start = timezone.make_aware(datetime.combine(day, shift.start_time))
+        if start + grace <= now:
+            windows[shift.id] = (start, start + shift_length(shift.start_time, shift.end_time))
+    return windows
+
+
+def missed_slots(day, now=None, organization_id=None):
+    """``(guard_id, organization_id, shift_id, shift_start)`` for rostered slots on ``day`` nobody attended."""
+    now = now or timezone.now()
+    shifts = Shift.objects.all()
+    if organization_id is not None:
+        shifts = shifts.filter(organization_id=organization_id)
+    windows = _windows(shifts, day, now)
+    if not windows:
+        return []
+    slot_start = Case(
+        *[When(shift_id=shift_id, then=Value(start)) for shift_id, (start, _) in windows.items()],
+        output_field=DateTimeField(),
+    )
+    slot_end = Case(
+        *[When(shift_id=shift_id, then=Value(end)) for shift_id, (_, end) in windows.items()],
+        output_field=DateTimeField(),
+    )
+    attended = Attendance.objects.filter(
+        Q(checkout_time__isnull=True) | Q(checkout_time__gt=OuterRef("slot_start")),
+        guard_id=OuterRef("guard_id"),
+        checkin_time__lt=OuterRef("slot_end"),
+    )
+    recorded = AttendanceDay.objects.filter(guard_id=OuterRef("guard_id"), date=day)
+    rows = (
+        Guard.shifts.through.objects.filter(
+            works_on(day.weekday(), "guard__"), shift_id__in=windows, guard__is_active=True
+        )
+        .annotate(slot_start=slot_start, slot_end=slot_end)
+        .filter(~Exists(attended), ~Exists(recorded))
+        .order_by("guard_id", "slot_start")
+        .values_list("guard_id", "guard__organization_id", "shift_id", "slot_start")
+    )
+    return list(rows)
+
+
+def record_no_shows(day, now=None, organization_id=None, alerts=False):
+    """Store an ``absent`` day for each guard that missed a rostered shift on ``day``; returns the rows."""
+    created = []
+    starts = {}
+    for guard_id, org_id, shift_id, start in missed_slots(day, now, organization_id):
+        # One row per guard and day; the earliest missed shift is recorded.
+        if guard_id in starts:
+            continue
+        starts[guard_id] = start
+        created.append(AttendanceDay(
+            guard_id=guard_id,
+            organization_id=org_id,
+            date=day,
+            shift_id=shift_id,
+            status="absent",
+        ))
+    # A check-in racing with the job wins: existing rows are left alone.
+    AttendanceDay.objects.bulk_create(created, ignore_conflicts=True)
+    if alerts and created:
+        Alert.objects.bulk_create(
+            Alert(
+                guard_id=row.guard_id,
+                organization_id=row.organization_id,
+                alert_type="no_show",
+                severity="medium",
+                message=f"No check-in for the shift starting {timezone.localtime(starts[row.guard_id]):%Y-%m-%d %H:%M}.",
+            )
+            for row in created
+        )
+        # bulk_create skips post_save, so bump the ETag versions here.
+        for org_id in {row.organization_id for row in created}:
+            bump_version(org_id, "alerts")
+    return created
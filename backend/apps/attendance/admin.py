@@ -1,17 +1,16 @@
 from django.contrib import admin
 from .models import *
-from django.utils import timezone
+from .services import bulk_check_out
 
 
 # Custom admin action for force check-out
 def force_checkout(modeladmin, request, queryset):
-    count = 0
-    for attendance in queryset:
-        if attendance.checkout_time is None:
-            attendance.checkout_time = timezone.now()
-            attendance.checkout_method = "admin"
-            attendance.save()
-            count += 1
+    items = [
+        {"attendance_id": attendance_id}
+        for attendance_id in queryset.filter(checkout_time__isnull=True).values_list("id", flat=True)
+    ]
+    results = bulk_check_out(None, items, checkout_method="admin")
+    count = sum(result["ok"] for result in results)
     modeladmin.message_user(request, f"Force checked out {count} attendances.")
 
 
@@ -5,3 +5,5 @@ class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.attendance'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,173 @@
+"""Per-guard daily attendance facts: late, early leave, half day and overtime.
+
+A session belongs to the local date its shift occurrence started, so the
+second half of an overnight shift counts for the day it began; sessions
+without a shift belong to the local date of check-in. All sessions of a
+guard's day are classified together against the day's shift:
+
+- ``late_minutes``: first check-in after the shift start; the day is
+  ``late`` beyond ``ATTENDANCE_LATE_GRACE_MIN``.
+- ``early_leave_minutes``: last check-out before the shift end, counted
+  beyond ``ATTENDANCE_EARLY_LEAVE_GRACE_MIN``.
+- ``half``: closed days worked less than ``ATTENDANCE_HALF_DAY_RATIO`` of the
+  shift length.
+- ``overtime_minutes``: time worked beyond the shift length, counted from
+  ``ATTENDANCE_OVERTIME_MIN``.
+
+Rows are upserted at check-in and check-out. Editing a shift's times does not
+reclassify past days; run ``rebuild_attendance_days`` for that.
+"""
+from datetime import datetime, time, timedelta
+from functools import reduce
+from itertools import groupby
+from operator import attrgetter, or_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Attendance, AttendanceDay, Shift
+from .shifts import shift_window
+
+FACT_FIELDS = [
+    "organization", "shift", "status", "first_checkin", "last_checkout", "session_count",
+    "worked_minutes", "late_minutes", "early_leave_minutes", "overtime_minutes", "updated_at",
+]
+
+
+def day_of(attendance, shifts):
+    """The date ``attendance`` counts for; ``shifts`` maps shift id to Shift."""
+    shift = shifts.get(attendance.shift_id)
+    if shift is None:
+        return timezone.localdate(attendance.checkin_time)
+    start, _ = shift_window(shift, attendance.checkin_time)
+    return timezone.localtime(start).date()
+
+
+def classify(sessions, window=None):
+    """Fact fields for one guard's sessions of a day, in check-in order.
+
+    ``window`` is the ``(start, end)`` of the day's shift, or None.
+    """
+    first = sessions[0].checkin_time
+    closed = all(session.checkout_time for session in sessions)
+    last = max(session.checkout_time for session in sessions) if closed else None
+    worked = sum(
+        (session.checkout_time - session.checkin_time).total_seconds()
+        for session in sessions
+        if session.checkout_time
+    )
+    facts = {
+        "status": "present",
+        "first_checkin": first,
+        "last_checkout": last,
+        "session_count": len(sessions),
+        "worked_minutes": int(worked // 60),
+        "late_minutes": 0,
+        "early_leave_minutes": 0,
+        "overtime_minutes": 0,
+    }
+    if window is None:
+        return facts
+    start, end = window
+    length = (end - start).total_seconds()
+    late = max((first - start).total_seconds(), 0) / 60
+    facts["late_minutes"] = int(late)
+    if late > settings.ATTENDANCE_LATE_GRACE_MIN:
+        facts["status"] = "late"
+    if last is not None:
+        early = max((end - last).total_seconds(), 0) / 60
+        if early > settings.ATTENDANCE_EARLY_LEAVE_GRACE_MIN:
+            facts["early_leave_minutes"] = int(early)
+        overtime = max(worked - length, 0) / 60
+        if overtime >= settings.ATTENDANCE_OVERTIME_MIN:
+            facts["overtime_minutes"] = int(overtime)
+        if worked < length * settings.ATTENDANCE_HALF_DAY_RATIO:
+            facts["status"] = "half"
+    return facts
+
+
+def _day_row(model, guard_id, day, sessions, shifts):
+    """Unsaved ``model`` (AttendanceDay) row for one guard's sessions of ``day``."""
+    anchor = next((session for session in sessions if session.shift_id), None)
+    window = shift_window(shifts[anchor.shift_id], anchor.checkin_time) if anchor else None
+    return model(
+        guard_id=guard_id,
+        date=day,
+        organization_id=sessions[0].organization_id,
+        shift_id=anchor.shift_id if anchor else None,
+        **classify(sessions, window),
+    )
+
+
+def refresh_days(keys):
+    """Recompute the AttendanceDay rows for ``(guard_id, date)`` keys with one upsert."""
+    keys = set(keys)
+    if not keys:
+        return []
+    guard_ids = {guard_id for guard_id, _ in keys}
+    dates = {day for _, day in keys}
+    # Sessions counting for a day start at most a day before it (early
+    # check-in to an overnight shift) and before the end of the day after it.
+    low = timezone.make_aware(datetime.combine(min(dates) - timedelta(days=1), time.min))
+    high = timezone.make_aware(datetime.combine(max(dates) + timedelta(days=2), time.min))
+    sessions = list(
+        Attendance.objects.filter(guard_id__in=guard_ids, checkin_time__gte=low, checkin_time__lt=high)
+        .order_by("checkin_time", "id")
+    )
+    shifts = Shift.objects.in_bulk({session.shift_id for session in sessions if session.shift_id})
+    grouped = {}
+    for session in sessions:
+        key = (session.guard_id, day_of(session, shifts))
+        if key in keys:
+            grouped.setdefault(key, []).append(session)
+    rows = [
+        _day_row(AttendanceDay, guard_id, day, day_sessions, shifts)
+        for (guard_id, day), day_sessions in grouped.items()
+    ]
+    if rows:
+        # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target and rejects one.
+        target = {}
+        if connection.features.supports_update_conflicts_with_target:
+            target["unique_fields"] = ["guard", "date"]
+        AttendanceDay.objects.bulk_create(rows, update_conflicts=True, update_fields=FACT_FIELDS, **target)
+    # Days whose sessions were all deleted or moved to another day.
+    stale = keys - grouped.keys()
+    if stale:
+        AttendanceDay.objects.filter(
+            reduce(or_, (Q(guard_id=guard_id, date=day) for guard_id, day in stale))
+        ).delete()
+    return rows
+
+
+def update_days(attendances):
+    """Reclassify the days ``attendances`` count for, after they were saved."""
+    attendances = list(attendances)
+    shifts = Shift.objects.in_bulk({attendance.shift_id for attendance in attendances if attendance.shift_id})
+    return refresh_days({(attendance.guard_id, day_of(attendance, shifts)) for attendance in attendances})
+
+
+def backfill_days(attendance_model, shift_model, day_model, batch_size=1000, log=None):
+    """Create the missing classified days of all sessions, one guard at a time.
+
+    Existing rows are kept. Accepts historical models so migrations can reuse
+    it. Returns the number of rows written.
+    """
+    shifts = shift_model.objects.in_bulk()
+    sessions = attendance_model.objects.order_by("guard_id", "checkin_time", "id")
+    total = 0
+    rows = []
+    for guard_id, guard_sessions in groupby(sessions.iterator(chunk_size=5000), key=attrgetter("guard_id")):
+        days = {}
+        for session in guard_sessions:
+            days.setdefault(day_of(session, shifts), []).append(session)
+        rows += [_day_row(day_model, guard_id, day, day_sessions, shifts) for day, day_sessions in days.items()]
+        if len(rows) >= batch_size:
+            day_model.objects.bulk_create(rows, ignore_conflicts=True)
+            total += len(rows)
+            if log:
+                log(f"{total} days, up to guard {guard_id}")
+            rows = []
+    day_model.objects.bulk_create(rows, ignore_conflicts=True)
+    return total + len(rows)
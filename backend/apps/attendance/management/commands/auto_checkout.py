@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from apps.attendance.classification import update_days
 from apps.attendance.models import Attendance
 
 class Command(BaseCommand):
@@ -7,7 +8,7 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         now = timezone.localtime()
-        count = 0
+        checked_out = []
         active_attendances = Attendance.objects.filter(checkout_time__isnull=True, shift__isnull=False)
         for attendance in active_attendances:
             shift = attendance.shift
@@ -23,6 +24,7 @@ class Command(BaseCommand):
                 attendance.checkout_time = shift_end
                 attendance.checkout_method = 'auto'
                 attendance.save()
-                count += 1
+                checked_out.append(attendance)
                 self.stdout.write(self.style.SUCCESS(f'Auto checked out attendance ID {attendance.id} at {shift_end}'))
-        self.stdout.write(self.style.SUCCESS(f'Auto check-out complete. Total attendances checked out: {count}')) 
\ No newline at end of file
+        update_days(checked_out)
+        self.stdout.write(self.style.SUCCESS(f'Auto check-out complete. Total attendances checked out: {len(checked_out)}')) 
\ No newline at end of file
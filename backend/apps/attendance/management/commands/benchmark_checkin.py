@@ -0,0 +1,101 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.attendance.models import Attendance
+from apps.attendance.views import checkin
+from apps.authentication.models import Organization, User
+from apps.guards.models import Guard
+
+
+class Command(BaseCommand):
+    help = 'Measure check-in latency (p50/p99) under concurrent load in a throwaway organization.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--guards', type=int, default=200, help='Guards checking in.')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent clients.')
+        parser.add_argument('--attempts', type=int, default=2, help='Check-in attempts per guard; extra attempts must be rejected.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark organization afterwards.')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        org = Organization.objects.create(name=f'checkin-benchmark-{tag}')
+        try:
+            self.run(org, tag, options)
+        finally:
+            if not options['keep']:
+                org.delete()
+
+    def run(self, org, tag, options):
+        admin = User.objects.create_user(username=f'benchmark-{tag}', organization=org, role='admin')
+        Guard.objects.bulk_create(
+            Guard(name=f'Guard {number}', phone=f'{tag}{number}', organization=org)
+            for number in range(options['guards'])
+        )
+        # bulk_create leaves primary keys unset on MySQL; the organization is this run's own.
+        guards = list(Guard.objects.filter(organization=org).order_by('id'))
+        factory = APIRequestFactory()
+
+        def request_for(guard):
+            request = factory.post('/api/attendance/checkin/', {'guard_id': guard.id}, format='json')
+            force_authenticate(request, user=admin)
+            return request
+
+        with CaptureQueriesContext(connection) as queries:
+            checkin(request_for(guards[0]))
+        self.stdout.write(f'queries per check-in: {len(queries)}')
+
+        # Every guard appears ``attempts`` times, spread so duplicates race each other.
+        work = [guard for _ in range(options['attempts']) for guard in guards[1:]]
+        timings = []
+        statuses = {}
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+
+        def client(items):
+            barrier.wait()
+            try:
+                for guard in items:
+                    start = time.perf_counter()
+                    response = checkin(request_for(guard))
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        timings.append(elapsed)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=client, args=(work[number::options['threads']],))
+            for number in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        timings.sort()
+        duplicates = (
+            Attendance.objects.filter(organization=org, checkout_time__isnull=True)
+            .values('guard_id').annotate(open_count=Count('id')).filter(open_count__gt=1).count()
+        )
+        self.stdout.write(
+            f'{len(timings)} check-ins on {options["threads"]} threads in {wall:.2f} s '
+            f'({len(timings) / wall:.0f}/s)'
+        )
+        self.stdout.write(
+            f'p50 {statistics.median(timings):.2f} ms  '
+            f'p99 {timings[min(int(len(timings) * 0.99), len(timings) - 1)]:.2f} ms  '
+            f'max {timings[-1]:.2f} ms'
+        )
+        self.stdout.write(f'responses: {dict(sorted(statuses.items()))}')
+        style = self.style.SUCCESS if not duplicates else self.style.ERROR
+        self.stdout.write(style(f'guards with more than one open session: {duplicates}'))
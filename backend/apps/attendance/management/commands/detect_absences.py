@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.attendance.absences import record_no_shows
+
+
+class Command(BaseCommand):
+    help = 'Mark guards absent for rostered shifts they did not check in to, optionally raising no-show alerts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Only this day (YYYY-MM-DD); default yesterday and today.')
+        parser.add_argument('--org', type=int, help='Only this organization id.')
+        parser.add_argument('--alerts', action='store_true', help='Raise a no_show alert for each new absence.')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            days = [options['date']]
+        else:
+            # Yesterday too, for shifts that started too late in the day to be checked before midnight.
+            today = timezone.localdate()
+            days = [today - timedelta(days=1), today]
+        for day in days:
+            created = record_no_shows(day, organization_id=options['org'], alerts=options['alerts'])
+            self.stdout.write(self.style.SUCCESS(f'{day}: {len(created)} no-shows recorded'))
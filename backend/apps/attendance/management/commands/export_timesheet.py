@@ -0,0 +1,45 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.attendance.timesheets import (
+    DAY_COLUMNS, PERIOD_COLUMNS, csv_chunks, parquet_available, parquet_bytes, timesheet_rows,
+)
+from apps.guards.models import Guard
+
+
+class Command(BaseCommand):
+    help = 'Write payroll timesheets (hours per guard, split per day and weekday/weekend) as CSV or Parquet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', type=date.fromisoformat, help='First day, YYYY-MM-DD.')
+        parser.add_argument('end', type=date.fromisoformat, help='Last day (inclusive), YYYY-MM-DD.')
+        parser.add_argument('--org', type=int, help='Only this organization id.')
+        parser.add_argument('--by-day', action='store_true', help='One row per guard and day instead of per guard.')
+        parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+        parser.add_argument('--output', help='File to write; CSV goes to stdout by default.')
+
+    def handle(self, *args, **options):
+        if options['end'] < options['start']:
+            raise CommandError('end must be on or after start')
+        guards = Guard.objects.all()
+        if options['org'] is not None:
+            guards = guards.filter(organization_id=options['org'])
+        if options['format'] == 'parquet' and not parquet_available():
+            raise CommandError('Parquet output requires pyarrow')
+        columns = DAY_COLUMNS if options['by_day'] else PERIOD_COLUMNS
+        rows = timesheet_rows(guards, options['start'], options['end'], options['by_day'])
+        if options['format'] == 'parquet':
+            if not options['output']:
+                raise CommandError('--output is required for Parquet')
+            data = parquet_bytes(columns, rows)
+            with open(options['output'], 'wb') as target:
+                target.write(data)
+            return
+        target = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in csv_chunks(columns, rows):
+                target.write(chunk)
+        finally:
+            if options['output']:
+                target.close()
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.attendance.classification import day_of, refresh_days
+from apps.attendance.models import Attendance, Shift
+
+BATCH_SIZE = 1000
+# Each batch covers days within one window of this many days, so the sessions
+# it reads span the window's guards over a bounded date range.
+WINDOW_DAYS = 7
+
+
+class Command(BaseCommand):
+    help = 'Recompute the classified attendance days (late, half day, overtime) from attendance sessions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only sessions checked in within this many days; default all.')
+        parser.add_argument('--org', type=int, help='Only this organization id.')
+
+    def handle(self, *args, **options):
+        attendances = Attendance.objects.order_by('checkin_time', 'id').only('guard_id', 'checkin_time', 'shift_id')
+        if options['days'] is not None:
+            attendances = attendances.filter(checkin_time__gte=timezone.now() - timedelta(days=options['days']))
+        if options['org'] is not None:
+            attendances = attendances.filter(organization_id=options['org'])
+        shifts = Shift.objects.in_bulk()
+        count = 0
+        keys = set()
+        window = None
+        # Batches of (guard, date) keys, cut at window boundaries and at BATCH_SIZE keys.
+        for attendance in attendances.iterator(chunk_size=BATCH_SIZE):
+            key = (attendance.guard_id, day_of(attendance, shifts))
+            key_window = key[1].toordinal() // WINDOW_DAYS
+            if keys and (key_window != window or len(keys) >= BATCH_SIZE):
+                count += len(refresh_days(keys))
+                keys = set()
+            window = key_window
+            keys.add(key)
+        count += len(refresh_days(keys))
+        self.stdout.write(self.style.SUCCESS(f'Attendance days rebuilt: {count}'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_backfill_attendance_organization'),
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='authentication.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['organization', 'checkout_time'], name='attendance_org_checkout_idx'),
+        ),
+    ]
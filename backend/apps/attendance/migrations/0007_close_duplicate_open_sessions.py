@@ -0,0 +1,39 @@
+"""Prepare for the one-open-session-per-guard constraint.
+
+This closes sessions automatically: a guard left with several open sessions
+keeps only the newest open, and each older one is checked out (method
+``auto``) at the next session's check-in. ``updated_at`` is set so that
+incremental sync sends the closed sessions to clients.
+"""
+from django.db import migrations
+from django.db.models import Count
+from django.utils import timezone
+
+
+def close_duplicates(apps, schema_editor):
+    """Close all but the newest open session of each guard, at the next session's check-in."""
+    Attendance = apps.get_model('attendance', 'Attendance')
+    open_sessions = Attendance.objects.filter(checkout_time__isnull=True)
+    guard_ids = (
+        open_sessions.values('guard_id').annotate(open_count=Count('id'))
+        .filter(open_count__gt=1).values_list('guard_id', flat=True)
+    )
+    now = timezone.now()
+    for guard_id in guard_ids:
+        sessions = list(open_sessions.filter(guard_id=guard_id).order_by('checkin_time', 'id'))
+        for session, following in zip(sessions, sessions[1:]):
+            session.checkout_time = following.checkin_time
+            session.checkout_method = 'auto'
+            session.updated_at = now
+            session.save(update_fields=['checkout_time', 'checkout_method', 'updated_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_organization_not_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_close_duplicate_open_sessions'),
+        ('authentication', '0001_initial'),
+        ('guards', '0005_guard_patrol_route'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('checkout_time__isnull', True)), fields=('guard',), name='attendance_one_open_per_guard'),
+        ),
+    ]
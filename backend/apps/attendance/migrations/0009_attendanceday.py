@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_attendance_one_open_per_guard'),
+        ('authentication', '0001_initial'),
+        ('guards', '0005_guard_patrol_route'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('late', 'Late'), ('half', 'Half day')], default='present', max_length=10)),
+                ('first_checkin', models.DateTimeField(blank=True, null=True)),
+                ('last_checkout', models.DateTimeField(blank=True, null=True)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('worked_minutes', models.PositiveIntegerField(default=0)),
+                ('late_minutes', models.PositiveIntegerField(default=0)),
+                ('early_leave_minutes', models.PositiveIntegerField(default=0)),
+                ('overtime_minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('guard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_days', to='guards.guard')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_days', to='authentication.organization')),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_days', to='attendance.shift')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['organization', 'date'], name='attendance_day_org_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('guard', 'date'), name='attendance_day_guard_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_attendanceday'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendanceday',
+            name='status',
+            field=models.CharField(choices=[('present', 'Present'), ('late', 'Late'), ('half', 'Half day'), ('absent', 'Absent')], default='present', max_length=10),
+        ),
+    ]
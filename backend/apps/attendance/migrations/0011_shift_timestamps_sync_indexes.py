@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_attendanceday_absent_status'),
+        ('authentication', '0001_initial'),
+        ('guards', '0006_guard_weekend_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shift',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['organization', 'updated_at'], name='attendance_org_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['organization', 'updated_at'], name='shift_org_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from apps.attendance.classification import backfill_days
+
+
+def backfill(apps, schema_editor):
+    backfill_days(
+        apps.get_model('attendance', 'Attendance'),
+        apps.get_model('attendance', 'Shift'),
+        apps.get_model('attendance', 'AttendanceDay'),
+    )
+
+
+class Migration(migrations.Migration):
+    # Classify the sessions recorded before AttendanceDay existed, which the
+    # calendar summary and monthly report now read. Days already written by
+    # check-ins since are kept. Batches commit individually.
+    atomic = False
+
+    dependencies = [
+        ('attendance', '0011_shift_timestamps_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -8,10 +8,18 @@ class Shift(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='shifts')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.start_time} - {self.end_time}) - {self.organization.name}"
 
+    class Meta:
+        indexes = [
+            # Incremental sync (apps/sync).
+            models.Index(fields=["organization", "updated_at"], name="shift_org_updated_idx"),
+        ]
+
 
 class Attendance(models.Model):
     METHOD_CHOICES = [
@@ -26,8 +34,6 @@ class Attendance(models.Model):
         Organization,
         on_delete=models.CASCADE,
         related_name="attendances",
-        null=True,
-        blank=True,
     )
     shift = models.ForeignKey(
         Shift, on_delete=models.SET_NULL, null=True, blank=True, related_name="attendances"
@@ -69,3 +75,67 @@ class Attendance(models.Model):
 
     class Meta:
         ordering = ["-checkin_time"]
+        indexes = [
+            # Open sessions per organization (active_attendances, dashboard).
+            models.Index(fields=["organization", "checkout_time"], name="attendance_org_checkout_idx"),
+            # Incremental sync (apps/sync).
+            models.Index(fields=["organization", "updated_at"], name="attendance_org_updated_idx"),
+        ]
+        constraints = [
+            # At most one open session per guard. MySQL ignores partial
+            # constraints, so check-in also locks the guard row (see
+            # apps.attendance.services.check_in).
+            models.UniqueConstraint(
+                fields=["guard"],
+                condition=models.Q(checkout_time__isnull=True),
+                name="attendance_one_open_per_guard",
+            ),
+        ]
+
+
+class AttendanceDay(models.Model):
+    """One guard's classified working day, maintained by ``classification.update_days``.
+
+    ``absent`` rows are written by ``absences.record_no_shows`` for rostered
+    days without a session and are replaced by a later check-in.
+    """
+
+    STATUS_CHOICES = [
+        ("present", "Present"),
+        ("late", "Late"),
+        ("half", "Half day"),
+        ("absent", "Absent"),
+    ]
+
+    guard = models.ForeignKey(
+        'guards.Guard', on_delete=models.CASCADE, related_name="attendance_days"
+    )
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="attendance_days"
+    )
+    date = models.DateField()
+    shift = models.ForeignKey(
+        Shift, on_delete=models.SET_NULL, null=True, blank=True, related_name="attendance_days"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="present")
+    first_checkin = models.DateTimeField(null=True, blank=True)
+    # Null while a session of the day is still open.
+    last_checkout = models.DateTimeField(null=True, blank=True)
+    session_count = models.PositiveIntegerField(default=0)
+    worked_minutes = models.PositiveIntegerField(default=0)
+    late_minutes = models.PositiveIntegerField(default=0)
+    early_leave_minutes = models.PositiveIntegerField(default=0)
+    overtime_minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.guard_id} - {self.date} - {self.status}"
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["guard", "date"], name="attendance_day_guard_date"),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "date"], name="attendance_day_org_date_idx"),
+        ]
@@ -0,0 +1,198 @@
+"""Write paths for attendance sessions shared by the API and the admin."""
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from apps.authentication.versioning import bump_version
+from apps.guards.models import Guard
+from apps.tracking.models import LocationLog
+from apps.tracking.spatial import record_duty
+from .classification import update_days
+from .models import Attendance
+from .shifts import match_shift
+
+
+class AlreadyCheckedIn(Exception):
+    pass
+
+
+def check_in(guard, checkin_method="manual", checkin_latitude=None, checkin_longitude=None, notes=None):
+    """Open a session for ``guard`` in one transaction; raises AlreadyCheckedIn.
+
+    The guard row is locked for the duration, which serializes concurrent
+    check-ins of one guard on every backend; the partial unique constraint
+    on open sessions backs this up where the database supports it. Runs
+    four queries (lock, open-session check, attendance and location inserts)
+    plus the day's classification upsert.
+    """
+    now = timezone.now()
+    matched = match_shift(guard, now)
+    attendance = Attendance(
+        guard=guard,
+        organization_id=guard.organization_id,
+        shift_id=matched.shift_id if matched else None,
+        checkin_time=now,
+        checkin_method=checkin_method,
+        checkin_latitude=checkin_latitude,
+        checkin_longitude=checkin_longitude,
+        notes=notes,
+    )
+    try:
+        with transaction.atomic():
+            list(Guard.objects.select_for_update().filter(pk=guard.pk).values_list("pk"))
+            if Attendance.objects.filter(guard=guard, checkout_time__isnull=True).exists():
+                raise AlreadyCheckedIn()
+            attendance.save()
+            if checkin_latitude and checkin_longitude:
+                LocationLog.objects.create(
+                    guard=guard,
+                    organization_id=guard.organization_id,
+                    latitude=checkin_latitude,
+                    longitude=checkin_longitude,
+                    timestamp=now,
+                )
+            update_days([attendance])
+    except IntegrityError:
+        raise AlreadyCheckedIn()
+    return attendance
+
+
+def _result(index, error=None, **fields):
+    return {"index": index, "ok": error is None, **fields, **({"error": error} if error else {})}
+
+
+def bulk_check_in(organization, items, checkin_method="manual"):
+    """Open sessions for many guards with set-based queries; returns one result per item.
+
+    ``items`` are dicts with ``guard_id`` and optional ``checkin_latitude``,
+    ``checkin_longitude`` and ``notes``. Items for unknown guards, guards with
+    an open session or guards repeated in the request fail individually.
+    """
+    now = timezone.now()
+    results = [None] * len(items)
+    guard_ids = {item["guard_id"] for item in items}
+    with transaction.atomic():
+        guards = (
+            Guard.objects.select_for_update()
+            .filter(organization=organization, id__in=guard_ids)
+            .in_bulk()
+        )
+        open_guards = set(
+            Attendance.objects.filter(guard_id__in=guards, checkout_time__isnull=True)
+            .values_list("guard_id", flat=True)
+        )
+        created = []
+        seen = set()
+        for index, item in enumerate(items):
+            guard = guards.get(item["guard_id"])
+            if guard is None:
+                results[index] = _result(index, "Guard not found or not in your organization.", guard_id=item["guard_id"])
+            elif guard.id in open_guards or guard.id in seen:
+                results[index] = _result(index, "Guard already has an active attendance session.", guard_id=guard.id)
+            else:
+                seen.add(guard.id)
+                matched = match_shift(guard, now)
+                created.append((index, Attendance(
+                    guard=guard,
+                    organization_id=guard.organization_id,
+                    shift_id=matched.shift_id if matched else None,
+                    checkin_time=now,
+                    checkin_method=checkin_method,
+                    checkin_latitude=item.get("checkin_latitude"),
+                    checkin_longitude=item.get("checkin_longitude"),
+                    notes=item.get("notes"),
+                )))
+        if created:
+            attendances = [attendance for _, attendance in created]
+            Attendance.objects.bulk_create(attendances)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # One open session per guard, so the new ids can be looked up by guard.
+                ids = dict(
+                    Attendance.objects.filter(
+                        guard_id__in=[attendance.guard_id for attendance in attendances],
+                        checkout_time__isnull=True,
+                    ).values_list("guard_id", "id")
+                )
+                for attendance in attendances:
+                    attendance.id = ids[attendance.guard_id]
+            LocationLog.objects.bulk_create(
+                LocationLog(
+                    guard_id=attendance.guard_id,
+                    organization_id=attendance.organization_id,
+                    latitude=attendance.checkin_latitude,
+                    longitude=attendance.checkin_longitude,
+                    timestamp=now,
+                )
+                for attendance in attendances
+                if attendance.checkin_latitude and attendance.checkin_longitude
+            )
+            update_days(attendances)
+    for index, attendance in created:
+        results[index] = _result(index, guard_id=attendance.guard_id, attendance_id=attendance.id)
+    if created:
+        # bulk_create skips post_save, so bump the ETag versions and mark the
+        # guards on duty here.
+        bump_version(organization.id, "attendance")
+        bump_version(organization.id, "locations")
+        for _, attendance in created:
+            record_duty(attendance.organization_id, attendance.guard_id, attendance.id)
+    return results
+
+
+def bulk_check_out(organization, items, checkout_method="manual"):
+    """Close many open sessions with one read and one ``bulk_update``; returns one result per item.
+
+    ``items`` are dicts with ``attendance_id`` and optional
+    ``checkout_latitude``, ``checkout_longitude`` and ``notes``. An
+    ``organization`` of None allows sessions of any organization (admin site).
+    """
+    now = timezone.now()
+    results = [None] * len(items)
+    sessions = Attendance.objects.filter(
+        id__in={item["attendance_id"] for item in items}, checkout_time__isnull=True
+    )
+    if organization is not None:
+        sessions = sessions.filter(organization=organization)
+    with transaction.atomic():
+        sessions = sessions.select_for_update().in_bulk()
+        closed = []
+        for index, item in enumerate(items):
+            attendance = sessions.pop(item["attendance_id"], None)
+            if attendance is None:
+                results[index] = _result(index, "Active attendance not found", attendance_id=item["attendance_id"])
+                continue
+            attendance.checkout_time = now
+            attendance.updated_at = now
+            attendance.checkout_method = checkout_method
+            attendance.checkout_latitude = item.get("checkout_latitude")
+            attendance.checkout_longitude = item.get("checkout_longitude")
+            if item.get("notes"):
+                attendance.notes = (attendance.notes or "") + "\n" + item["notes"]
+            closed.append((index, attendance))
+        if closed:
+            attendances = [attendance for _, attendance in closed]
+            Attendance.objects.bulk_update(
+                attendances,
+                ["checkout_time", "checkout_method", "checkout_latitude", "checkout_longitude", "notes", "updated_at"],
+            )
+            LocationLog.objects.bulk_create(
+                LocationLog(
+                    guard_id=attendance.guard_id,
+                    organization_id=attendance.organization_id,
+                    latitude=attendance.checkout_latitude,
+                    longitude=attendance.checkout_longitude,
+                    timestamp=now,
+                )
+                for attendance in attendances
+                if attendance.checkout_latitude and attendance.checkout_longitude
+            )
+            update_days(attendances)
+    for index, attendance in closed:
+        results[index] = _result(index, guard_id=attendance.guard_id, attendance_id=attendance.id)
+    # bulk_update skips post_save, so bump the ETag versions and mark the
+    # guards off duty here.
+    for org_id in {attendance.organization_id for _, attendance in closed}:
+        bump_version(org_id, "attendance")
+        bump_version(org_id, "locations")
+    for _, attendance in closed:
+        record_duty(attendance.organization_id, attendance.guard_id, None)
+    return results
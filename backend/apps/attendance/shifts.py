@@ -0,0 +1,126 @@
+"""Which shift covers a given instant, answered from a cached interval index.
+
+Shift times are wall-clock times in ``TIME_ZONE``. An overnight shift
+(``end_time <= start_time``) is split into a piece from its start to midnight
+and a piece from midnight to its end that belongs to the shift started the
+day before. The day is cut at every piece boundary into elementary intervals,
+each holding the shifts covering it, most recently started first, so a lookup
+is one ``bisect``.
+
+Guards with shifts assigned through ``Guard.shifts`` only match those shifts;
+guards without assignments match any shift of their organization.
+
+One index per organization is cached in process memory and rebuilt when the
+organization's ``"shifts"`` version changes (bumped on Shift saves, deletes
+and ``Guard.shifts`` changes, see ``signals.py``).
+"""
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from apps.authentication.versioning import get_versions
+from apps.guards.models import Guard
+from .models import Shift
+
+DAY = 24 * 3600
+
+ShiftMatch = namedtuple("ShiftMatch", ["shift_id", "start", "end"])
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+
+
+def shift_length(start_time, end_time):
+    """Length of a shift as a timedelta; overnight when ``end_time <= start_time``."""
+    start, end = _seconds(start_time), _seconds(end_time)
+    return timedelta(seconds=end - start if end > start else end - start + DAY)
+
+
+def shift_window(shift, moment):
+    """``(start, end)`` of the occurrence of ``shift`` containing ``moment``, else the closest one."""
+    length = shift_length(shift.start_time, shift.end_time)
+    best = None
+    for days_back in (1, 0, -1):
+        day = timezone.localtime(moment).date() - timedelta(days=days_back)
+        start = timezone.make_aware(datetime.combine(day, shift.start_time))
+        end = start + length
+        distance = 0 if start <= moment < end else min(abs(moment - start), abs(moment - end)).total_seconds()
+        if best is None or distance < best[0]:
+            best = (distance, start, end)
+    return best[1], best[2]
+
+
+class ShiftIndex:
+    def __init__(self, shifts, assignments):
+        """``shifts`` are ``(id, start_time, end_time)``; ``assignments`` maps guard id to shift ids."""
+        self.times = {}
+        self.assignments = assignments
+        pieces = []
+        for shift_id, start_time, end_time in shifts:
+            start, end = _seconds(start_time), _seconds(end_time)
+            self.times[shift_id] = (start_time, shift_length(start_time, end_time))
+            if end > start:
+                pieces.append((start, end, shift_id, 0))
+            else:
+                pieces.append((start, DAY, shift_id, 0))
+                if end > 0:
+                    pieces.append((0, end, shift_id, 1))
+        self.bounds = sorted({0, DAY} | {piece[0] for piece in pieces} | {piece[1] for piece in pieces})
+        self.covering = []
+        for low in self.bounds[:-1]:
+            covering = [(shift_id, days_back, start) for start, end, shift_id, days_back in pieces if start <= low < end]
+            # Most recently started first: today's shifts by latest start, then yesterday's.
+            covering.sort(key=lambda item: (item[1], -_seconds(self.times[item[0]][0]), item[0]))
+            self.covering.append([(shift_id, days_back) for shift_id, days_back, _ in covering])
+
+    def match(self, moment, guard_id=None):
+        """The ShiftMatch covering ``moment`` for the guard, or None."""
+        local = timezone.localtime(moment)
+        position = bisect_right(self.bounds, _seconds(local.time())) - 1
+        allowed = self.assignments.get(guard_id)
+        for shift_id, days_back in self.covering[position]:
+            if allowed is not None and shift_id not in allowed:
+                continue
+            start_time, length = self.times[shift_id]
+            day = local.date() - timedelta(days=days_back)
+            start = timezone.make_aware(datetime.combine(day, start_time))
+            return ShiftMatch(shift_id, start, start + length)
+        return None
+
+
+def build_index(organization_id):
+    shifts = Shift.objects.filter(organization_id=organization_id).values_list(
+        "id", "start_time", "end_time"
+    )
+    assignments = {}
+    rows = Guard.shifts.through.objects.filter(guard__organization_id=organization_id).values_list(
+        "guard_id", "shift_id"
+    )
+    for guard_id, shift_id in rows:
+        assignments.setdefault(guard_id, set()).add(shift_id)
+    return ShiftIndex(list(shifts), assignments)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def shift_index(organization_id):
+    """The organization's index, rebuilt if its shifts changed since it was cached."""
+    version = get_versions(organization_id, ["shifts"])[0]
+    cached = _indexes.get(organization_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    index = build_index(organization_id)
+    with _indexes_lock:
+        _indexes[organization_id] = (version, index)
+    return index
+
+
+def match_shift(guard, moment):
+    """The shift covering ``moment`` for ``guard``, as a ShiftMatch, or None."""
+    return shift_index(guard.organization_id).match(moment, guard.id)
@@ -0,0 +1,26 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.authentication.versioning import bump_version, deleted_in_cascade, organization_id_for
+from apps.guards.models import Guard
+from .models import Attendance, Shift
+
+
+# Rows deleted through a guard are covered by the guard's own bump of
+# "attendance" (see guards/signals.py), once rather than per row.
+@receiver([post_save, post_delete], sender=Attendance)
+def bump_attendance_version(sender, instance, signal, origin=None, **kwargs):
+    if signal is post_delete and deleted_in_cascade(sender, origin):
+        return
+    bump_version(organization_id_for(instance), "attendance")
+
+
+@receiver([post_save, post_delete], sender=Shift)
+def bump_shifts_version(sender, instance, **kwargs):
+    bump_version(instance.organization_id, "shifts")
+
+
+@receiver(m2m_changed, sender=Guard.shifts.through)
+def bump_shift_assignments_version(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version(instance.organization_id, "shifts")
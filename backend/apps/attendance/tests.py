@@ -0,0 +1,275 @@
+import csv
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import Organization, User
+from apps.authentication.versioning import get_versions
+from apps.guards.models import DEFAULT_WEEKEND_MASK, Guard
+from apps.reports.models import Alert
+from .absences import record_no_shows
+from .classification import backfill_days, refresh_days, update_days
+from .models import Attendance, AttendanceDay, Shift
+from .shifts import ShiftIndex, match_shift
+
+
+def at(hour, minute=0):
+    return timezone.make_aware(datetime(2026, 10, 7, hour, minute))
+
+
+class CheckinClassificationTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        self.guard.shifts.add(Shift.objects.create(name="Day", start_time=time(9), end_time=time(17), organization=self.org))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_checkin_and_checkout_classify_the_day(self):
+        with mock.patch("django.utils.timezone.now", return_value=at(9, 30)):
+            response = self.client.post("/api/attendance/checkin/", {"guard_id": self.guard.id}, format="json")
+        self.assertEqual(response.status_code, 201)
+        day = AttendanceDay.objects.get(guard=self.guard)
+        self.assertEqual((day.status, day.late_minutes, day.last_checkout), ("late", 30, None))
+
+        attendance = Attendance.objects.get(guard=self.guard)
+        with mock.patch("django.utils.timezone.now", return_value=at(12)):
+            response = self.client.post(f"/api/attendance/checkout/{attendance.id}/", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        day.refresh_from_db()
+        self.assertEqual((day.status, day.worked_minutes, day.early_leave_minutes), ("half", 150, 300))
+
+    def test_bulk_checkin_classifies_each_guard(self):
+        with mock.patch("django.utils.timezone.now", return_value=at(9)):
+            response = self.client.post(
+                "/api/attendance/checkin/bulk/", {"items": [{"guard_id": self.guard.id}]}, format="json"
+            )
+        self.assertTrue(response.data["results"][0]["ok"])
+        self.assertEqual(AttendanceDay.objects.get(guard=self.guard).status, "present")
+
+    def test_upsert_omits_conflict_target_where_unsupported(self):
+        attendance = Attendance.objects.create(guard=self.guard, organization=self.org, checkin_time=at(9))
+        with mock.patch.object(connection.features, "supports_update_conflicts_with_target", False), \
+                mock.patch.object(AttendanceDay.objects, "bulk_create") as bulk_create:
+            update_days([attendance])
+        self.assertNotIn("unique_fields", bulk_create.call_args.kwargs)
+        self.assertTrue(bulk_create.call_args.kwargs["update_conflicts"])
+
+
+class AttendanceVersionTests(TestCase):
+    def test_deleting_a_session_bumps_the_version(self):
+        org = Organization.objects.create(name="Org")
+        guard = Guard.objects.create(name="G1", phone="1", organization=org)
+        attendance = Attendance.objects.create(guard=guard, organization=org, checkin_time=at(9))
+        before = get_versions(org.id, ["attendance"])[0]
+        attendance.delete()
+        self.assertNotEqual(get_versions(org.id, ["attendance"])[0], before)
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.guards = [Guard.objects.create(name=f"G{n}", phone=str(n), organization=self.org) for n in range(3)]
+        shift = Shift.objects.create(name="Day", start_time=time(9), end_time=time(17), organization=self.org)
+        for number, guard in enumerate(self.guards):
+            for days_back in (0, 1, 40):
+                checkin = at(9, number) - timedelta(days=days_back)
+                Attendance.objects.create(
+                    guard=guard, organization=self.org, shift=shift,
+                    checkin_time=checkin, checkout_time=checkin + timedelta(hours=8),
+                )
+        update_days(Attendance.objects.all())
+
+    def facts(self):
+        return sorted(AttendanceDay.objects.values_list("guard_id", "date", "status", "worked_minutes"))
+
+    def test_backfill_matches_live_classification(self):
+        expected = self.facts()
+        self.assertEqual(len(expected), 9)
+        AttendanceDay.objects.filter(date=at(9).date()).delete()
+        kept = AttendanceDay.objects.first()
+        AttendanceDay.objects.filter(pk=kept.pk).update(worked_minutes=1)
+
+        backfill_days(Attendance, Shift, AttendanceDay, batch_size=2)
+        self.assertEqual(len(self.facts()), 9)
+        # Existing rows are kept as they are.
+        self.assertEqual(AttendanceDay.objects.get(pk=kept.pk).worked_minutes, 1)
+        AttendanceDay.objects.filter(pk=kept.pk).update(worked_minutes=480)
+        self.assertEqual(self.facts(), expected)
+
+    def test_rebuild_batches_by_date_window(self):
+        expected = self.facts()
+        AttendanceDay.objects.all().delete()
+        calls = []
+
+        def refresh(keys):
+            calls.append(keys)
+            return refresh_days(keys)
+
+        with mock.patch("apps.attendance.management.commands.rebuild_attendance_days.refresh_days", refresh):
+            call_command("rebuild_attendance_days", stdout=mock.MagicMock())
+        self.assertEqual(self.facts(), expected)
+        for keys in filter(None, calls):
+            dates = [day for _, day in keys]
+            self.assertLess((max(dates) - min(dates)).days, 7)
+
+
+class AttendanceSummaryTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def summary(self, guard):
+        return self.client.get("/api/attendance/summary/", {"guard_id": guard.id, "year": 2026, "month": 10}).data
+
+    def test_weekend_follows_the_guard_mask(self):
+        default = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        data = self.summary(default)
+        self.assertEqual(data["weekends"], [5, 6])
+        self.assertEqual(data["days"][date(2026, 10, 3).isoformat()], "weekend")
+        self.assertEqual(data["days"][date(2026, 10, 5).isoformat()], "absent")
+
+        every_day = Guard.objects.create(name="G2", phone="2", organization=self.org, weekend_mask=0)
+        data = self.summary(every_day)
+        self.assertEqual(data["weekends"], [])
+        self.assertNotIn("weekend", data["days"].values())
+
+
+class TimesheetTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        # Friday 20:00 to Saturday 04:00: half on a weekday, half on the weekend.
+        checkin = timezone.make_aware(datetime(2026, 10, 9, 20))
+        Attendance.objects.create(
+            guard=self.guard, organization=self.org, checkin_time=checkin, checkout_time=checkin + timedelta(hours=8)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def rows(self, **params):
+        params = {"start": "2026-10-01", "end": "2026-10-31", **params}
+        with mock.patch("django.utils.timezone.now", return_value=timezone.make_aware(datetime(2026, 11, 1))):
+            response = self.client.get("/api/attendance/timesheet/", params)
+            content = b"".join(response.streaming_content).decode()
+        return list(csv.DictReader(content.splitlines()))
+
+    def test_overnight_hours_split_at_midnight_into_weekday_and_weekend(self):
+        (row,) = self.rows()
+        self.assertEqual(
+            (row["total_hours"], row["weekday_hours"], row["weekend_hours"], row["days_worked"]),
+            ("8.0", "4.0", "4.0", "2"),
+        )
+        days = self.rows(by="day")
+        self.assertEqual([(day["date"], day["weekend"], day["hours"]) for day in days], [
+            ("2026-10-09", "False", "4.0"),
+            ("2026-10-10", "True", "4.0"),
+        ])
+
+    def test_guard_weekend_mask_decides_weekend_hours(self):
+        Guard.objects.filter(id=self.guard.id).update(weekend_mask=0)
+        (row,) = self.rows()
+        self.assertEqual((row["weekday_hours"], row["weekend_hours"]), ("8.0", "0.0"))
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({"guard_id": "x"}, {"start": "2026-10-31", "end": "2026-10-01"}, {"output": "xml"}):
+            params = {"start": "2026-10-01", "end": "2026-10-31", **params}
+            response = self.client.get("/api/attendance/timesheet/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_parquet_without_pyarrow_is_not_acceptable(self):
+        with mock.patch("apps.attendance.views.parquet_available", return_value=False):
+            response = self.client.get(
+                "/api/attendance/timesheet/", {"start": "2026-10-01", "end": "2026-10-31", "output": "parquet"}
+            )
+        self.assertEqual(response.status_code, 406)
+
+
+class ShiftIndexTests(SimpleTestCase):
+    def setUp(self):
+        # 1: 09-17, 2: 22-06 overnight, 3: 16-20 overlapping the end of 1.
+        self.index = ShiftIndex(
+            [(1, time(9), time(17)), (2, time(22), time(6)), (3, time(16), time(20))],
+            {7: {1}},
+        )
+
+    def match(self, hour, minute=0, guard_id=None):
+        return self.index.match(at(hour, minute), guard_id)
+
+    def test_matches_the_occurrence_covering_the_moment(self):
+        self.assertEqual(self.match(9), (1, at(9), at(17)))
+        self.assertIsNone(self.match(8, 59))
+        self.assertIsNone(self.match(21))
+
+    def test_overnight_shift_after_midnight_started_the_day_before(self):
+        self.assertEqual(self.match(23), (2, at(22), at(22) + timedelta(hours=8)))
+        self.assertEqual(self.match(3), (2, at(22) - timedelta(days=1), at(6)))
+
+    def test_overlap_prefers_the_latest_start_and_respects_assignments(self):
+        self.assertEqual(self.match(16, 30).shift_id, 3)
+        self.assertEqual(self.match(16, 30, guard_id=7).shift_id, 1)
+        self.assertIsNone(self.match(18, guard_id=7))
+        self.assertEqual(self.match(18, guard_id=8).shift_id, 3)
+
+
+class ShiftIndexCacheTests(TestCase):
+    def test_index_follows_shift_changes(self):
+        org = Organization.objects.create(name="Org")
+        guard = Guard.objects.create(name="G1", phone="1", organization=org)
+        day = Shift.objects.create(name="Day", start_time=time(9), end_time=time(17), organization=org)
+        self.assertEqual(match_shift(guard, at(10)).shift_id, day.id)
+        self.assertIsNone(match_shift(guard, at(20)))
+        evening = Shift.objects.create(name="Evening", start_time=time(18), end_time=time(23), organization=org)
+        self.assertEqual(match_shift(guard, at(20)).shift_id, evening.id)
+        guard.shifts.add(day)
+        self.assertIsNone(match_shift(guard, at(20)))
+
+
+class NoShowTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.shift = Shift.objects.create(name="Day", start_time=time(9), end_time=time(17), organization=self.org)
+        self.guards = {}
+        for name, mask in (("absent", DEFAULT_WEEKEND_MASK), ("present", DEFAULT_WEEKEND_MASK), ("every day", 0)):
+            guard = Guard.objects.create(name=name, phone=name, organization=self.org, weekend_mask=mask)
+            guard.shifts.add(self.shift)
+            self.guards[name] = guard
+        Guard.objects.create(name="unrostered", phone="u", organization=self.org)
+        Attendance.objects.create(
+            guard=self.guards["present"], organization=self.org, checkin_time=at(9, 5), checkout_time=at(17)
+        )
+
+    def absent(self, day):
+        return set(AttendanceDay.objects.filter(date=day, status="absent").values_list("guard__name", flat=True))
+
+    def test_rostered_guards_without_a_session_are_marked_absent(self):
+        wednesday = at(9).date()
+        self.assertEqual(record_no_shows(wednesday, now=at(9, 10)), [])
+        created = record_no_shows(wednesday, now=at(12), alerts=True)
+        self.assertEqual(len(created), 2)
+        self.assertEqual(self.absent(wednesday), {"absent", "every day"})
+        self.assertEqual(Alert.objects.filter(alert_type="no_show").count(), 2)
+        # Running again finds the recorded days and creates nothing.
+        self.assertEqual(record_no_shows(wednesday, now=at(13)), [])
+
+    def test_weekend_days_are_not_expected(self):
+        saturday = date(2026, 10, 10)
+        record_no_shows(saturday, now=timezone.make_aware(datetime(2026, 10, 10, 12)))
+        self.assertEqual(self.absent(saturday), {"every day"})
+
+    def test_late_checkin_replaces_the_absent_day(self):
+        record_no_shows(at(9).date(), now=at(12))
+        guard = self.guards["absent"]
+        update_days([Attendance.objects.create(
+            guard=guard, organization=self.org, shift=self.shift, checkin_time=at(12, 30)
+        )])
+        self.assertEqual(AttendanceDay.objects.get(guard=guard).status, "late")
@@ -0,0 +1,167 @@
+"""Payroll timesheets: hours worked per guard over a period of days.
+
+A timesheet takes three queries whatever the number of guards: the guards,
+their sessions overlapping the period (ordered by guard, then check-in,
+read with ``iterator``) and their classified days (``AttendanceDay``)
+aggregated per guard. Sessions are clipped to the period and to now, then
+split at local midnights, so hours of an overnight shift land on the days
+they were worked, each counted as a weekday or a weekend day of that guard
+(``Guard.weekend_mask``). Rows are produced one guard at a time, so
+memory is bounded by one guard's days.
+
+Rows are dicts keyed by ``PERIOD_COLUMNS`` (one per guard) or
+``DAY_COLUMNS`` (one per guard and day worked).
+"""
+import csv
+import importlib.util
+import io
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.guards.models import weekend_weekdays
+from .models import Attendance, AttendanceDay
+
+PERIOD_COLUMNS = [
+    "guard_id", "guard_name", "period_start", "period_end", "days_worked", "sessions",
+    "total_hours", "weekday_hours", "weekend_hours", "late_days", "half_days", "absent_days", "overtime_hours",
+]
+DAY_COLUMNS = ["guard_id", "guard_name", "date", "weekend", "hours", "sessions"]
+CHUNK_SIZE = 5000
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def split_by_day(start, end):
+    """``(date, seconds)`` pieces of [start, end) cut at local midnights."""
+    day = timezone.localtime(start).date()
+    while start < end:
+        cut = min(_midnight(day + timedelta(days=1)), end)
+        yield day, (cut - start).total_seconds()
+        start = cut
+        day += timedelta(days=1)
+
+
+def _sessions_by_guard(guard_ids, low, high):
+    """``(guard_id, [(checkin, checkout), ...])`` for sessions overlapping [low, high)."""
+    sessions = (
+        Attendance.objects.filter(guard_id__in=guard_ids, checkin_time__lt=high)
+        .filter(Q(checkout_time__isnull=True) | Q(checkout_time__gt=low))
+        .order_by("guard_id", "checkin_time")
+        .values_list("guard_id", "checkin_time", "checkout_time")
+    )
+    current, intervals = None, []
+    for guard_id, checkin, checkout in sessions.iterator(chunk_size=CHUNK_SIZE):
+        if guard_id != current:
+            if intervals:
+                yield current, intervals
+            current, intervals = guard_id, []
+        intervals.append((checkin, checkout))
+    if intervals:
+        yield current, intervals
+
+
+def _guard_days(intervals, low, high):
+    """``{date: [seconds, sessions]}`` of the intervals clipped to [low, high)."""
+    days = {}
+    for checkin, checkout in intervals:
+        start, end = max(checkin, low), min(checkout or high, high)
+        for day, seconds in split_by_day(start, end):
+            totals = days.setdefault(day, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+    return days
+
+
+def timesheet_rows(guards, start_date, end_date, by_day=False):
+    """Timesheet rows for ``guards`` (a Guard queryset) from ``start_date`` to ``end_date`` inclusive."""
+    low = _midnight(start_date)
+    high = min(_midnight(end_date + timedelta(days=1)), timezone.now())
+    guard_list = list(guards.order_by("id").values_list("id", "name", "weekend_mask"))
+    guard_ids = [guard_id for guard_id, _, _ in guard_list]
+    facts = {}
+    if not by_day:
+        facts = {
+            row["guard_id"]: row
+            for row in AttendanceDay.objects.filter(
+                guard_id__in=guard_ids, date__gte=start_date, date__lte=end_date
+            )
+            .values("guard_id")
+            .annotate(
+                late_days=Count("id", filter=Q(status="late")),
+                half_days=Count("id", filter=Q(status="half")),
+                absent_days=Count("id", filter=Q(status="absent")),
+                overtime_minutes=Sum("overtime_minutes"),
+            )
+        }
+    sessions = _sessions_by_guard(guard_ids, low, high)
+    pending = next(sessions, None)
+    for guard_id, name, mask in guard_list:
+        intervals = []
+        if pending is not None and pending[0] == guard_id:
+            intervals = pending[1]
+            pending = next(sessions, None)
+        weekend = weekend_weekdays(mask)
+        days = _guard_days(intervals, low, high)
+        if by_day:
+            for day, (seconds, count) in sorted(days.items()):
+                yield {
+                    "guard_id": guard_id,
+                    "guard_name": name,
+                    "date": day.isoformat(),
+                    "weekend": day.weekday() in weekend,
+                    "hours": round(seconds / 3600, 2),
+                    "sessions": count,
+                }
+            continue
+        weekend_seconds = sum(seconds for day, (seconds, _) in days.items() if day.weekday() in weekend)
+        total_seconds = sum(seconds for seconds, _ in days.values())
+        fact = facts.get(guard_id, {})
+        yield {
+            "guard_id": guard_id,
+            "guard_name": name,
+            "period_start": start_date.isoformat(),
+            "period_end": end_date.isoformat(),
+            "days_worked": sum(1 for seconds, _ in days.values() if seconds > 0),
+            "sessions": len(intervals),
+            "total_hours": round(total_seconds / 3600, 2),
+            "weekday_hours": round((total_seconds - weekend_seconds) / 3600, 2),
+            "weekend_hours": round(weekend_seconds / 3600, 2),
+            "late_days": fact.get("late_days", 0),
+            "half_days": fact.get("half_days", 0),
+            "absent_days": fact.get("absent_days", 0),
+            "overtime_hours": round((fact.get("overtime_minutes") or 0) / 60, 2),
+        }
+
+
+def csv_chunks(columns, rows):
+    """Encode rows as CSV, a header line first and then one chunk per row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def parquet_available():
+    """Whether ``pyarrow`` is installed; check before building rows for ``parquet_bytes``."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def parquet_bytes(columns, rows):
+    """The rows as a Parquet file; needs ``pyarrow`` (see ``parquet_available``)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = list(rows)
+    table = pa.table({column: [row[column] for row in rows] for column in columns})
+    output = io.BytesIO()
+    pq.write_table(table, output)
+    return output.getvalue()
@@ -4,9 +4,12 @@ from . import views
 urlpatterns = [
     path('', views.AttendanceListView.as_view(), name='attendance-list'),
     path('checkin/', views.checkin, name='checkin'),
+    path('checkin/bulk/', views.bulk_checkin, name='bulk-checkin'),
+    path('checkout/bulk/', views.bulk_checkout, name='bulk-checkout'),
     path('checkout/<int:attendance_id>/', views.checkout, name='checkout'),
     path('active/', views.active_attendances, name='active-attendances'),
     path('export/', views.export_attendance, name='export-attendance'),
+    path('timesheet/', views.timesheet, name='timesheet'),
     path('summary/', views.attendance_summary, name='attendance-summary'),
 ]
 
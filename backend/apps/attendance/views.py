@@ -2,14 +2,26 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 import csv
-from .models import Attendance
-from .serializers import AttendanceSerializer, CheckinSerializer, CheckoutSerializer
+from .classification import update_days
+from .models import Attendance, AttendanceDay
+from .serializers import (
+    AttendanceSerializer,
+    BulkCheckinSerializer,
+    BulkCheckoutSerializer,
+    CheckinSerializer,
+    CheckoutSerializer,
+)
+from .services import bulk_check_in, bulk_check_out
+from .timesheets import DAY_COLUMNS, PERIOD_COLUMNS, csv_chunks, parquet_available, parquet_bytes, timesheet_rows
 from apps.guards.models import Guard
+from apps.authentication.versioning import etag_for
 from calendar import monthrange
 from datetime import date
 
+TIMESHEET_MAX_DAYS = 366
+
 # --- Attendance summary for calendar ---
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
@@ -34,39 +46,39 @@ def attendance_summary(request):
         if not guard:
             return Response({'error': 'Guard not found'}, status=404)
 
-    # Get all attendances for this guard in the month
-    # from .models import Attendance  # already imported at top
+    # Classified days for this guard in the month (see classification.py)
     start_date = date(year, month, 1)
     end_date = date(year, month, monthrange(year, month)[1])
-    attendances = Attendance.objects.filter(guard=guard, checkin_time__date__gte=start_date, checkin_time__date__lte=end_date)
+    facts = {
+        fact.date: fact
+        for fact in AttendanceDay.objects.filter(guard=guard, date__gte=start_date, date__lte=end_date)
+    }
 
     # Build a map: { 'YYYY-MM-DD': 'present'|'absent'|'late'|'half'|'weekend' }
     days = {}
-    weekends = []
-    # Get weekend days from guard profile if available, else default to [6, 0] (Sat, Sun)
-    weekend_days = [6, 0]
-    if hasattr(guard, 'weekend_days') and guard.weekend_days:
-        # Parse as comma-separated string
-        day_map = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6}
-        weekend_days = [day_map[d.strip().lower()] for d in guard.weekend_days.split(',') if d.strip().lower() in day_map]
+    details = {}
+    # Weekend days from the guard profile (Saturday and Sunday unless set otherwise)
+    weekend_days = sorted(guard.weekend_weekdays)
 
     for d in range(1, monthrange(year, month)[1] + 1):
         dt = date(year, month, d)
         key = dt.isoformat()
+        fact = facts.get(dt)
+        if fact:
+            details[key] = {
+                'late_minutes': fact.late_minutes,
+                'early_leave_minutes': fact.early_leave_minutes,
+                'overtime_minutes': fact.overtime_minutes,
+                'worked_minutes': fact.worked_minutes,
+            }
         if dt.weekday() in weekend_days:
             days[key] = 'weekend'
-            weekends.append(dt.weekday())
+        elif fact:
+            days[key] = fact.status
         else:
-            # Find attendance for this day
-            att = [a for a in attendances if a.checkin_time.date() == dt]
-            if att:
-                # You can add more logic for late/half here
-                days[key] = 'present'
-            else:
-                days[key] = 'absent'
-
+            days[key] = 'absent'
 
-    return Response({'days': days, 'weekends': weekend_days})
+    return Response({'days': days, 'details': details, 'weekends': weekend_days})
 
 # Helper to get the guard object for the logged-in user
 
@@ -87,7 +99,7 @@ class AttendanceListView(generics.ListAPIView):
         if user.role == "guard":
             guard = get_guard_for_user(user)
             return Attendance.objects.filter(guard=guard)
-        return Attendance.objects.filter(guard__organization=user.organization)
+        return Attendance.objects.filter(organization=user.organization)
 
 
 @api_view(["POST"])
@@ -102,6 +114,40 @@ def checkin(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_checkin(request):
+    """Check in a list of guards at once (roll call); returns a result per item."""
+    if request.user.role == "guard":
+        return Response(
+            {"error": "Only admins and managers can check in guards in bulk."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    serializer = BulkCheckinSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+    results = bulk_check_in(request.user.organization, data["items"], data["checkin_method"])
+    return Response({"results": results})
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_checkout(request):
+    """Check out a list of open attendances at once; returns a result per item."""
+    if request.user.role == "guard":
+        return Response(
+            {"error": "Only admins and managers can check out guards in bulk."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    serializer = BulkCheckoutSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+    results = bulk_check_out(request.user.organization, data["items"], data["checkout_method"])
+    return Response({"results": results})
+
+
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
 def checkout(request, attendance_id):
@@ -109,7 +155,7 @@ def checkout(request, attendance_id):
     try:
         attendance = Attendance.objects.get(
             id=attendance_id,
-            guard__organization=user.organization,
+            organization=user.organization,
             checkout_time__isnull=True,
         )
         if user.role == "guard":
@@ -140,12 +186,14 @@ def checkout(request, attendance_id):
                 (attendance.notes or "") + "\n" + serializer.validated_data["notes"]
             )
         attendance.save()
+        update_days([attendance])
         return Response(AttendanceSerializer(attendance).data)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
+@etag_for("attendance", "guards")
 def active_attendances(request):
     user = request.user
     if user.role == "guard":
@@ -153,7 +201,7 @@ def active_attendances(request):
         active = Attendance.objects.filter(guard=guard, checkout_time__isnull=True)
     else:
         active = Attendance.objects.filter(
-            guard__organization=user.organization, checkout_time__isnull=True
+            organization=user.organization, checkout_time__isnull=True
         )
     serializer = AttendanceSerializer(active, many=True)
     return Response(serializer.data)
@@ -167,7 +215,7 @@ def export_attendance(request):
         guard = get_guard_for_user(user)
         attendances = Attendance.objects.filter(guard=guard)
     else:
-        attendances = Attendance.objects.filter(guard__organization=user.organization)
+        attendances = Attendance.objects.filter(organization=user.organization)
     response = HttpResponse(content_type="text/csv")
     response["Content-Disposition"] = 'attachment; filename="attendance_export.csv"'
     writer = csv.writer(response)
@@ -196,3 +244,47 @@ def export_attendance(request):
             ]
         )
     return response
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def timesheet(request):
+    """Hours per guard (or per guard and day with ``by=day``) from ``start`` to ``end`` inclusive.
+
+    Streams CSV by default; ``output=parquet`` returns a Parquet file when
+    pyarrow is installed.
+    """
+    user = request.user
+    try:
+        start = date.fromisoformat(request.GET.get("start", ""))
+        end = date.fromisoformat(request.GET.get("end", ""))
+    except ValueError:
+        return Response({"error": "start and end must be YYYY-MM-DD dates"}, status=400)
+    if not 0 <= (end - start).days < TIMESHEET_MAX_DAYS:
+        return Response(
+            {"error": f"end must be on or after start and at most {TIMESHEET_MAX_DAYS} days apart"},
+            status=400,
+        )
+    by_day = request.GET.get("by") == "day"
+    output = request.GET.get("output", "csv")
+    if output not in ("csv", "parquet"):
+        return Response({"error": "output must be csv or parquet"}, status=400)
+    if output == "parquet" and not parquet_available():
+        return Response({"error": "Parquet output requires pyarrow"}, status=406)
+    guards = Guard.objects.filter(organization=user.organization)
+    if user.role == "guard":
+        guards = guards.filter(user=user)
+    guard_id = request.GET.get("guard_id")
+    if guard_id:
+        if not guard_id.isdigit():
+            return Response({"error": "guard_id must be an integer"}, status=400)
+        guards = guards.filter(id=guard_id)
+    columns = DAY_COLUMNS if by_day else PERIOD_COLUMNS
+    rows = timesheet_rows(guards, start, end, by_day)
+    filename = f"timesheet_{start}_{end}.{output}"
+    if output == "parquet":
+        response = HttpResponse(parquet_bytes(columns, rows), content_type="application/vnd.apache.parquet")
+    else:
+        response = StreamingHttpResponse(csv_chunks(columns, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,32 @@
+import time
+
+from django.db import transaction
+from django.db.models import Max, Min, OuterRef, Subquery
+
+
+def backfill_organization(model, guard_model, batch_size=5000, pause=0, log=None):
+    """Copy ``guard.organization`` onto rows of ``model`` whose organization is null.
+
+    Works through the primary key range in short transactions so it can run
+    against a live database without holding long locks. Accepts historical
+    models so migrations can reuse it. Returns the number of rows updated.
+    """
+    pending = model.objects.filter(organization__isnull=True)
+    bounds = pending.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return 0
+    guard_org = Subquery(
+        guard_model.objects.filter(id=OuterRef("guard_id")).values("organization_id")[:1]
+    )
+    total = 0
+    for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+        with transaction.atomic():
+            updated = pending.filter(id__gte=start, id__lt=start + batch_size).update(
+                organization_id=guard_org
+            )
+        total += updated
+        if log and updated:
+            log(f"{model._meta.label}: ids {start}-{start + batch_size - 1}, {updated} rows")
+        if pause:
+            time.sleep(pause)
+    return total
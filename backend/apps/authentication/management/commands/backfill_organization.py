@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.attendance.models import Attendance
+from apps.authentication.backfill import backfill_organization
+from apps.guards.models import Guard
+from apps.reports.models import Alert
+from apps.tracking.models import LocationLog
+
+
+class Command(BaseCommand):
+    help = 'Fill missing organization values on location logs, attendances and alerts from their guard, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows updated per transaction.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        for model in (LocationLog, Attendance, Alert):
+            count = backfill_organization(
+                model,
+                Guard,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                log=self.stdout.write,
+            )
+            self.stdout.write(self.style.SUCCESS(f'{model._meta.label}: backfilled {count} rows'))
@@ -0,0 +1,130 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+# Per-organization change counters kept in the cache. Each write to a tracked
+# model bumps the counter for its scope, so a read endpoint can tell whether
+# anything changed with one cache round-trip instead of running its queries.
+VERSION_KEY = "orgversion:{scope}:{org_id}"
+VERSION_TIMEOUT = None
+
+
+def _key(scope, org_id):
+    return VERSION_KEY.format(scope=scope, org_id=org_id)
+
+
+def get_versions(org_id, scopes):
+    """Return the current version of each scope for an organization."""
+    keys = [_key(scope, org_id) for scope in scopes]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        value = found.get(key)
+        if value is None:
+            # Seed missing counters with the clock so a cache flush can
+            # never hand out a version a client has already seen.
+            cache.add(key, time.time_ns(), VERSION_TIMEOUT)
+            value = cache.get(key)
+        versions.append(value)
+    return versions
+
+
+def bump_version(org_id, scope):
+    """Mark data in a scope as changed for an organization; returns the new version."""
+    if org_id is None:
+        return None
+    key = _key(scope, org_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, VERSION_TIMEOUT)
+        return version
+
+
+def every(interval):
+    """Time bucket changing once per ``interval`` (a timedelta) of wall-clock time."""
+    seconds = interval.total_seconds()
+    return lambda: int(time.time() // seconds)
+
+
+def local_date():
+    """Time bucket changing at local midnight, for responses about "today"."""
+    return timezone.localdate().isoformat()
+
+
+def compute_etag(request, scopes, bucket=None):
+    """ETag of a response built from ``scopes``.
+
+    Responses that also depend on the clock (a sliding window, "today") pass
+    a ``bucket`` callable whose value is folded in, so their ETag expires
+    when the bucket changes even if nothing was written.
+    """
+    user = request.user
+    versions = get_versions(user.organization_id, scopes)
+    parts = [str(user.id), user.role, request.get_full_path()] + [str(v) for v in versions]
+    if bucket is not None:
+        parts.append(str(bucket()))
+    raw = "|".join(parts)
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def conditional_response(request, scopes, build_response, bucket=None):
+    """Answer 304 when the client's ETag is current, else build and tag the response."""
+    etag = compute_etag(request, scopes, bucket)
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build_response()
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def etag_for(*scopes, bucket=None):
+    """Decorator for GET function views that depend on the given scopes."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return conditional_response(
+                request, scopes, lambda: view(request, *args, **kwargs), bucket
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def organization_id_for(instance):
+    """Organization of a guard-owned row, tolerating rows without the FK set."""
+    if instance.organization_id is not None:
+        return instance.organization_id
+    from apps.guards.models import Guard
+
+    return (
+        Guard.objects.filter(id=instance.guard_id)
+        .values_list("organization_id", flat=True)
+        .first()
+    )
+
+
+def deleted_in_cascade(sender, origin):
+    """Whether a ``post_delete`` of ``sender`` comes from deleting another model's rows."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not sender
@@ -5,3 +5,5 @@ class GuardsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.guards'
 
+    def ready(self):
+        from . import signals  # noqa: F401
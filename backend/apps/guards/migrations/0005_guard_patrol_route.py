@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+        ('patrols', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guard',
+            name='patrol_route',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='guards', to='patrols.patrolroute'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DEFAULT_WEEKEND_MASK = (1 << 5) | (1 << 6)
+
+
+def text_mask(value):
+    """The bitmask of comma-separated day names.
+
+    Empty and unparseable values (the column defaulted to '') were read as
+    the default weekend, so they map to it; mask 0 is never produced here.
+    """
+    days = {day.strip().lower() for day in (value or '').split(',')}
+    mask = sum(1 << weekday for weekday, day in enumerate(DAYS) if day in days)
+    return mask or DEFAULT_WEEKEND_MASK
+
+
+def text_to_mask(apps, schema_editor):
+    """Convert comma-separated day names to a bitmask, one UPDATE per distinct value."""
+    Guard = apps.get_model('guards', 'Guard')
+    for value in Guard.objects.values_list('weekend_days', flat=True).distinct():
+        Guard.objects.filter(weekend_days=value).update(weekend_mask=text_mask(value))
+
+
+def mask_to_text(apps, schema_editor):
+    Guard = apps.get_model('guards', 'Guard')
+    for mask in Guard.objects.values_list('weekend_mask', flat=True).distinct():
+        text = ','.join(day for weekday, day in enumerate(DAYS) if mask & (1 << weekday))
+        Guard.objects.filter(weekend_mask=mask).update(weekend_days=text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guards', '0005_guard_patrol_route'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guard',
+            name='weekend_mask',
+            field=models.PositiveSmallIntegerField(
+                default=DEFAULT_WEEKEND_MASK, help_text='Days off: bit n set for weekday n (Monday = 0)'
+            ),
+        ),
+        migrations.RunPython(text_to_mask, mask_to_text),
+        migrations.RemoveField(
+            model_name='guard',
+            name='weekend_days',
+        ),
+    ]
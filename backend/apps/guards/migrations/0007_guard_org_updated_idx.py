@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_shift_timestamps_sync_indexes'),
+        ('authentication', '0001_initial'),
+        ('guards', '0006_guard_weekend_mask'),
+        ('patrols', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guard',
+            index=models.Index(fields=['organization', 'updated_at'], name='guard_org_updated_idx'),
+        ),
+    ]
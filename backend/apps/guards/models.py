@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.lookups import Exact
 from apps.authentication.models import Organization, User
 from django.contrib.postgres.fields import ArrayField
  # Removed direct import to avoid circular import
@@ -13,19 +15,56 @@ DAYS_OF_WEEK = [
     ("sunday", "Sunday"),
 ]
 
+# Weekend bitmask: bit ``n`` is set when weekday ``n`` (Monday is 0) is off.
+# Saturday and Sunday unless set otherwise.
+DEFAULT_WEEKEND_MASK = (1 << 5) | (1 << 6)
+
+
+def parse_weekend_days(value):
+    """Weekday numbers (Monday is 0) in a comma-separated list of day names.
+
+    Unknown names are skipped; None when ``value`` is empty or names no known
+    day, which means the default weekend, as it did before ``weekend_mask``.
+    """
+    names = [name for name, _ in DAYS_OF_WEEK]
+    weekdays = {names.index(day.strip().lower()) for day in (value or "").split(",") if day.strip().lower() in names}
+    return weekdays or None
+
+
+def weekend_mask(weekdays):
+    return sum(1 << weekday for weekday in set(weekdays))
+
+
+def weekend_weekdays(mask):
+    """Weekday numbers set in a weekend bitmask."""
+    return {weekday for weekday in range(7) if mask & (1 << weekday)}
+
+
+def works_on(weekday, prefix=""):
+    """Filter expression for guards whose weekend excludes ``weekday``.
+
+    ``prefix`` reaches the guard through a relation, e.g. ``"guard__"``.
+    """
+    return Exact(F(f"{prefix}weekend_mask").bitand(1 << weekday), 0)
+
+
 class Guard(models.Model):
     name = models.CharField(max_length=255)
     phone = models.CharField(max_length=20)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='guards')
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name='guard_profile')
     assigned_route = models.CharField(max_length=255, blank=True, null=True)
+    patrol_route = models.ForeignKey(
+        'patrols.PatrolRoute', on_delete=models.SET_NULL, null=True, blank=True, related_name='guards'
+    )
     is_active = models.BooleanField(default=True)
     # Geofence fields
     geofence_latitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
     geofence_longitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
     geofence_radius_m = models.PositiveIntegerField(null=True, blank=True, help_text='Radius in meters')
-    # Use TextField to store comma-separated days (for MySQL compatibility)
-    weekend_days = models.TextField(blank=True, default='')
+    weekend_mask = models.PositiveSmallIntegerField(
+        default=DEFAULT_WEEKEND_MASK, help_text='Days off: bit n set for weekday n (Monday = 0)'
+    )
     shifts = models.ManyToManyField('attendance.Shift', related_name='guards', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -33,6 +72,25 @@ class Guard(models.Model):
     def __str__(self):
         return f"{self.name} - {self.organization.name}"
 
+    @property
+    def weekend_weekdays(self):
+        """Weekday numbers (Monday is 0) of the guard's weekend."""
+        return weekend_weekdays(self.weekend_mask)
+
+    @property
+    def weekend_days(self):
+        """The weekend as comma-separated day names, as it was stored before ``weekend_mask``."""
+        return ",".join(DAYS_OF_WEEK[weekday][0] for weekday in sorted(self.weekend_weekdays))
+
+    @weekend_days.setter
+    def weekend_days(self, value):
+        weekdays = parse_weekend_days(value)
+        self.weekend_mask = DEFAULT_WEEKEND_MASK if weekdays is None else weekend_mask(weekdays)
+
     class Meta:
         unique_together = ['phone', 'organization']
+        indexes = [
+            # Incremental sync (apps/sync).
+            models.Index(fields=['organization', 'updated_at'], name='guard_org_updated_idx'),
+        ]
 
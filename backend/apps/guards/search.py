@@ -0,0 +1,190 @@
+"""Substring search over guard name, phone and assigned route.
+
+Each organization's guards are held in an in-process trigram index: every
+three-character substring of a guard's lowercased search text points to the
+guards containing it, in compact ``array`` posting lists. A query of three
+or more characters scans only the shortest posting list among its trigrams
+and confirms each candidate with a substring test; shorter queries scan the
+texts directly. Results are ranked name-prefix matches first, then word
+prefix matches, then other substring matches, each by name.
+
+Guard saves and deletes update the process's cached index in place once
+committed (see ``signals.py``): a changed guard's old entry is blanked and
+a new one appended. When the organization's ``"guards"`` version moved for
+any other reason (another process, a bulk update), or blanked entries pile
+up, the stale index keeps serving while a background thread rebuilds it.
+Only the first search per organization and process builds synchronously.
+"""
+import logging
+import re
+import threading
+from array import array
+
+from django.db import connection
+
+from apps.authentication.versioning import get_versions
+from .models import Guard
+
+logger = logging.getLogger(__name__)
+
+NGRAM = 3
+NON_DIGITS = re.compile(r"\D")
+# Characters after which a match counts as the start of a word.
+WORD_SEPARATORS = " \x00-_/.,(+"
+
+
+def search_text(name, phone, route):
+    """Lowercased fields joined by NUL, with the phone also as bare digits."""
+    phone = phone or ""
+    return "\x00".join([(name or "").lower(), phone.lower(), NON_DIGITS.sub("", phone), (route or "").lower()])
+
+
+class GuardSearchIndex:
+    def __init__(self, guards):
+        """``guards`` are ``(id, name, phone, assigned_route, is_active)`` rows."""
+        self.ids = []
+        self.names = []
+        self.texts = []
+        self.active = []
+        self.positions = {}
+        self.blanked = 0
+        postings = {}
+        for guard_id, name, phone, route, is_active in guards:
+            position = self._append(guard_id, name, phone, route, is_active)
+            for gram in self._grams(self.texts[position]):
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: array("l", positions) for gram, positions in postings.items()}
+
+    @staticmethod
+    def _grams(text):
+        return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+    def _append(self, guard_id, name, phone, route, is_active):
+        position = len(self.ids)
+        self.ids.append(guard_id)
+        self.names.append((name or "").lower())
+        self.texts.append(search_text(name, phone, route))
+        self.active.append(is_active)
+        self.positions[guard_id] = position
+        return position
+
+    def remove(self, guard_id):
+        """Blank the guard's entry; an empty text matches no query."""
+        position = self.positions.pop(guard_id, None)
+        if position is not None:
+            self.texts[position] = ""
+            self.blanked += 1
+
+    def update(self, guard_id, name, phone, route, is_active):
+        """Replace the guard's entry, or add one for a new guard."""
+        self.remove(guard_id)
+        position = self._append(guard_id, name, phone, route, is_active)
+        for gram in self._grams(self.texts[position]):
+            self.postings.setdefault(gram, array("l")).append(position)
+
+    def _candidates(self, query):
+        if len(query) < NGRAM:
+            return range(len(self.texts))
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        lists = [self.postings.get(gram) for gram in grams]
+        if any(positions is None for positions in lists):
+            return ()
+        return min(lists, key=len)
+
+    def search(self, query, active=None):
+        """Ids of guards whose name, phone or route contains ``query``, best matches first."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        word_starts = [separator + query for separator in WORD_SEPARATORS]
+        ranked = []
+        for position in self._candidates(query):
+            text = self.texts[position]
+            if query not in text or (active is not None and self.active[position] != active):
+                continue
+            name = self.names[position]
+            if name.startswith(query):
+                rank = 0
+            elif any(word_start in text for word_start in word_starts):
+                rank = 1
+            else:
+                rank = 2
+            ranked.append((rank, name, self.ids[position]))
+        ranked.sort()
+        return [guard_id for _, _, guard_id in ranked]
+
+
+def build_index(organization_id):
+    guards = Guard.objects.filter(organization_id=organization_id).order_by("id").values_list(
+        "id", "name", "phone", "assigned_route", "is_active"
+    )
+    return GuardSearchIndex(guards.iterator(chunk_size=5000))
+
+
+# organization id -> (guards version, index), and organizations being rebuilt.
+_indexes = {}
+_rebuilding = set()
+_indexes_lock = threading.Lock()
+
+
+def _build(organization_id):
+    # The version is read first: changes made during the build leave it behind.
+    version = get_versions(organization_id, ["guards"])[0]
+    index = build_index(organization_id)
+    with _indexes_lock:
+        _indexes[organization_id] = (version, index)
+    return index
+
+
+def _rebuild(organization_id):
+    try:
+        _build(organization_id)
+    except Exception:
+        logger.exception("Rebuilding the guard search index of organization %s failed", organization_id)
+    finally:
+        with _indexes_lock:
+            _rebuilding.discard(organization_id)
+        connection.close()
+
+
+def _rebuild_in_background(organization_id):
+    with _indexes_lock:
+        if organization_id in _rebuilding:
+            return
+        _rebuilding.add(organization_id)
+    threading.Thread(
+        target=_rebuild, args=(organization_id,), name="guard-search-rebuild", daemon=True
+    ).start()
+
+
+def search_index(organization_id):
+    """The organization's index; a stale one is served while it is rebuilt in the background."""
+    cached = _indexes.get(organization_id)
+    if cached is None:
+        return _build(organization_id)
+    version, index = cached
+    if version != get_versions(organization_id, ["guards"])[0] or index.blanked > len(index.positions):
+        _rebuild_in_background(organization_id)
+    return index
+
+
+def apply_change(organization_id, version, guard_id, row=None):
+    """Apply one committed guard change to the cached index, if any.
+
+    ``version`` is the organization's ``"guards"`` version right after the
+    change bumped it; ``row`` is ``(name, phone, assigned_route, is_active)``,
+    or None for a deleted guard. The index is marked current only when that
+    bump was the sole change since it was cached, so changes made by other
+    processes still cause a rebuild.
+    """
+    with _indexes_lock:
+        cached = _indexes.get(organization_id)
+        if cached is None:
+            return
+        cached_version, index = cached
+        if row is None:
+            index.remove(guard_id)
+        else:
+            index.update(guard_id, *row)
+        if cached_version == version - 1:
+            _indexes[organization_id] = (version, index)
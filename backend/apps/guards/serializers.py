@@ -2,6 +2,12 @@ from rest_framework import serializers
 from .models import Guard
 
 
+def validate_patrol_route(serializer, value):
+    if value is not None and value.organization_id != serializer.context["request"].user.organization_id:
+        raise serializers.ValidationError("Patrol route not found or not in your organization.")
+    return value
+
+
 class GuardSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source="user.username", read_only=True)
 
@@ -12,6 +18,7 @@ class GuardSerializer(serializers.ModelSerializer):
             "name",
             "phone",
             "assigned_route",
+            "patrol_route",
             "is_active",
             "username",
             "created_at",
@@ -19,6 +26,9 @@ class GuardSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def validate_patrol_route(self, value):
+        return validate_patrol_route(self, value)
+
     def create(self, validated_data):
         validated_data["organization"] = self.context["request"].user.organization
         return super().create(validated_data)
@@ -27,7 +37,10 @@ class GuardSerializer(serializers.ModelSerializer):
 class GuardCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Guard
-        fields = ["name", "phone", "assigned_route"]
+        fields = ["name", "phone", "assigned_route", "patrol_route"]
+
+    def validate_patrol_route(self, value):
+        return validate_patrol_route(self, value)
 
     def create(self, validated_data):
         validated_data["organization"] = self.context["request"].user.organization
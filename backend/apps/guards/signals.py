@@ -0,0 +1,30 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.authentication.versioning import bump_version
+from .models import Guard
+from .search import apply_change
+
+# Scopes holding rows that cascade from a guard. Those models have no delete
+# receivers of their own, so their rows are bulk-deleted and the versions are
+# bumped here, once per guard.
+CASCADED_SCOPES = ("locations", "attendance", "alerts")
+
+
+@receiver([post_save, post_delete], sender=Guard)
+def bump_guards_version(sender, instance, signal, **kwargs):
+    version = bump_version(instance.organization_id, "guards")
+    row = None
+    if signal is post_save:
+        row = (instance.name, instance.phone, instance.assigned_route, instance.is_active)
+    # The search index only sees committed changes.
+    transaction.on_commit(partial(apply_change, instance.organization_id, version, instance.pk, row))
+
+
+@receiver(post_delete, sender=Guard)
+def bump_cascaded_versions(sender, instance, **kwargs):
+    for scope in CASCADED_SCOPES:
+        bump_version(instance.organization_id, scope)
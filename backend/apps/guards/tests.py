@@ -0,0 +1,125 @@
+from importlib import import_module
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.attendance.models import Attendance
+from apps.authentication.models import Organization, User
+from apps.authentication.versioning import bump_version
+from . import search
+from .models import DEFAULT_WEEKEND_MASK, Guard, works_on
+from .search import GuardSearchIndex
+
+weekend_migration = import_module("apps.guards.migrations.0006_guard_weekend_mask")
+
+SATURDAY, SUNDAY = 5, 6
+
+
+class WeekendMaskTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+
+    def test_migration_maps_empty_and_unparseable_text_to_the_default(self):
+        for value in (None, "", " , ", "someday"):
+            self.assertEqual(weekend_migration.text_mask(value), DEFAULT_WEEKEND_MASK, value)
+        self.assertEqual(weekend_migration.text_mask("Friday, saturday"), (1 << 4) | (1 << SATURDAY))
+        self.assertEqual(weekend_migration.text_mask("monday,someday"), 1)
+
+    def test_setter_keeps_one_default(self):
+        guard = Guard(name="G", phone="1", organization=self.org)
+        self.assertEqual(guard.weekend_mask, DEFAULT_WEEKEND_MASK)
+        for value in (None, "", "someday"):
+            guard.weekend_mask = 0
+            guard.weekend_days = value
+            self.assertEqual(guard.weekend_mask, DEFAULT_WEEKEND_MASK, value)
+        guard.weekend_days = "sunday,friday"
+        self.assertEqual(guard.weekend_weekdays, {4, SUNDAY})
+        self.assertEqual(guard.weekend_days, "friday,sunday")
+
+    def test_works_on_excludes_weekend_days(self):
+        default = Guard.objects.create(name="Default", phone="1", organization=self.org)
+        every_day = Guard.objects.create(name="Every day", phone="2", organization=self.org, weekend_mask=0)
+        fridays_off = Guard.objects.create(name="Fridays off", phone="3", organization=self.org, weekend_days="friday")
+
+        def working(weekday):
+            return set(Guard.objects.filter(works_on(weekday)).values_list("name", flat=True))
+
+        self.assertEqual(working(SATURDAY), {every_day.name, fridays_off.name})
+        self.assertEqual(working(4), {default.name, every_day.name})
+        self.assertEqual(working(0), {default.name, every_day.name, fridays_off.name})
+
+
+class GuardSearchIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = GuardSearchIndex([
+            (1, "Anna Smith", "+1 (555) 010-2030", "North Gate", True),
+            (2, "Hannah Jones", "555-0199", None, True),
+            (3, "Ann Lee", "", "Annex", False),
+        ])
+
+    def test_ranks_name_prefix_then_word_prefix_then_substring(self):
+        self.assertEqual(self.index.search("ann"), [3, 1, 2])
+        self.assertEqual(self.index.search("smi"), [1])
+        self.assertEqual(self.index.search("  NORTH "), [1])
+
+    def test_matches_phone_digits_and_short_queries(self):
+        self.assertEqual(self.index.search("5550102"), [1])
+        self.assertEqual(self.index.search("99"), [2])
+        self.assertEqual(self.index.search("zz"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_active_filter_and_in_place_updates(self):
+        self.assertEqual(self.index.search("ann", active=False), [3])
+        self.index.update(3, "Bob", "", None, True)
+        self.index.remove(1)
+        self.assertEqual(self.index.search("ann"), [2])
+        self.assertEqual(self.index.search("bob", active=True), [3])
+
+
+class GuardSearchViewTests(TestCase):
+    def setUp(self):
+        search._indexes.clear()
+        self.addCleanup(search._indexes.clear)
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guards = [
+            Guard.objects.create(name=f"Patrol {number}", phone=str(number), organization=self.org)
+            for number in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def names(self, **params):
+        data = self.client.get("/api/guards/", params).data
+        return [guard["name"] for guard in data]
+
+    def test_saves_and_deletes_update_the_index_without_a_rebuild(self):
+        self.assertEqual(len(self.names(search="patrol")), 5)
+        with mock.patch.object(search, "build_index", side_effect=AssertionError("rebuilt")):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.guards[0].name = "Zed"
+                self.guards[0].save()
+                self.guards[1].delete()
+            self.assertEqual(self.names(search="zed"), ["Zed"])
+            self.assertEqual(self.names(search="patrol"), ["Patrol 2", "Patrol 3", "Patrol 4"])
+
+    def test_external_changes_serve_the_stale_index_while_rebuilding(self):
+        self.assertEqual(len(self.names(search="patrol")), 5)
+        Guard.objects.filter(pk=self.guards[4].pk).update(name="Zed")
+        bump_version(self.org.id, "guards")
+        with mock.patch.object(search, "_rebuild_in_background") as rebuild:
+            self.assertEqual(len(self.names(search="patrol")), 5)
+        rebuild.assert_called_once_with(self.org.id)
+        search._build(self.org.id)
+        self.assertEqual(self.names(search="zed"), ["Zed"])
+
+    def test_sql_filters_apply_to_matches_in_slices(self):
+        Attendance.objects.create(guard=self.guards[3], organization=self.org, checkin_time=timezone.now())
+        with mock.patch("apps.guards.views.FILTER_BATCH_SIZE", 2):
+            self.assertEqual(self.names(search="patrol", on_duty="true"), ["Patrol 3"])
+            self.assertEqual(len(self.names(search="patrol", on_duty="false")), 4)
+            data = self.client.get("/api/guards/", {"search": "patrol", "on_duty": "false", "limit": 2}).data
+        self.assertEqual(data["count"], 4)
+        self.assertEqual([guard["name"] for guard in data["results"]], ["Patrol 0", "Patrol 1"])
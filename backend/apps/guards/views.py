@@ -1,14 +1,65 @@
+from django.db.models import Exists, OuterRef
 from rest_framework import generics, permissions
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
+from apps.attendance.models import Attendance
 from .models import Guard
+from .search import search_index
 from .serializers import GuardSerializer, GuardCreateSerializer
 
+# Search results are checked against the SQL filters this many ids at a time.
+FILTER_BATCH_SIZE = 1000
+
+
+def _flag(value):
+    """``true``/``false`` query values as booleans, anything else as None."""
+    return {'true': True, 'false': False}.get((value or '').lower())
+
+
 class GuardListCreateView(generics.ListCreateAPIView):
+    """Guards of the organization.
+
+    ``?search=`` matches a substring of name, phone or assigned route, best
+    matches first; ``?is_active=``, ``?on_duty=`` (true/false) and
+    ``?shift=<id>`` filter. Pass ``?limit=&offset=`` to page the results.
+    """
     serializer_class = GuardSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LimitOffsetPagination
 
     def get_queryset(self):
-        return Guard.objects.filter(organization=self.request.user.organization)
+        queryset = Guard.objects.filter(organization=self.request.user.organization).select_related('user')
+        if self.request.method != 'GET':
+            return queryset
+        params = self.request.query_params
+        if _flag(params.get('is_active')) is not None:
+            queryset = queryset.filter(is_active=_flag(params['is_active']))
+        if _flag(params.get('on_duty')) is not None:
+            on_duty = Exists(Attendance.objects.filter(guard=OuterRef('pk'), checkout_time__isnull=True))
+            queryset = queryset.filter(on_duty if _flag(params['on_duty']) else ~on_duty)
+        if params.get('shift', '').isdigit():
+            queryset = queryset.filter(shifts=params['shift'])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('search', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+        org_id = request.user.organization_id
+        ids = search_index(org_id).search(query, active=_flag(request.query_params.get('is_active')))
+        if 'on_duty' in request.query_params or 'shift' in request.query_params:
+            # The other filters are applied in SQL to slices of the matches, keeping their order.
+            queryset = self.get_queryset()
+            allowed = set()
+            for start in range(0, len(ids), FILTER_BATCH_SIZE):
+                batch = ids[start:start + FILTER_BATCH_SIZE]
+                allowed.update(queryset.filter(id__in=batch).values_list('id', flat=True))
+            ids = [guard_id for guard_id in ids if guard_id in allowed]
+        page = self.paginate_queryset(ids)
+        selected = ids if page is None else page
+        guards = Guard.objects.select_related('user').in_bulk(selected)
+        data = self.get_serializer([guards[guard_id] for guard_id in selected if guard_id in guards], many=True).data
+        return Response(data) if page is None else self.get_paginated_response(data)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -21,4 +72,3 @@ class GuardDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return Guard.objects.filter(organization=self.request.user.organization)
-
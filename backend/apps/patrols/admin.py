@@ -0,0 +1,21 @@
+from django.contrib import admin
+from .models import Checkpoint, PatrolRoute, RouteScore
+
+
+class CheckpointInline(admin.TabularInline):
+    model = Checkpoint
+    extra = 0
+
+
+class PatrolRouteAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "organization", "corridor_m")
+    inlines = [CheckpointInline]
+
+
+class RouteScoreAdmin(admin.ModelAdmin):
+    list_display = ("id", "guard", "route", "attendance", "coverage_percent", "checkpoints_hit", "scored_at")
+    list_filter = ("route",)
+
+
+admin.site.register(PatrolRoute, PatrolRouteAdmin)
+admin.site.register(RouteScore, RouteScoreAdmin)
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.attendance.models import Attendance
+from apps.patrols.scoring import score_attendances
+
+
+class Command(BaseCommand):
+    help = 'Score finished shifts of guards with a patrol route against that route.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Only shifts checked out within this many hours.')
+        parser.add_argument('--rescore', action='store_true', help='Score again shifts that already have a score.')
+        parser.add_argument('--org', type=int, help='Only this organization id.')
+
+    def handle(self, *args, **options):
+        attendances = Attendance.objects.filter(
+            checkout_time__gte=timezone.now() - timedelta(hours=options['hours']),
+            guard__patrol_route__isnull=False,
+        ).select_related('guard__patrol_route').order_by('guard__patrol_route_id', 'id')
+        if not options['rescore']:
+            attendances = attendances.filter(route_score__isnull=True)
+        if options['org'] is not None:
+            attendances = attendances.filter(organization_id=options['org'])
+        scores = score_attendances(attendances.iterator())
+        self.stdout.write(self.style.SUCCESS(f'Route scoring complete. Shifts scored: {len(scores)}'))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('attendance', '0006_attendance_organization_not_null'),
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatrolRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('path', models.JSONField(blank=True, default=list)),
+                ('corridor_m', models.PositiveIntegerField(default=30, help_text='Max distance in meters from the path that still counts as on route')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patrol_routes', to='authentication.organization')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveIntegerField()),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('latitude', models.DecimalField(decimal_places=7, max_digits=10)),
+                ('longitude', models.DecimalField(decimal_places=7, max_digits=10)),
+                ('radius_m', models.PositiveIntegerField(default=25, help_text='Radius in meters')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='patrols.patrolroute')),
+            ],
+            options={
+                'ordering': ['route', 'order'],
+                'unique_together': {('route', 'order')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RouteScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coverage_percent', models.FloatField()),
+                ('on_route_percent', models.FloatField()),
+                ('fix_count', models.PositiveIntegerField()),
+                ('checkpoints_hit', models.PositiveIntegerField()),
+                ('checkpoint_hits', models.JSONField(default=list)),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('attendance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='route_score', to='attendance.attendance')),
+                ('guard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_scores', to='guards.guard')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_scores', to='authentication.organization')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='patrols.patrolroute')),
+            ],
+            options={
+                'ordering': ['-scored_at'],
+                'indexes': [models.Index(fields=['organization', '-scored_at'], name='patrols_score_org_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import models
+from apps.authentication.models import Organization
+
+
+class PatrolRoute(models.Model):
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="patrol_routes"
+    )
+    name = models.CharField(max_length=255)
+    # Planned path as a list of [latitude, longitude] pairs.
+    path = models.JSONField(default=list, blank=True)
+    corridor_m = models.PositiveIntegerField(
+        default=30, help_text="Max distance in meters from the path that still counts as on route"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.organization.name}"
+
+
+class Checkpoint(models.Model):
+    route = models.ForeignKey(PatrolRoute, on_delete=models.CASCADE, related_name="checkpoints")
+    order = models.PositiveIntegerField()
+    name = models.CharField(max_length=255, blank=True, default="")
+    latitude = models.DecimalField(max_digits=10, decimal_places=7)
+    longitude = models.DecimalField(max_digits=10, decimal_places=7)
+    radius_m = models.PositiveIntegerField(default=25, help_text="Radius in meters")
+
+    def __str__(self):
+        return f"{self.route.name} #{self.order} {self.name}"
+
+    class Meta:
+        ordering = ["route", "order"]
+        unique_together = ["route", "order"]
+
+
+class RouteScore(models.Model):
+    attendance = models.OneToOneField(
+        "attendance.Attendance", on_delete=models.CASCADE, related_name="route_score"
+    )
+    route = models.ForeignKey(PatrolRoute, on_delete=models.CASCADE, related_name="scores")
+    guard = models.ForeignKey("guards.Guard", on_delete=models.CASCADE, related_name="route_scores")
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="route_scores"
+    )
+    # Share of the route length passed within the corridor.
+    coverage_percent = models.FloatField()
+    # Share of the shift's fixes that lay within the corridor.
+    on_route_percent = models.FloatField()
+    fix_count = models.PositiveIntegerField()
+    checkpoints_hit = models.PositiveIntegerField()
+    # [{"checkpoint": id, "order": n, "hit_time": iso timestamp or null}, ...]
+    checkpoint_hits = models.JSONField(default=list)
+    scored_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.guard.name} - {self.route.name} - {self.coverage_percent:.0f}%"
+
+    class Meta:
+        ordering = ["-scored_at"]
+        indexes = [
+            models.Index(fields=["organization", "-scored_at"], name="patrols_score_org_idx"),
+        ]
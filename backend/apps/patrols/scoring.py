@@ -0,0 +1,161 @@
+"""Route adherence: a shift's track scored against its planned patrol route.
+
+The route path is projected onto a local plane in meters and its segments
+are put into a grid with cells one corridor wide, so finding the segments
+near a fix only looks at the fix's cell. For each fix inside the corridor,
+the stretch of route within one corridor width of its projection counts as
+covered, measured in ``COVERAGE_STEP_M`` steps along the path. A checkpoint
+is hit by the first fix within its radius.
+
+``RouteIndex`` objects depend only on the route, so bulk scoring builds one
+per route and reuses it for every guard on that route.
+"""
+import math
+
+from apps.tracking.history import track_history
+from apps.tracking.models import Stay
+from .models import RouteScore
+
+METERS_PER_DEGREE = 111320
+COVERAGE_STEP_M = 10
+
+
+class RouteIndex:
+    def __init__(self, route):
+        self.route = route
+        self.corridor = max(route.corridor_m, 1)
+        points = [(float(lat), float(lng)) for lat, lng in route.path]
+        self.origin = points[0] if points else (0.0, 0.0)
+        self.scale = math.cos(math.radians(self.origin[0])) * METERS_PER_DEGREE
+        projected = [self.project(lat, lng) for lat, lng in points]
+        # (start_xy, end_xy, length, distance along the path at start)
+        self.segments = []
+        along = 0.0
+        for start, end in zip(projected, projected[1:]):
+            length = math.hypot(end[0] - start[0], end[1] - start[1])
+            if length:
+                self.segments.append((start, end, length, along))
+                along += length
+        self.length = along
+        self.steps = max(math.ceil(along / COVERAGE_STEP_M), 1) if along else 0
+        self.grid = {}
+        for number, (start, end, _, _) in enumerate(self.segments):
+            for cell in self._cells_between(start, end):
+                self.grid.setdefault(cell, []).append(number)
+        self.checkpoints = list(route.checkpoints.all())
+
+    def project(self, lat, lng):
+        return (
+            (lng - self.origin[1]) * self.scale,
+            (lat - self.origin[0]) * METERS_PER_DEGREE,
+        )
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.corridor), math.floor(y / self.corridor))
+
+    def _cells_between(self, start, end):
+        # Every cell touched by the segment's bounding box grown by one cell.
+        low = self._cell(min(start[0], end[0]), min(start[1], end[1]))
+        high = self._cell(max(start[0], end[0]), max(start[1], end[1]))
+        for i in range(low[0] - 1, high[0] + 2):
+            for j in range(low[1] - 1, high[1] + 2):
+                yield (i, j)
+
+    def nearest(self, lat, lng):
+        """``(distance_m, along_m)`` of the closest route point within the corridor, or None."""
+        x, y = self.project(lat, lng)
+        best = None
+        for number in self.grid.get(self._cell(x, y), ()):
+            (x1, y1), (x2, y2), length, along = self.segments[number]
+            t = ((x - x1) * (x2 - x1) + (y - y1) * (y2 - y1)) / (length * length)
+            t = min(max(t, 0.0), 1.0)
+            distance = math.hypot(x - (x1 + t * (x2 - x1)), y - (y1 + t * (y2 - y1)))
+            if distance <= self.corridor and (best is None or distance < best[0]):
+                best = (distance, along + t * length)
+        return best
+
+
+def shift_fixes(attendance):
+    """``(timestamp, lat, lng)`` for every fix of the shift in time order, stays included."""
+    fixes = [
+        (log.timestamp, float(log.latitude), float(log.longitude))
+        for log in track_history(attendance.guard, attendance.checkin_time, attendance.checkout_time)
+    ]
+    stays = Stay.objects.filter(
+        guard=attendance.guard,
+        start_time__lt=attendance.checkout_time,
+        end_time__gte=attendance.checkin_time,
+    )
+    for stay in stays:
+        fixes.append((max(stay.start_time, attendance.checkin_time), stay.latitude, stay.longitude))
+    fixes.sort()
+    return fixes
+
+
+def score_track(index, fixes):
+    """Score ``(timestamp, lat, lng)`` fixes in time order against a route index."""
+    covered = [False] * index.steps
+    on_route = 0
+    hits = {}
+    checkpoints = [
+        (checkpoint, *index.project(float(checkpoint.latitude), float(checkpoint.longitude)))
+        for checkpoint in index.checkpoints
+    ]
+    for timestamp, lat, lng in fixes:
+        match = index.nearest(lat, lng)
+        if match is not None:
+            on_route += 1
+            along = match[1]
+            first = max(math.floor((along - index.corridor) / COVERAGE_STEP_M), 0)
+            last = min(math.floor((along + index.corridor) / COVERAGE_STEP_M) + 1, index.steps)
+            for step in range(first, last):
+                covered[step] = True
+        x, y = index.project(lat, lng)
+        for checkpoint, cx, cy in checkpoints:
+            if checkpoint.id in hits:
+                continue
+            if math.hypot(x - cx, y - cy) <= checkpoint.radius_m:
+                hits[checkpoint.id] = timestamp
+    return {
+        "coverage_percent": round(100 * sum(covered) / index.steps, 1) if index.steps else 0.0,
+        "on_route_percent": round(100 * on_route / len(fixes), 1) if fixes else 0.0,
+        "fix_count": len(fixes),
+        "checkpoints_hit": len(hits),
+        "checkpoint_hits": [
+            {
+                "checkpoint": checkpoint.id,
+                "order": checkpoint.order,
+                "hit_time": hits[checkpoint.id].isoformat() if checkpoint.id in hits else None,
+            }
+            for checkpoint, _, _ in checkpoints
+        ],
+    }
+
+
+def score_attendance(attendance, index=None):
+    """Score a finished shift against the guard's route and store the RouteScore."""
+    if index is None:
+        index = RouteIndex(attendance.guard.patrol_route)
+    result = score_track(index, shift_fixes(attendance))
+    score, _ = RouteScore.objects.update_or_create(
+        attendance=attendance,
+        defaults={
+            "route": index.route,
+            "guard": attendance.guard,
+            "organization_id": attendance.organization_id,
+            **result,
+        },
+    )
+    return score
+
+
+def score_attendances(attendances):
+    """Score many finished shifts, building each route's index only once."""
+    indexes = {}
+    scores = []
+    for attendance in attendances:
+        route = attendance.guard.patrol_route
+        if route.id not in indexes:
+            indexes[route.id] = RouteIndex(route)
+        scores.append(score_attendance(attendance, indexes[route.id]))
+    return scores
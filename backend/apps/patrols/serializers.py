@@ -0,0 +1,80 @@
+from rest_framework import serializers
+from .models import Checkpoint, PatrolRoute, RouteScore
+
+
+class CheckpointSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Checkpoint
+        fields = ["id", "order", "name", "latitude", "longitude", "radius_m"]
+        read_only_fields = ["id"]
+
+
+class PatrolRouteSerializer(serializers.ModelSerializer):
+    checkpoints = CheckpointSerializer(many=True, required=False)
+
+    class Meta:
+        model = PatrolRoute
+        fields = ["id", "name", "path", "corridor_m", "checkpoints", "created_at", "updated_at"]
+        read_only_fields = ["id", "created_at", "updated_at"]
+
+    def validate_path(self, value):
+        if not isinstance(value, list) or len(value) == 1:
+            raise serializers.ValidationError("Path must be a list of at least two [latitude, longitude] points.")
+        for point in value:
+            if (
+                not isinstance(point, (list, tuple))
+                or len(point) != 2
+                or not all(isinstance(part, (int, float)) for part in point)
+                or not -90 <= point[0] <= 90
+                or not -180 <= point[1] <= 180
+            ):
+                raise serializers.ValidationError("Each point must be a [latitude, longitude] pair.")
+        return value
+
+    def validate_checkpoints(self, value):
+        orders = [checkpoint["order"] for checkpoint in value]
+        if len(orders) != len(set(orders)):
+            raise serializers.ValidationError("Checkpoint order values must be unique.")
+        return value
+
+    def create(self, validated_data):
+        checkpoints = validated_data.pop("checkpoints", [])
+        validated_data["organization"] = self.context["request"].user.organization
+        route = super().create(validated_data)
+        Checkpoint.objects.bulk_create(Checkpoint(route=route, **data) for data in checkpoints)
+        return route
+
+    def update(self, instance, validated_data):
+        checkpoints = validated_data.pop("checkpoints", None)
+        route = super().update(instance, validated_data)
+        if checkpoints is not None:
+            # Checkpoints are replaced as a whole list.
+            route.checkpoints.all().delete()
+            Checkpoint.objects.bulk_create(Checkpoint(route=route, **data) for data in checkpoints)
+        return route
+
+
+class RouteScoreSerializer(serializers.ModelSerializer):
+    guard_name = serializers.CharField(source="guard.name", read_only=True)
+    route_name = serializers.CharField(source="route.name", read_only=True)
+    checkin_time = serializers.DateTimeField(source="attendance.checkin_time", read_only=True)
+    checkout_time = serializers.DateTimeField(source="attendance.checkout_time", read_only=True)
+
+    class Meta:
+        model = RouteScore
+        fields = [
+            "id",
+            "attendance",
+            "guard",
+            "guard_name",
+            "route",
+            "route_name",
+            "checkin_time",
+            "checkout_time",
+            "coverage_percent",
+            "on_route_percent",
+            "fix_count",
+            "checkpoints_hit",
+            "checkpoint_hits",
+            "scored_at",
+        ]
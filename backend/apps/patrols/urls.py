@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('routes/', views.PatrolRouteListCreateView.as_view(), name='patrol-route-list-create'),
+    path('routes/<int:pk>/', views.PatrolRouteDetailView.as_view(), name='patrol-route-detail'),
+    path('scores/', views.RouteScoreListView.as_view(), name='route-score-list'),
+    path('scores/<int:attendance_id>/', views.score_shift, name='score-shift'),
+]
@@ -0,0 +1,60 @@
+from rest_framework import generics, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from apps.attendance.models import Attendance
+from .models import PatrolRoute, RouteScore
+from .scoring import score_attendance
+from .serializers import PatrolRouteSerializer, RouteScoreSerializer
+
+
+class PatrolRouteListCreateView(generics.ListCreateAPIView):
+    serializer_class = PatrolRouteSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return PatrolRoute.objects.filter(organization=self.request.user.organization).prefetch_related('checkpoints')
+
+
+class PatrolRouteDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = PatrolRouteSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return PatrolRoute.objects.filter(organization=self.request.user.organization).prefetch_related('checkpoints')
+
+
+class RouteScoreListView(generics.ListAPIView):
+    serializer_class = RouteScoreSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = RouteScore.objects.filter(organization=user.organization).select_related(
+            'guard', 'route', 'attendance'
+        )
+        if user.role == 'guard':
+            return queryset.filter(guard__user=user)
+        guard_id = self.request.GET.get('guard_id')
+        if guard_id:
+            queryset = queryset.filter(guard_id=guard_id)
+        return queryset
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def score_shift(request, attendance_id):
+    """(Re)score a finished shift against the guard's patrol route"""
+    user = request.user
+    if user.role == 'guard':
+        return Response({'error': 'Only admins and managers can score shifts.'}, status=403)
+    try:
+        attendance = Attendance.objects.select_related('guard__patrol_route').get(
+            id=attendance_id, organization=user.organization
+        )
+    except Attendance.DoesNotExist:
+        return Response({'error': 'Attendance not found'}, status=404)
+    if attendance.checkout_time is None:
+        return Response({'error': 'Shift is still in progress'}, status=400)
+    if attendance.guard.patrol_route is None:
+        return Response({'error': 'Guard has no patrol route'}, status=400)
+    return Response(RouteScoreSerializer(score_attendance(attendance)).data)
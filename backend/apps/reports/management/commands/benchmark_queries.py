@@ -0,0 +1,76 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+from apps.attendance.models import Attendance
+from apps.authentication.models import Organization
+from apps.reports.models import Alert
+from apps.tracking.models import LocationLog
+
+
+class Command(BaseCommand):
+    help = 'Compare query plans and timings of hot dashboard queries: guard join vs. direct organization filter.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Organization id (defaults to the one with most location logs).')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query.')
+        parser.add_argument('--no-plan', action='store_true', help='Skip printing EXPLAIN output.')
+
+    def handle(self, *args, **options):
+        org = self.get_org(options['org'])
+        window = timezone.now() - timedelta(minutes=30)
+        cases = [
+            (
+                'live locations window',
+                LocationLog.objects.filter(guard__organization=org, timestamp__gte=window),
+                LocationLog.objects.filter(organization=org, timestamp__gte=window),
+            ),
+            (
+                'open attendances',
+                Attendance.objects.filter(guard__organization=org, checkout_time__isnull=True),
+                Attendance.objects.filter(organization=org, checkout_time__isnull=True),
+            ),
+            (
+                'critical unresolved alerts',
+                Alert.objects.filter(guard__organization=org, is_resolved=False, severity='critical'),
+                Alert.objects.filter(organization=org, is_resolved=False, severity='critical'),
+            ),
+        ]
+        for label, legacy, direct in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name, queryset in (('guard join', legacy), ('direct', direct)):
+                timings = self.time_query(queryset, options['repeat'])
+                self.stdout.write(
+                    f'  {name:<10} p50 {statistics.median(timings):8.3f} ms'
+                    f'  max {max(timings):8.3f} ms'
+                )
+                if not options['no_plan']:
+                    for line in queryset.explain().splitlines():
+                        self.stdout.write(f'      {line}')
+
+    def get_org(self, org_id):
+        if org_id is not None:
+            try:
+                return Organization.objects.get(id=org_id)
+            except Organization.DoesNotExist:
+                raise CommandError(f'Organization {org_id} not found')
+        org = (
+            Organization.objects.annotate(logs=Count('location_logs'))
+            .filter(logs__gt=0)
+            .order_by('-logs')
+            .first()
+        )
+        if org is None:
+            raise CommandError('No organization with location data; pass --org')
+        return org
+
+    def time_query(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+        ('reports', '0003_backfill_alert_organization'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alert',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='authentication.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['organization', 'is_resolved', 'severity'], name='reports_alert_org_state_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_alert_organization_not_null'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alert',
+            name='alert_type',
+            field=models.CharField(choices=[('offline', 'Offline'), ('geofence', 'Geofence Violation'), ('battery_low', 'Low Battery'), ('panic', 'Panic Button'), ('no_show', 'No Show')], max_length=20),
+        ),
+    ]
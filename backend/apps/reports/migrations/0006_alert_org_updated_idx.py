@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('guards', '0007_guard_org_updated_idx'),
+        ('reports', '0005_alert_no_show_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['organization', 'updated_at'], name='reports_alert_org_updated_idx'),
+        ),
+    ]
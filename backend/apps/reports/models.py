@@ -9,6 +9,7 @@ class Alert(models.Model):
         ("geofence", "Geofence Violation"),
         ("battery_low", "Low Battery"),
         ("panic", "Panic Button"),
+        ("no_show", "No Show"),
     ]
 
     SEVERITY_LEVELS = [
@@ -20,7 +21,7 @@ class Alert(models.Model):
 
     guard = models.ForeignKey(Guard, on_delete=models.CASCADE, related_name="alerts")
     organization = models.ForeignKey(
-        Organization, on_delete=models.CASCADE, related_name="alerts", null=True, blank=True
+        Organization, on_delete=models.CASCADE, related_name="alerts"
     )
     alert_type = models.CharField(max_length=20, choices=ALERT_TYPES)
     severity = models.CharField(
@@ -38,3 +39,9 @@ class Alert(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Unresolved/critical counters on the dashboard.
+            models.Index(fields=["organization", "is_resolved", "severity"], name="reports_alert_org_state_idx"),
+            # Incremental sync (apps/sync).
+            models.Index(fields=["organization", "updated_at"], name="reports_alert_org_updated_idx"),
+        ]
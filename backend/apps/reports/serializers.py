@@ -30,5 +30,6 @@ class AlertCreateSerializer(serializers.ModelSerializer):
         guard_id = validated_data.pop('guard_id')
         guard = Guard.objects.get(id=guard_id)
         validated_data['guard'] = guard
+        validated_data['organization'] = guard.organization
         return super().create(validated_data)
 
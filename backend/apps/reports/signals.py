@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.authentication.versioning import bump_version, deleted_in_cascade, organization_id_for
+from .models import Alert
+
+
+# Rows deleted through a guard are covered by the guard's own bump of
+# "alerts" (see guards/signals.py), once rather than per row.
+@receiver([post_save, post_delete], sender=Alert)
+def bump_alerts_version(sender, instance, signal, origin=None, **kwargs):
+    if signal is post_delete and deleted_in_cascade(sender, origin):
+        return
+    bump_version(organization_id_for(instance), "alerts")
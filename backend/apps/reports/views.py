@@ -2,13 +2,14 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 from datetime import timedelta, datetime
 from .models import Alert
 from .serializers import AlertSerializer, AlertCreateSerializer
-from apps.attendance.models import Attendance
+from apps.attendance.models import Attendance, AttendanceDay
 from apps.tracking.models import LocationLog
 from apps.guards.models import Guard
+from apps.authentication.versioning import conditional_response, etag_for, local_date
 
 # Helper to get the guard object for the logged-in user
 def get_guard_for_user(user):
@@ -25,19 +26,25 @@ class AlertListCreateView(generics.ListCreateAPIView):
         if user.role == 'guard':
             guard = get_guard_for_user(user)
             return Alert.objects.filter(guard=guard)
-        return Alert.objects.filter(guard__organization=user.organization)
+        return Alert.objects.filter(organization=user.organization)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return AlertCreateSerializer
         return AlertSerializer
 
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return conditional_response(
+            request, ("alerts", "guards"), lambda: parent(request, *args, **kwargs)
+        )
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def resolve_alert(request, alert_id):
     user = request.user
     try:
-        alert = Alert.objects.get(id=alert_id, guard__organization=user.organization)
+        alert = Alert.objects.get(id=alert_id, organization=user.organization)
         if user.role == 'guard':
             guard = get_guard_for_user(user)
             if alert.guard != guard:
@@ -52,6 +59,7 @@ def resolve_alert(request, alert_id):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@etag_for("attendance", "alerts", "guards", bucket=local_date)
 def dashboard_analytics(request):
     """Get dashboard analytics data"""
     org = request.user.organization
@@ -84,7 +92,26 @@ def dashboard_analytics(request):
             'alert_distribution': list(alert_distribution)
         })
     # Default org-wide analytics for admin/manager
-    # ... existing code ...
+    total_guards = Guard.objects.filter(organization=org, is_active=True).count()
+    active_guards = Attendance.objects.filter(organization=org, checkout_time__isnull=True).count()
+    today_attendance = Attendance.objects.filter(organization=org, checkin_time__date=today).count()
+    unresolved_alerts = Alert.objects.filter(organization=org, is_resolved=False).count()
+    critical_alerts = Alert.objects.filter(organization=org, is_resolved=False, severity='critical').count()
+    weekly_attendance = []
+    for i in range(7):
+        date = today - timedelta(days=i)
+        count = Attendance.objects.filter(organization=org, checkin_time__date=date).count()
+        weekly_attendance.append({'date': date.strftime('%Y-%m-%d'), 'count': count})
+    alert_distribution = Alert.objects.filter(organization=org, created_at__gte=month_ago).values('alert_type').annotate(count=Count('id'))
+    return Response({
+        'total_guards': total_guards,
+        'active_guards': active_guards,
+        'today_attendance': today_attendance,
+        'unresolved_alerts': unresolved_alerts,
+        'critical_alerts': critical_alerts,
+        'weekly_attendance': weekly_attendance,
+        'alert_distribution': list(alert_distribution)
+    })
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -96,29 +123,46 @@ def monthly_report(request):
     
     # Monthly attendance summary
     monthly_attendance = Attendance.objects.filter(
-        guard__organization=org,
+        organization=org,
         checkin_time__gte=month_start
     )
     
-    # Guard performance
+    # Guard performance, from the classified attendance days
+    day_stats = {
+        row['guard_id']: row
+        for row in AttendanceDay.objects.filter(organization=org, date__gte=month_start.date())
+        .values('guard_id')
+        .annotate(
+            days=Count('id', filter=~Q(status='absent')),
+            late_days=Count('id', filter=Q(status='late')),
+            absent_days=Count('id', filter=Q(status='absent')),
+            half_days=Count('id', filter=Q(status='half')),
+            worked_minutes=Sum('worked_minutes'),
+            late_minutes=Sum('late_minutes'),
+            overtime_minutes=Sum('overtime_minutes'),
+        )
+    }
     guard_stats = []
     for guard in org.guards.filter(is_active=True):
-        attendance_count = monthly_attendance.filter(guard=guard).count()
-        total_hours = sum([
-            (att.duration.total_seconds() / 3600) if att.duration else 0
-            for att in monthly_attendance.filter(guard=guard)
-        ])
-        
+        stats = day_stats.get(guard.id, {})
+        attendance_count = stats.get('days', 0)
+        total_hours = (stats.get('worked_minutes') or 0) / 60
+
         guard_stats.append({
             'guard_name': guard.name,
             'attendance_days': attendance_count,
+            'late_days': stats.get('late_days', 0),
+            'half_days': stats.get('half_days', 0),
+            'absent_days': stats.get('absent_days', 0),
+            'late_minutes': stats.get('late_minutes') or 0,
+            'overtime_hours': round((stats.get('overtime_minutes') or 0) / 60, 2),
             'total_hours': round(total_hours, 2),
             'avg_hours_per_day': round(total_hours / max(attendance_count, 1), 2)
         })
     
     # Alert summary
     monthly_alerts = Alert.objects.filter(
-        guard__organization=org,
+        organization=org,
         created_at__gte=month_start
     )
     
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Tombstone
+
+
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ("id", "organization_id", "model", "object_id", "deleted_at")
+    list_filter = ("model",)
+
+
+admin.site.register(Tombstone, TombstoneAdmin)
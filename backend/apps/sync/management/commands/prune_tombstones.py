@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.sync.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_TTL_DAYS; clients with older cursors get a full snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Keep this many days instead of SYNC_TOMBSTONE_TTL_DAYS.')
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Tombstones pruned: {deleted}'))
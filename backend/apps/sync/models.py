@@ -0,0 +1,31 @@
+from django.db import models
+from apps.authentication.models import Organization
+
+
+class Tombstone(models.Model):
+    """A deleted record, kept so incremental sync can tell clients to drop it."""
+
+    MODEL_CHOICES = [
+        ("guards", "Guard"),
+        ("attendance", "Attendance"),
+        ("alerts", "Alert"),
+        ("shifts", "Shift"),
+    ]
+
+    # No database constraint: deleting an organization writes tombstones for
+    # its records in the same transaction that removes the organization.
+    organization = models.ForeignKey(
+        Organization, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
+
+    class Meta:
+        ordering = ["deleted_at"]
+        indexes = [
+            models.Index(fields=["organization", "deleted_at"], name="sync_tombstone_org_time_idx"),
+        ]
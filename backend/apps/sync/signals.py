@@ -0,0 +1,74 @@
+"""Tombstones for deleted synced records.
+
+Deleting a guard or an organization writes the tombstones of everything
+that cascades from it with one ``bulk_create`` from its ``pre_delete``
+(inside the delete's transaction), and the per-row receivers skip rows
+deleted through such a parent, so a cascade costs a few queries rather
+than one INSERT per row.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.attendance.models import Attendance, Shift
+from apps.authentication.models import Organization
+from apps.authentication.versioning import bump_version, deleted_in_cascade, organization_id_for
+from apps.guards.models import Guard
+from apps.reports.models import Alert
+from .models import Tombstone
+from .sync import SYNCED_MODELS
+
+# Synced models that cascade from a guard.
+GUARD_CHILDREN = (Attendance, Alert)
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _tombstones(org_id, model, ids):
+    return [Tombstone(organization_id=org_id, model=SYNCED_MODELS[model], object_id=pk) for pk in ids]
+
+
+@receiver(pre_delete, sender=Organization)
+def record_organization_tombstones(sender, instance, **kwargs):
+    rows = []
+    for model in SYNCED_MODELS:
+        ids = model.objects.filter(organization_id=instance.pk).values_list("id", flat=True)
+        rows += _tombstones(instance.pk, model, ids)
+    Tombstone.objects.bulk_create(rows, batch_size=1000)
+
+
+@receiver(pre_delete, sender=Guard)
+def record_guard_tombstones(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is Organization:
+        return
+    rows = _tombstones(instance.organization_id, Guard, [instance.pk])
+    for model in GUARD_CHILDREN:
+        ids = model.objects.filter(guard_id=instance.pk).values_list("id", flat=True)
+        rows += _tombstones(instance.organization_id, model, ids)
+    Tombstone.objects.bulk_create(rows, batch_size=1000)
+
+
+@receiver(pre_delete, sender=Shift)
+def touch_shift_attendances(sender, instance, origin=None, **kwargs):
+    if deleted_in_cascade(sender, origin):
+        return
+    # The delete nulls Attendance.shift with a queryset update, which leaves
+    # updated_at alone; stamp the rows first so incremental sync resends them.
+    if Attendance.objects.filter(shift_id=instance.pk).update(updated_at=timezone.now()):
+        bump_version(instance.organization_id, "attendance")
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Rows deleted through a parent were recorded by the parent's pre_delete.
+    if deleted_in_cascade(sender, origin):
+        return
+    org_id = organization_id_for(instance)
+    if org_id is not None:
+        Tombstone.objects.create(organization_id=org_id, model=SYNCED_MODELS[sender], object_id=instance.pk)
+
+
+for model in (Shift,) + GUARD_CHILDREN:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"sync-tombstone-{model.__name__}")
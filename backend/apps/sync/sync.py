@@ -0,0 +1,135 @@
+"""Incremental sync: records created, updated or deleted since a cursor.
+
+A cursor is a server timestamp (see ``apps.tracking.live.encode_cursor``).
+Changed rows are found through ``(organization, updated_at)`` indexes and
+deleted ones through ``Tombstone`` rows written on delete, so a sync costs in
+proportion to what changed. Each response's cursor lags the clock by
+``SYNC_CURSOR_OVERLAP_S`` so rows saved by transactions still in flight are
+sent again next time rather than missed; clients apply changes by id, so a
+repeat is harmless.
+
+Without a cursor, or with one older than ``SYNC_TOMBSTONE_TTL_DAYS`` (when
+tombstones may have been pruned), the response is a full snapshot flagged
+``full`` and the client should replace what it holds. Snapshots are paged
+by id, at most ``SYNC_PAGE_SIZE`` rows per response: ``next`` is a page
+token for the rest, and every page carries the cursor of the moment the
+snapshot started, so whatever changed while the client was paging comes in
+the first incremental sync after the last page.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.attendance.models import Attendance, Shift
+from apps.attendance.serializers import AttendanceSerializer, ShiftSerializer
+from apps.guards.models import Guard
+from apps.guards.serializers import GuardSerializer
+from apps.reports.models import Alert
+from apps.reports.serializers import AlertSerializer
+from apps.tracking.live import decode_cursor, encode_cursor
+from .models import Tombstone
+
+SYNCED_MODELS = {Guard: "guards", Attendance: "attendance", Alert: "alerts", Shift: "shifts"}
+SERIALIZERS = {
+    "guards": GuardSerializer,
+    "attendance": AttendanceSerializer,
+    "alerts": AlertSerializer,
+    "shifts": ShiftSerializer,
+}
+
+
+def synced_querysets(user):
+    """What ``user`` may see of each synced model: own records for guards, the organization otherwise."""
+    org = user.organization
+    if user.role == "guard":
+        return {
+            "guards": Guard.objects.filter(organization=org, user=user),
+            "attendance": Attendance.objects.filter(organization=org, guard__user=user).select_related("guard"),
+            "alerts": Alert.objects.filter(organization=org, guard__user=user).select_related("guard"),
+            "shifts": Shift.objects.filter(organization=org),
+        }
+    return {
+        "guards": Guard.objects.filter(organization=org),
+        "attendance": Attendance.objects.filter(organization=org).select_related("guard"),
+        "alerts": Alert.objects.filter(organization=org).select_related("guard"),
+        "shifts": Shift.objects.filter(organization=org),
+    }
+
+
+def encode_page(taken_at, scope, after_id):
+    """Token for the snapshot taken at ``taken_at``, resuming at ``scope`` after ``after_id``."""
+    return f"{encode_cursor(taken_at)}.{scope}.{after_id}"
+
+
+def decode_page(value):
+    """``(taken_at, scope, after_id)`` of a page token; raises ValueError when malformed."""
+    taken_at, scope, after_id = value.split(".")
+    if scope not in SERIALIZERS:
+        raise ValueError("unknown model in page token")
+    return decode_cursor(taken_at), scope, int(after_id)
+
+
+def _snapshot_page(result, querysets, scopes, taken_at, start_scope, after_id, limit):
+    """Fill ``result`` with up to ``limit`` rows by id from ``start_scope`` after ``after_id``."""
+    result["next"] = None
+    for scope in scopes:
+        result[scope] = {"created": [], "updated": [], "deleted": []}
+    for scope in scopes[scopes.index(start_scope):]:
+        rows = list(querysets[scope].filter(id__gt=after_id).order_by("id")[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_id = rows[-1].id if rows else after_id
+            result["next"] = encode_page(taken_at, scope, last_id)
+        result[scope]["created"] = SERIALIZERS[scope](rows, many=True).data
+        if result["next"]:
+            break
+        limit -= len(rows)
+        after_id = 0
+    return result
+
+
+def changes_since(user, cursor=None, scopes=None, page=None, limit=None):
+    """``{"cursor", "full", <scope>: {"created", "updated", "deleted"}}`` for ``user`` since ``cursor``.
+
+    Full snapshots also carry ``next``; pass it back as ``page`` (a
+    ``decode_page`` tuple whose scope is one of ``scopes``) with the same
+    ``scopes`` for the following page.
+    """
+    now = timezone.now()
+    scopes = scopes or list(SERIALIZERS)
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_PAGE_SIZE)
+    querysets = synced_querysets(user)
+    if page is None and (cursor is None or cursor < now - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS)):
+        page = (now, scopes[0], 0)
+    if page is not None:
+        taken_at, start_scope, after_id = page
+        result = {
+            "cursor": encode_cursor(taken_at - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP_S)),
+            "full": True,
+        }
+        return _snapshot_page(result, querysets, scopes, taken_at, start_scope, after_id, limit)
+    result = {
+        "cursor": encode_cursor(now - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP_S)),
+        "full": False,
+    }
+    for scope in scopes:
+        serializer = SERIALIZERS[scope]
+        rows = list(querysets[scope].order_by("updated_at", "id").filter(updated_at__gt=cursor))
+        result[scope] = {
+            "created": serializer([row for row in rows if row.created_at > cursor], many=True).data,
+            "updated": serializer([row for row in rows if row.created_at <= cursor], many=True).data,
+            "deleted": list(
+                Tombstone.objects.filter(
+                    organization=user.organization, model=scope, deleted_at__gt=cursor
+                ).values_list("object_id", flat=True)
+            ),
+        }
+    return result
+
+
+def prune_tombstones(days=None):
+    """Delete tombstones older than the sync window; returns how many were removed."""
+    days = settings.SYNC_TOMBSTONE_TTL_DAYS if days is None else days
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -0,0 +1,75 @@
+from datetime import time, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.attendance.models import Attendance, Shift
+from apps.authentication.models import Organization, User
+from apps.guards.models import Guard
+from apps.reports.models import Alert
+from .models import Tombstone
+from .sync import changes_since, decode_page
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guards = [Guard.objects.create(name=f"G{n}", phone=str(n), organization=self.org) for n in range(3)]
+        self.shift = Shift.objects.create(name="Day", start_time=time(9), end_time=time(17), organization=self.org)
+        self.attendances = [
+            Attendance.objects.create(
+                guard=guard, organization=self.org, shift=self.shift,
+                checkin_time=timezone.now() - timedelta(hours=3), checkout_time=timezone.now(),
+            )
+            for guard in self.guards
+        ]
+        self.alert = Alert.objects.create(
+            guard=self.guards[0], organization=self.org, alert_type="sos", severity="high", message="help"
+        )
+        # Everything above was synced long ago.
+        long_ago = timezone.now() - timedelta(days=1)
+        for model in (Guard, Shift, Attendance, Alert):
+            model.objects.update(created_at=long_ago, updated_at=long_ago)
+        self.cursor = timezone.now() - timedelta(hours=1)
+
+    def test_guard_delete_records_tombstones_for_its_rows(self):
+        ids = self.guards[0].id, self.attendances[0].id, self.alert.id
+        self.guards[0].delete()
+        changes = changes_since(self.admin, self.cursor)
+        self.assertFalse(changes["full"])
+        deleted = tuple(changes[scope]["deleted"] for scope in ("guards", "attendance", "alerts"))
+        self.assertEqual(deleted, tuple([pk] for pk in ids))
+        self.assertEqual(Tombstone.objects.count(), 3)
+
+    def test_single_row_delete_records_a_tombstone(self):
+        attendance_id = self.attendances[1].id
+        self.attendances[1].delete()
+        changes = changes_since(self.admin, self.cursor, ["attendance"])
+        self.assertEqual(changes["attendance"]["deleted"], [attendance_id])
+
+    def test_shift_delete_resends_its_attendances(self):
+        shift_id = self.shift.id
+        self.shift.delete()
+        changes = changes_since(self.admin, self.cursor, ["shifts", "attendance"])
+        self.assertEqual(changes["shifts"]["deleted"], [shift_id])
+        self.assertEqual(
+            sorted(row["id"] for row in changes["attendance"]["updated"]),
+            [attendance.id for attendance in self.attendances],
+        )
+
+    def test_snapshot_pages_cover_every_row_once(self):
+        scopes = ["guards", "attendance", "alerts", "shifts"]
+        seen = {scope: [] for scope in scopes}
+        page = None
+        for _ in range(10):
+            changes = changes_since(self.admin, None, scopes, page, limit=2)
+            self.assertTrue(changes["full"])
+            for scope in scopes:
+                seen[scope] += [row["id"] for row in changes[scope]["created"]]
+            if not changes["next"]:
+                break
+            page = decode_page(changes["next"])
+        self.assertEqual(seen["guards"], [guard.id for guard in self.guards])
+        self.assertEqual(seen["attendance"], [attendance.id for attendance in self.attendances])
+        self.assertEqual((seen["alerts"], seen["shifts"]), ([self.alert.id], [self.shift.id]))
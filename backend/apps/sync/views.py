@@ -0,0 +1,38 @@
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from apps.tracking.live import decode_cursor
+from .sync import SERIALIZERS, changes_since, decode_page
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def sync_changes(request):
+    """Guards, attendance, alerts and shifts created, updated or deleted since ``?since=<cursor>``.
+
+    ``?models=guards,shifts`` limits the response to some models. Without a
+    cursor, or with an expired one, the response is a full snapshot with
+    ``full: true``, paged by ``?limit=`` (at most ``SYNC_PAGE_SIZE``): while
+    ``next`` is set, request ``?page=<next>`` with the same ``models``. Pass
+    the returned ``cursor`` on the next call.
+    """
+    try:
+        cursor = decode_cursor(request.GET['since']) if request.GET.get('since') else None
+    except ValueError:
+        return Response({'error': 'Invalid cursor'}, status=400)
+    scopes = [scope for scope in request.GET.get('models', '').split(',') if scope]
+    unknown = set(scopes) - set(SERIALIZERS)
+    if unknown:
+        return Response({'error': f"Unknown models: {', '.join(sorted(unknown))}"}, status=400)
+    page = None
+    if request.GET.get('page'):
+        try:
+            page = decode_page(request.GET['page'])
+        except ValueError:
+            return Response({'error': 'Invalid page'}, status=400)
+        if page[1] not in (scopes or SERIALIZERS):
+            return Response({'error': 'Page does not match models'}, status=400)
+    limit = request.GET.get('limit', '')
+    if limit and (not limit.isdigit() or int(limit) < 1):
+        return Response({'error': 'limit must be a positive integer'}, status=400)
+    return Response(changes_since(request.user, cursor, scopes, page, int(limit) if limit else None))
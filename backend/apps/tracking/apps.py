@@ -5,3 +5,5 @@ class TrackingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tracking'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,47 @@
+"""Ping interval recommendations sent back to devices.
+
+``next_interval`` suggests how many seconds a device should wait before its
+next fix, aiming for one fix every ``LOCATION_INTERVAL_TARGET_M`` meters of
+movement. A guard in a stay, or with no known speed, falls back to the
+slowest rate. Near a geofence boundary the interval shrinks so a crossing is
+seen within half the time it could take; a low battery doubles it. The result
+is clamped between the organization plan's floor
+(``LOCATION_PLAN_MIN_INTERVAL_S``) and ``LOCATION_INTERVAL_MAX_S``.
+"""
+from django.conf import settings
+
+from .geo import haversine_m
+from .pipeline import recent_speed
+
+# Speed assumed when judging how soon a guard could reach a geofence boundary.
+WALKING_SPEED_MPS = 1.5
+LOW_BATTERY_PERCENT = 20
+
+
+def _plan_floor(organization):
+    floors = settings.LOCATION_PLAN_MIN_INTERVAL_S
+    return floors.get(organization.plan, settings.LOCATION_INTERVAL_MIN_S)
+
+
+def _boundary_distance(guard, latitude, longitude):
+    if guard.geofence_latitude is None or guard.geofence_longitude is None or not guard.geofence_radius_m:
+        return None
+    center = haversine_m(guard.geofence_latitude, guard.geofence_longitude, latitude, longitude)
+    return abs(guard.geofence_radius_m - center)
+
+
+def next_interval(guard, log):
+    """Seconds the guard's device should wait before sending the fix after ``log``."""
+    longest = settings.LOCATION_INTERVAL_MAX_S
+    speed = recent_speed(guard.id)
+    if speed:
+        interval = settings.LOCATION_INTERVAL_TARGET_M / speed
+    else:
+        interval = longest
+    boundary = _boundary_distance(guard, log.latitude, log.longitude)
+    if boundary is not None:
+        interval = min(interval, boundary / max(speed or 0, WALKING_SPEED_MPS) / 2)
+    if log.battery_level is not None and log.battery_level <= LOW_BATTERY_PERCENT:
+        interval *= 2
+    floor = max(_plan_floor(guard.organization), settings.LOCATION_INTERVAL_MIN_S)
+    return int(min(max(interval, floor), longest))
@@ -0,0 +1,70 @@
+"""Grid clustering of live positions for map viewports.
+
+Positions inside a bounding box are bucketed into cells a quarter of a web
+map tile wide at the requested zoom (``360 / 2**zoom / 4`` degrees), so the
+number of clusters is bounded by the viewport size in pixels rather than by
+the number of guards. From ``CLUSTER_MAX_ZOOM`` on, and for cells holding a
+single guard, positions are returned individually.
+"""
+import math
+
+CLUSTER_MAX_ZOOM = 16
+CELLS_PER_TILE = 4
+# Guard ids listed per cluster so the client can preview its members.
+CLUSTER_SAMPLE_SIZE = 10
+
+
+def parse_bbox(value):
+    """``min_lng,min_lat,max_lng,max_lat`` into floats; raises ValueError when malformed.
+
+    ``min_lng`` may exceed ``max_lng`` for a box crossing the antimeridian.
+    """
+    min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(","))
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise ValueError("bbox out of range")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def in_bbox(bbox, latitude, longitude):
+    min_lng, min_lat, max_lng, max_lat = bbox
+    if not min_lat <= latitude <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= longitude <= max_lng
+    return longitude >= min_lng or longitude <= max_lng
+
+
+def cluster_positions(logs, bbox, zoom):
+    """Split ``logs`` inside ``bbox`` into ``(clusters, points)`` for a map at ``zoom``.
+
+    Each cluster is a dict with ``count``, centroid ``latitude``/``longitude``
+    and ``guard_ids`` (at most ``CLUSTER_SAMPLE_SIZE``); ``points`` are the
+    logs shown as individual markers.
+    """
+    visible = [
+        log for log in logs
+        if in_bbox(bbox, float(log.latitude), float(log.longitude))
+    ]
+    if zoom >= CLUSTER_MAX_ZOOM:
+        return [], visible
+    cell_deg = 360 / 2 ** zoom / CELLS_PER_TILE
+    cells = {}
+    for log in visible:
+        cell = (
+            math.floor(float(log.latitude) / cell_deg),
+            math.floor(float(log.longitude) / cell_deg),
+        )
+        cells.setdefault(cell, []).append(log)
+    clusters = []
+    points = []
+    for members in cells.values():
+        if len(members) == 1:
+            points.extend(members)
+            continue
+        clusters.append({
+            "count": len(members),
+            "latitude": round(sum(float(log.latitude) for log in members) / len(members), 7),
+            "longitude": round(sum(float(log.longitude) for log in members) / len(members), 7),
+            "guard_ids": sorted(log.guard_id for log in members)[:CLUSTER_SAMPLE_SIZE],
+        })
+    return clusters, points
@@ -0,0 +1,157 @@
+"""Delta-encoded fixed-point encoding for runs of location fixes.
+
+A run is a list of ``(t_ms, lat_e7, lng_e7, accuracy_dm, battery)`` tuples:
+epoch milliseconds, coordinates in 1e-7 degrees, accuracy in decimetres and
+battery percent, the last two possibly ``None``. Each fix is written as
+zigzag varints of its difference from the previous fix, so a stream of
+pings a few metres and seconds apart costs a handful of bytes per point.
+
+Upload frames (``application/vnd.fieldwatch.track``) wrap a run with a small
+header::
+
+    version=1 | guard_id | len(device_id) device_id | first_sequence | run
+
+Point ``i`` carries sequence ``first_sequence + i``; batch uploads are
+idempotent on these sequences, so ``first_sequence`` must be at least 1.
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+FORMAT_VERSION = 1
+E7 = 10_000_000
+
+
+class CodecError(ValueError):
+    pass
+
+
+def _write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        if pos >= len(data):
+            raise CodecError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise CodecError("varint too long")
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _optional(value):
+    return 0 if value is None else value + 1
+
+
+def _unoptional(value):
+    return None if value == 0 else value - 1
+
+
+def encode_run(points, out=None):
+    out = bytearray() if out is None else out
+    _write_varint(out, len(points))
+    prev_t = prev_lat = prev_lng = 0
+    for t_ms, lat, lng, accuracy, battery in points:
+        _write_varint(out, _zigzag(t_ms - prev_t))
+        _write_varint(out, _zigzag(lat - prev_lat))
+        _write_varint(out, _zigzag(lng - prev_lng))
+        _write_varint(out, _optional(accuracy))
+        _write_varint(out, _optional(battery))
+        prev_t, prev_lat, prev_lng = t_ms, lat, lng
+    return out
+
+
+def decode_run(data, pos=0):
+    count, pos = _read_varint(data, pos)
+    points = []
+    t_ms = lat = lng = 0
+    for _ in range(count):
+        raw = []
+        for _ in range(5):
+            value, pos = _read_varint(data, pos)
+            raw.append(value)
+        t_ms += _unzigzag(raw[0])
+        lat += _unzigzag(raw[1])
+        lng += _unzigzag(raw[2])
+        points.append((t_ms, lat, lng, _unoptional(raw[3]), _unoptional(raw[4])))
+    return points, pos
+
+
+def to_e7(value):
+    return int((Decimal(str(value)) * E7).to_integral_value())
+
+
+def from_e7(value):
+    return Decimal(value) / E7
+
+
+def to_millis(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def from_millis(value):
+    try:
+        return datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        raise CodecError("timestamp out of range")
+
+
+def encode_upload(guard_id, device_id, first_sequence, points):
+    out = bytearray([FORMAT_VERSION])
+    _write_varint(out, guard_id)
+    device = (device_id or "").encode()
+    _write_varint(out, len(device))
+    out += device
+    _write_varint(out, first_sequence)
+    encode_run(points, out)
+    return bytes(out)
+
+
+def decode_upload(data):
+    """Decode an upload frame into the dict shape the JSON endpoints accept."""
+    if not data or data[0] != FORMAT_VERSION:
+        raise CodecError("unsupported track format version")
+    guard_id, pos = _read_varint(data, 1)
+    length, pos = _read_varint(data, pos)
+    try:
+        device_id = bytes(data[pos:pos + length]).decode()
+    except UnicodeDecodeError:
+        raise CodecError("device_id is not valid UTF-8")
+    pos += length
+    first_sequence, pos = _read_varint(data, pos)
+    if first_sequence < 1:
+        raise CodecError("first_sequence must be at least 1")
+    points, pos = decode_run(data, pos)
+    if pos != len(data):
+        raise CodecError("trailing bytes after track")
+    decoded = []
+    for index, (t_ms, lat, lng, accuracy, battery) in enumerate(points):
+        decoded.append({
+            "latitude": from_e7(lat),
+            "longitude": from_e7(lng),
+            "timestamp": from_millis(t_ms),
+            "accuracy": None if accuracy is None else accuracy / 10,
+            "battery_level": battery,
+            "sequence": first_sequence + index,
+        })
+    return {"guard_id": guard_id, "device_id": device_id, "points": decoded}
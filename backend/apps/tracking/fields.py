@@ -0,0 +1,54 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+E7 = 10_000_000
+# Longitudes reach 180 degrees; 180e7 still fits a signed 32-bit column.
+MAX_DEGREES = 180
+
+
+class E7CoordinateField(models.IntegerField):
+    """A coordinate in degrees stored as an integer count of 1e-7 degrees.
+
+    Values read from the database are floats, so distance math can use them
+    directly; Decimal, float and numeric strings are accepted on write and in
+    lookups. 1e-7 degrees is about 1 cm, well below GPS accuracy.
+    """
+
+    description = "Coordinate stored in 1e-7 degree units"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return value / E7
+
+    def to_python(self, value):
+        if value is None or isinstance(value, float):
+            return value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid"], code="invalid", params={"value": value}
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        value = float(value)
+        if not -MAX_DEGREES <= value <= MAX_DEGREES:
+            raise ValueError(
+                f"Field '{self.name}' expected a coordinate within ±{MAX_DEGREES} degrees but got {value!r}."
+            )
+        return round(value * E7)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{"form_class": forms.FloatField, **kwargs})
+
+
+# IntegerField rounds float bounds of >= and < to whole numbers, which would
+# snap degree comparisons to integer degrees; compare converted values instead.
+E7CoordinateField.register_lookup(GreaterThanOrEqual)
+E7CoordinateField.register_lookup(LessThan)
@@ -0,0 +1,10 @@
+from math import asin, cos, radians, sin, sqrt
+
+EARTH_RADIUS_M = 6371000
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters between two points given in degrees."""
+    lat1, lng1, lat2, lng2 = map(radians, map(float, (lat1, lng1, lat2, lng2)))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * asin(sqrt(a))
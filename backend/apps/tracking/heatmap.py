@@ -0,0 +1,116 @@
+"""Coverage heatmaps: fixes binned into a fixed grid over a time range.
+
+Every fix in the range, whether stored as a ``LocationLog`` row, packed in a
+``TrackSegment`` or folded into a ``Stay``, adds to the count of its grid
+cell. Dwell time is the time from a fix (or the end of a stay) to the guard's
+next fix, gaps longer than ``LOCATION_DWELL_MAX_GAP`` counting as nothing,
+plus the duration of each stay. Rows, stays and segments are read per guard
+in time order and merged. Each source is read in keyset pages of
+``CHUNK_SIZE`` rows rather than with ``iterator``, which MySQL's client
+buffers in full. Memory is therefore bounded by the number of cells plus
+one page per source.
+"""
+import heapq
+import math
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+
+from .codec import E7, from_millis, to_millis
+from .history import unpack_data
+from .models import LocationLog, Stay, TrackSegment
+
+CHUNK_SIZE = 5000
+SEGMENT_CHUNK_SIZE = 100
+
+
+def _after(order, key):
+    """Rows sorting after ``key`` on the ``order`` fields, which are unique together."""
+    return reduce(or_, (
+        Q(**dict(zip(order[:position], key[:position])), **{f"{order[position]}__gt": key[position]})
+        for position in range(len(order))
+    ))
+
+
+def _keyset(queryset, order, columns, chunk_size=CHUNK_SIZE):
+    """``order`` + ``columns`` value tuples of ``queryset``, fetched a page at a time."""
+    key = None
+    while True:
+        page = queryset if key is None else queryset.filter(_after(order, key))
+        rows = list(page.order_by(*order).values_list(*order, *columns)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        key = rows[-1][:len(order)]
+
+
+def _rows(filters, start, end):
+    rows = LocationLog.objects.filter(timestamp__gte=start, timestamp__lt=end, **filters)
+    for guard_id, timestamp, _, lat, lng in _keyset(rows, ("guard_id", "timestamp", "id"), ("latitude", "longitude")):
+        yield guard_id, timestamp, timestamp, lat, lng, 1
+
+
+def _stays(filters, start, end):
+    stays = Stay.objects.filter(start_time__lt=end, end_time__gte=start, **filters)
+    columns = ("end_time", "latitude", "longitude", "point_count")
+    for guard_id, stay_start, _, stay_end, lat, lng, count in _keyset(stays, ("guard_id", "start_time", "id"), columns):
+        # The stay's first fix is its anchor, which is stored as a row.
+        yield guard_id, max(stay_start, start), min(stay_end, end), lat, lng, count - 1
+
+
+def _segment_points(group, low, high):
+    """Points of overlapping segments of one guard, in time order."""
+    guard_id = group[0][0]
+    points = [point for _, data in group for point in unpack_data(data)]
+    if len(group) > 1:
+        points.sort(key=lambda point: point[0])
+    for t_ms, lat, lng, _, _ in points:
+        if low <= t_ms < high:
+            moment = from_millis(t_ms)
+            yield guard_id, moment, moment, lat / E7, lng / E7, 1
+
+
+def _segments(filters, start, end):
+    low, high = to_millis(start), to_millis(end)
+    segments = TrackSegment.objects.filter(start_time__lt=end, end_time__gte=start, **filters)
+    order = ("guard_id", "start_time", "id")
+    # Compaction keeps a guard's segments disjoint; segments written before it
+    # merged late rows may still overlap, so overlapping ones are read together.
+    group, group_end = [], None
+    for guard_id, segment_start, _, segment_end, data in _keyset(
+        segments, order, ("end_time", "data"), SEGMENT_CHUNK_SIZE
+    ):
+        if group and (guard_id != group[0][0] or segment_start > group_end):
+            yield from _segment_points(group, low, high)
+            group = []
+        group_end = segment_end if not group else max(group_end, segment_end)
+        group.append((guard_id, data))
+    if group:
+        yield from _segment_points(group, low, high)
+
+
+def build_heatmap(filters, start, end, cell_deg):
+    """Cells ``{(row, col): [count, dwell_seconds]}`` for fixes matching ``filters`` in [start, end)."""
+    max_gap = settings.LOCATION_DWELL_MAX_GAP
+    cells = {}
+    previous = None
+    events = heapq.merge(
+        _rows(filters, start, end),
+        _stays(filters, start, end),
+        _segments(filters, start, end),
+        key=lambda event: (event[0], event[1]),
+    )
+    for event in events:
+        guard_id, event_start, event_end, lat, lng, count = event
+        if previous is not None and previous[0] == guard_id:
+            gap = (event_start - previous[2]).total_seconds()
+            if 0 < gap <= max_gap:
+                cells[previous[6]][1] += gap
+        cell = (math.floor(lat / cell_deg), math.floor(lng / cell_deg))
+        totals = cells.setdefault(cell, [0, 0.0])
+        totals[0] += count
+        totals[1] += (event_end - event_start).total_seconds()
+        previous = event + (cell,)
+    return cells
@@ -0,0 +1,154 @@
+"""Location history across live rows and compressed track segments.
+
+``compact_track`` packs closed spans of a guard's ``LocationLog`` rows into
+``TrackSegment`` blobs, one per guard and span, and deletes the rows; rows
+that arrive late for an already packed span are merged into its segment, so
+segments never overlap; ``track_history`` reads both
+back as one newest-first list of ``LocationLog`` objects, so callers don't
+need to know where a fix is stored. Packed timestamps keep millisecond
+precision and coordinates 1e-7 degrees. Compact only data old enough that
+devices have long since had their uploads acknowledged: replays of packed
+points are no longer de-duplicated.
+"""
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+
+from .codec import E7, decode_run, encode_run, from_millis, to_e7, to_millis
+from .models import LocationLog, TrackSegment
+
+
+def _non_negative(value):
+    return value if value is not None and value >= 0 else None
+
+
+def log_points(logs):
+    """Codec tuples for LocationLog objects."""
+    return [
+        (
+            to_millis(log.timestamp),
+            to_e7(log.latitude),
+            to_e7(log.longitude),
+            _non_negative(None if log.accuracy is None else round(log.accuracy * 10)),
+            _non_negative(log.battery_level),
+        )
+        for log in logs
+    ]
+
+
+def fill_segment(segment, points):
+    """Set a segment's span, bounding box and data from codec tuples ordered by time."""
+    lats = [point[1] for point in points]
+    lngs = [point[2] for point in points]
+    segment.start_time = from_millis(points[0][0])
+    segment.end_time = from_millis(points[-1][0])
+    segment.point_count = len(points)
+    segment.min_lat_e7 = min(lats)
+    segment.max_lat_e7 = max(lats)
+    segment.min_lng_e7 = min(lngs)
+    segment.max_lng_e7 = max(lngs)
+    segment.data = zlib.compress(bytes(encode_run(points)), 9)
+    return segment
+
+
+def pack_segment(guard, logs):
+    """Build an unsaved TrackSegment from logs ordered by timestamp."""
+    segment = TrackSegment(guard=guard, organization_id=guard.organization_id)
+    return fill_segment(segment, log_points(logs))
+
+
+def unpack_data(data):
+    """Codec tuples of a segment's compressed ``data``."""
+    points, _ = decode_run(zlib.decompress(data))
+    return points
+
+
+def unpack_segment(segment):
+    return unpack_data(segment.data)
+
+
+def segment_logs(segment, since=None, until=None):
+    """Unsaved LocationLog objects for the points of a segment inside [since, until)."""
+    low = to_millis(since) if since else None
+    high = to_millis(until) if until else None
+    logs = []
+    for t_ms, lat, lng, accuracy, battery in unpack_segment(segment):
+        if (low is not None and t_ms < low) or (high is not None and t_ms >= high):
+            continue
+        logs.append(
+            LocationLog(
+                guard=segment.guard,
+                organization_id=segment.organization_id,
+                latitude=lat / E7,
+                longitude=lng / E7,
+                timestamp=from_millis(t_ms),
+                accuracy=None if accuracy is None else accuracy / 10,
+                battery_level=battery,
+            )
+        )
+    return logs
+
+
+def track_history(guard, since, until=None):
+    """All fixes of a guard in [since, until), newest first, from rows and segments."""
+    rows = guard.location_logs.filter(timestamp__gte=since)
+    segments = TrackSegment.objects.filter(guard=guard, end_time__gte=since)
+    if until is not None:
+        rows = rows.filter(timestamp__lt=until)
+        segments = segments.filter(start_time__lt=until)
+    logs = list(rows.select_related("guard__user"))
+    for segment in segments:
+        segment.guard = guard
+        logs.extend(segment_logs(segment, since, until))
+    logs.sort(key=lambda log: log.timestamp, reverse=True)
+    return logs
+
+
+def _span_start(moment, span):
+    seconds = span.total_seconds()
+    epoch = moment.timestamp()
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=dt_timezone.utc)
+
+
+def compact_track(guard, before, span=timedelta(hours=1)):
+    """Pack the guard's rows older than ``before`` into one segment per closed span.
+
+    Works one span at a time so memory is bounded by a single span of fixes.
+    Rows of a span that already has a segment are merged into it. Returns
+    ``(segments_written, rows_packed)``.
+    """
+    before = _span_start(before, span)
+    pending = LocationLog.objects.filter(guard=guard, timestamp__lt=before)
+    segments = packed = 0
+    while True:
+        first = pending.order_by("timestamp").values_list("timestamp", flat=True).first()
+        if first is None:
+            break
+        start = _span_start(first, span)
+        logs = list(
+            pending.filter(timestamp__gte=start, timestamp__lt=start + span).order_by(
+                "timestamp", "id"
+            )
+        )
+        with transaction.atomic():
+            # Segments overlapping the span (one, unless ``span`` changed between runs).
+            existing = list(
+                TrackSegment.objects.select_for_update()
+                .filter(guard=guard, start_time__lt=start + span, end_time__gte=start)
+                .order_by("start_time")
+            )
+            if not existing:
+                pack_segment(guard, logs).save()
+            else:
+                points = log_points(logs)
+                for segment in existing:
+                    points += unpack_segment(segment)
+                points.sort(key=lambda point: point[0])
+                fill_segment(existing[0], points).save()
+                TrackSegment.objects.filter(id__in=[segment.id for segment in existing[1:]]).delete()
+            # LocationLog has no delete receivers, so this is a single DELETE.
+            LocationLog.objects.filter(id__in=[log.id for log in logs]).delete()
+        segments += 1
+        packed += len(logs)
+    return segments, packed
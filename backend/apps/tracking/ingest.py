@@ -0,0 +1,242 @@
+"""Ingest paths for location pings.
+
+Write-behind buffer: with ``LOCATION_INGEST_MODE = "buffered"`` the ingest endpoint validates a
+ping, stamps it with the time it was accepted and hands it to a bounded
+in-process queue. A single worker thread drains the queue and writes batches
+with ``bulk_create`` once ``LOCATION_INGEST_BATCH_SIZE`` points are waiting or
+``LOCATION_INGEST_FLUSH_INTERVAL`` seconds have passed, whichever is first.
+
+Backpressure: when the queue is full, ``put`` waits up to
+``LOCATION_INGEST_ENQUEUE_TIMEOUT`` seconds and then raises ``IngestQueueFull``
+so the endpoint can answer 503 and the device retries later. Points are never
+dropped silently on the way in.
+
+Shutdown: the buffer registers an ``atexit`` hook that stops the worker and
+flushes everything still queued. A hard kill (SIGKILL, OOM) loses at most the
+points accepted since the last flush. A batch that fails to insert is logged
+and counted under ``failed``; it is not re-queued.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.authentication.versioning import bump_version
+from .models import DeviceCursor, LocationLog
+from .pipeline import process
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class LocationBuffer:
+    def __init__(self, batch_size=500, flush_interval=1.0, max_size=10000, enqueue_timeout=0.1):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.enqueue_timeout = enqueue_timeout
+        self.stats = {"accepted": 0, "written": 0, "rejected": 0, "filtered": 0, "failed": 0}
+        # Points are stamped and queued under the condition's lock, so the
+        # queue is in timestamp order and the batch being written is older
+        # than anything still queued.
+        self._queue = deque()
+        self._writing = []
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name="location-ingest", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def put(self, log):
+        """Stamp ``log`` with the current time and queue it; raises IngestQueueFull."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._queue) < self.max_size, self.enqueue_timeout):
+                self.stats["rejected"] += 1
+                raise IngestQueueFull()
+            log.timestamp = timezone.now()
+            self._queue.append(log)
+            self.stats["accepted"] += 1
+            self._condition.notify_all()
+
+    def oldest_pending(self):
+        """Timestamp of the oldest point accepted but not yet written, or None."""
+        with self._condition:
+            if self._writing:
+                return self._writing[0].timestamp
+            return self._queue[0].timestamp if self._queue else None
+
+    def stop(self, timeout=10):
+        """Stop the worker after it has written everything queued so far."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        thread.join(timeout)
+
+    def _take(self):
+        """The next batch, once it is full or the flush interval has passed; None when stopped and drained."""
+        deadline = time.monotonic() + self.flush_interval
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self._queue) >= self.batch_size or self._stopping,
+                max(deadline - time.monotonic(), 0),
+            )
+            if self._stopping and not self._queue:
+                return None
+            count = len(self._queue) if self._stopping else min(len(self._queue), self.batch_size)
+            self._writing = [self._queue.popleft() for _ in range(count)]
+            self._condition.notify_all()
+            return self._writing
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            if batch:
+                self.flush(batch)
+            with self._condition:
+                self._writing = []
+
+    def flush(self, batch):
+        batch, filtered = process(batch)
+        with self._condition:
+            self.stats["filtered"] += filtered
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                LocationLog.objects.bulk_create(chunk)
+            except Exception:
+                with self._condition:
+                    self.stats["failed"] += len(chunk)
+                logger.exception("Dropped %d location points after insert failure", len(chunk))
+                continue
+            with self._condition:
+                self.stats["written"] += len(chunk)
+            # bulk_create skips post_save, so bump the ETag versions here.
+            for org_id in {log.organization_id for log in chunk}:
+                bump_version(org_id, "locations")
+        close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def is_buffered():
+    return settings.LOCATION_INGEST_MODE == "buffered"
+
+
+def get_buffer():
+    """The process-wide buffer, started on first use (after any worker fork)."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = LocationBuffer(
+                batch_size=settings.LOCATION_INGEST_BATCH_SIZE,
+                flush_interval=settings.LOCATION_INGEST_FLUSH_INTERVAL,
+                max_size=settings.LOCATION_INGEST_QUEUE_SIZE,
+                enqueue_timeout=settings.LOCATION_INGEST_ENQUEUE_TIMEOUT,
+            )
+        _buffer.start()
+        return _buffer
+
+
+def max_write_delay():
+    """How far behind the clock readable points may still be.
+
+    In buffered mode this is the age of the oldest point this process has
+    accepted but not yet written, and at least twice the flush interval to
+    cover the buffers of other worker processes, which cannot be inspected
+    from here.
+    """
+    if not is_buffered():
+        return timedelta(0)
+    delay = timedelta(seconds=settings.LOCATION_INGEST_FLUSH_INTERVAL * 2)
+    oldest = _buffer.oldest_pending() if _buffer is not None else None
+    if oldest is not None:
+        delay = max(delay, timezone.now() - oldest)
+    return delay
+
+
+# Upper bound on rows inspected per request when advancing a device ack.
+ACK_SCAN_LIMIT = 5000
+
+
+def ingest_sequenced(guard, device_id, points):
+    """Store sequence-numbered points from a device.
+
+    Returns the device's new ack and the number of points rejected as noise.
+
+    Devices number their points from 1 without gaps. Duplicates from replays
+    are discarded by the unique index through an insert-ignore
+    ``bulk_create``; no per-point existence checks are made. Points at or
+    below the current ack are skipped up front, since they may have been
+    folded into a stay and have no row to collide with. These writes are
+    always synchronous because the ack must only cover committed rows.
+    """
+    cursor, _ = DeviceCursor.objects.get_or_create(guard=guard, device_id=device_id)
+    logs = [
+        LocationLog(
+            guard=guard,
+            organization_id=guard.organization_id,
+            device_id=device_id,
+            **point,
+        )
+        for point in points
+        if point["sequence"] > cursor.acked_sequence
+    ]
+    stored, rejected = process(logs)
+    if stored:
+        LocationLog.objects.bulk_create(stored, ignore_conflicts=True)
+        bump_version(guard.organization_id, "locations")
+    received = {log.sequence for log in logs}
+    return advance_ack(cursor, received), rejected
+
+
+def advance_ack(cursor, received=()):
+    """Move a device cursor up to the highest contiguous handled sequence.
+
+    A sequence is handled once it is stored, or when it arrived in this
+    upload and the pipeline rejected it or folded it into a stay.
+    """
+    handled = set(received)
+    handled.update(
+        LocationLog.objects.filter(
+            guard_id=cursor.guard_id,
+            device_id=cursor.device_id,
+            sequence__gt=cursor.acked_sequence,
+        )
+        .order_by("sequence")
+        .values_list("sequence", flat=True)[:ACK_SCAN_LIMIT]
+    )
+    acked = cursor.acked_sequence
+    while acked + 1 in handled:
+        acked += 1
+    if acked > cursor.acked_sequence:
+        # Concurrent uploads may race here; only ever move the cursor forward.
+        DeviceCursor.objects.filter(pk=cursor.pk, acked_sequence__lt=acked).update(
+            acked_sequence=acked
+        )
+    return acked
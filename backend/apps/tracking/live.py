@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.attendance.models import Attendance
+from .ingest import max_write_delay
+from .models import LocationLog, Stay
+from .spatial import index_for
+
+logger = logging.getLogger(__name__)
+
+# A guard is "live" while their newest fix is younger than this.
+LIVE_WINDOW = timedelta(minutes=30)
+# Live ETags also expire on this clock so guards leave the window without a
+# write, at most this late.
+LIVE_ETAG_BUCKET = timedelta(minutes=1)
+
+
+def encode_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(value):
+    """Parse a cursor issued by encode_cursor; raises ValueError when malformed."""
+    micros = int(value)
+    if micros < 0:
+        raise ValueError("cursor must be positive")
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+
+
+def _stay_position(stay):
+    """Unsaved LocationLog standing for the newest point of a stay."""
+    return LocationLog(
+        guard=stay.guard,
+        organization_id=stay.organization_id,
+        latitude=stay.latitude,
+        longitude=stay.longitude,
+        timestamp=stay.end_time,
+        accuracy=stay.accuracy,
+        battery_level=stay.battery_level,
+    )
+
+
+def latest_locations(logs, since, stays=None):
+    """Newest log per guard among ``logs`` recorded after ``since``.
+
+    Runs as one grouped range scan over ``(organization, timestamp)`` plus a
+    lookup of the matching rows, rather than one query per guard. When
+    ``stays`` is given, a stay that ended later than a guard's newest log
+    stands in for it as an unsaved log (``id`` None) at the stay's centroid.
+    """
+    newest = dict(
+        logs.filter(timestamp__gt=since)
+        .values_list("guard_id")
+        .annotate(last=Max("timestamp"))
+        .order_by()
+    )
+    latest = {}
+    if newest:
+        candidates = (
+            logs.filter(guard_id__in=newest, timestamp__in=set(newest.values()))
+            .select_related("guard__user")
+            .order_by("guard_id", "-id")
+        )
+        for log in candidates:
+            if log.timestamp == newest[log.guard_id]:
+                latest.setdefault(log.guard_id, log)
+    if stays is not None:
+        recent = stays.filter(end_time__gt=since).select_related("guard__user").order_by("end_time")
+        for stay in recent:
+            log = latest.get(stay.guard_id)
+            if log is None or stay.end_time > log.timestamp:
+                latest[stay.guard_id] = _stay_position(stay)
+    return list(latest.values())
+
+
+def _active_guards(logs, stays, **window):
+    guards = set(
+        logs.filter(**{f"timestamp__{op}": moment for op, moment in window.items()})
+        .values_list("guard_id", flat=True)
+        .distinct()
+    )
+    if stays is not None:
+        guards.update(
+            stays.filter(**{f"end_time__{op}": moment for op, moment in window.items()})
+            .values_list("guard_id", flat=True)
+            .distinct()
+        )
+    return guards
+
+
+def dropped_guards(logs, since, now, stays=None):
+    """Guards that were live at ``since`` but have aged out of the window by ``now``."""
+    aged = _active_guards(logs, stays, gt=since - LIVE_WINDOW, lte=now - LIVE_WINDOW)
+    if not aged:
+        return []
+    still_live = _active_guards(
+        logs.filter(guard_id__in=aged),
+        None if stays is None else stays.filter(guard_id__in=aged),
+        gt=now - LIVE_WINDOW,
+    )
+    return sorted(aged - still_live)
+
+
+def live_changes(logs, cursor=None, stays=None):
+    """Positions that changed since ``cursor`` along with a fresh cursor.
+
+    A missing or expired cursor yields a full snapshot of the live window.
+    """
+    now = timezone.now()
+    window_start = now - LIVE_WINDOW
+    # Points can land after the read with an older timestamp (buffered
+    # ingest), so the next cursor is held back to the oldest point not yet
+    # written.
+    next_cursor = encode_cursor(now - max_write_delay())
+    if cursor is None or cursor < window_start:
+        return {
+            "cursor": next_cursor,
+            "full": True,
+            "locations": latest_locations(logs, window_start, stays),
+            "removed": [],
+        }
+    return {
+        "cursor": next_cursor,
+        "full": False,
+        "locations": latest_locations(logs, cursor, stays),
+        "removed": dropped_guards(logs, cursor, now, stays),
+    }
+
+
+def _load_index(index, organization_id):
+    started = time.monotonic()
+    now = timezone.now()
+    logs = LocationLog.objects.filter(organization_id=organization_id)
+    stays = Stay.objects.filter(organization_id=organization_id)
+    positions = [
+        (log.guard_id, float(log.latitude), float(log.longitude), log.timestamp)
+        for log in latest_locations(logs, now - LIVE_WINDOW, stays)
+    ]
+    on_duty = dict(
+        Attendance.objects.filter(organization_id=organization_id, checkout_time__isnull=True)
+        .values_list("guard_id", "id")
+    )
+    index.load(positions, on_duty, started, now - timedelta(seconds=settings.LOCATION_INDEX_TTL_S))
+
+
+def _resync(index, organization_id):
+    try:
+        _load_index(index, organization_id)
+    except Exception:
+        logger.exception("Reloading the location index of organization %s failed", organization_id)
+    finally:
+        index.resyncing = False
+        connection.close()
+
+
+def _resync_in_background(index, organization_id):
+    with index.lock:
+        if index.resyncing:
+            return
+        index.resyncing = True
+    threading.Thread(
+        target=_resync, args=(index, organization_id), name="location-index-resync", daemon=True
+    ).start()
+
+
+def nearest_guards(organization, latitude, longitude, k):
+    """The ``k`` on-duty guards closest to a point, from the in-memory grid index.
+
+    Returns ``(distance_m, guard_id, attendance_id, (lat, lng, timestamp))``
+    tuples, closest first. A guard is on duty while they have an open
+    attendance and a position inside the live window. Only the first lookup
+    per organization and process reads the database; a stale index is
+    served while a background thread reloads it.
+    """
+    index = index_for(organization.id)
+    if index.loaded_at is None:
+        _load_index(index, organization.id)
+    elif time.monotonic() - index.loaded_at > settings.LOCATION_INDEX_RESYNC_S:
+        _resync_in_background(index, organization.id)
+    now = timezone.now()
+    fresh = now - LIVE_WINDOW
+    attendance_ids = {}
+
+    def accept(guard_id, position):
+        # Called under the index lock, so on_duty cannot change meanwhile.
+        attendance_id = index.on_duty.get(guard_id)
+        if attendance_id is None or position[2] <= fresh:
+            return False
+        attendance_ids[guard_id] = attendance_id
+        return True
+
+    return [
+        (distance, guard_id, attendance_ids[guard_id], position)
+        for distance, guard_id, position in index.nearest(
+            latitude, longitude, k, accept, stale_before=now - timedelta(seconds=settings.LOCATION_INDEX_TTL_S)
+        )
+    ]
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.authentication.versioning import bump_version
+from apps.guards.models import Guard
+from apps.tracking.history import compact_track
+from apps.tracking.models import LocationLog
+
+
+class Command(BaseCommand):
+    help = 'Pack closed spans of old location logs into compressed per-guard track segments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=48, help='Only pack fixes older than this.')
+        parser.add_argument('--span-hours', type=int, default=1, help='Length of each packed segment.')
+        parser.add_argument('--org', type=int, help='Limit to one organization id.')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(hours=options['older_than_hours'])
+        span = timedelta(hours=options['span_hours'])
+        old_logs = LocationLog.objects.filter(timestamp__lt=before)
+        if options['org']:
+            old_logs = old_logs.filter(organization_id=options['org'])
+        guard_ids = old_logs.values_list('guard_id', flat=True).distinct()
+        total_segments = total_rows = 0
+        for guard in Guard.objects.filter(id__in=list(guard_ids)):
+            segments, rows = compact_track(guard, before, span)
+            if segments:
+                bump_version(guard.organization_id, 'locations')
+                self.stdout.write(f'{guard.name}: {rows} fixes packed into {segments} segments')
+            total_segments += segments
+            total_rows += rows
+        self.stdout.write(self.style.SUCCESS(
+            f'Track compaction complete. Segments: {total_segments}, fixes packed: {total_rows}'
+        ))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from apps.authentication.backfill import backfill_organization
+
+
+def backfill(apps, schema_editor):
+    backfill_organization(apps.get_model('tracking', 'LocationLog'), apps.get_model('guards', 'Guard'))
+
+
+class Migration(migrations.Migration):
+    # Batches commit individually; run `manage.py backfill_organization` ahead
+    # of deploying on large tables so this step finds nothing left to do.
+    atomic = False
+
+    dependencies = [
+        ('tracking', '0003_alter_locationlog_latitude_and_more'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+        ('tracking', '0004_backfill_locationlog_organization'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='locationlog',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_logs', to='authentication.organization'),
+        ),
+    ]
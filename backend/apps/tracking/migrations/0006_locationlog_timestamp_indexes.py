@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built once, after the organization column is backfilled and non-null.
+
+    dependencies = [
+        ('tracking', '0005_locationlog_organization_not_null'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='locationlog',
+            index=models.Index(fields=['organization', '-timestamp'], name='tracking_loc_org_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locationlog',
+            index=models.Index(fields=['guard', '-timestamp'], name='tracking_loc_guard_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0006_locationlog_timestamp_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='locationlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+        ('tracking', '0007_locationlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_id', models.CharField(max_length=64)),
+                ('acked_sequence', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='locationlog',
+            name='device_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='locationlog',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='locationlog',
+            constraint=models.UniqueConstraint(fields=('guard', 'device_id', 'sequence'), name='tracking_loc_device_seq_uniq'),
+        ),
+        migrations.AddField(
+            model_name='devicecursor',
+            name='guard',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='device_cursors', to='guards.guard'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='devicecursor',
+            unique_together={('guard', 'device_id')},
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+        ('tracking', '0008_locationlog_device_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('point_count', models.PositiveIntegerField()),
+                ('min_lat_e7', models.IntegerField()),
+                ('max_lat_e7', models.IntegerField()),
+                ('min_lng_e7', models.IntegerField()),
+                ('max_lng_e7', models.IntegerField()),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('guard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_segments', to='guards.guard')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_segments', to='authentication.organization')),
+            ],
+            options={
+                'ordering': ['-start_time'],
+                'indexes': [models.Index(fields=['guard', 'start_time'], name='tracking_seg_guard_start_idx'), models.Index(fields=['organization', 'start_time'], name='tracking_seg_org_start_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import F, Max, Min
+from django.db.models.functions import Round
+
+BATCH_SIZE = 10000
+
+
+def copy_coordinates(apps, schema_editor):
+    """Fill the integer columns from the decimal ones, one id range at a time."""
+    LocationLog = apps.get_model('tracking', 'LocationLog')
+    pending = LocationLog.objects.filter(latitude_e7__isnull=True)
+    bounds = pending.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        pending.filter(id__gte=start, id__lt=start + BATCH_SIZE).update(
+            latitude_e7=Round(F('latitude') * 10000000),
+            longitude_e7=Round(F('longitude') * 10000000),
+        )
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so the copy can run against a live table.
+    atomic = False
+
+    dependencies = [
+        ('tracking', '0009_tracksegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locationlog',
+            name='latitude_e7',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='locationlog',
+            name='longitude_e7',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from importlib import import_module
+
+import apps.tracking.fields
+from django.db import migrations
+
+copy_coordinates = import_module('apps.tracking.migrations.0010_locationlog_e7_columns').copy_coordinates
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0010_locationlog_e7_columns'),
+    ]
+
+    operations = [
+        # Catch rows written between the bulk copy and this migration.
+        migrations.RunPython(copy_coordinates, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='locationlog',
+            name='latitude',
+        ),
+        migrations.RemoveField(
+            model_name='locationlog',
+            name='longitude',
+        ),
+        migrations.RenameField(
+            model_name='locationlog',
+            old_name='latitude_e7',
+            new_name='latitude',
+        ),
+        migrations.RenameField(
+            model_name='locationlog',
+            old_name='longitude_e7',
+            new_name='longitude',
+        ),
+        migrations.AlterField(
+            model_name='locationlog',
+            name='latitude',
+            field=apps.tracking.fields.E7CoordinateField(),
+        ),
+        migrations.AlterField(
+            model_name='locationlog',
+            name='longitude',
+            field=apps.tracking.fields.E7CoordinateField(),
+        ),
+    ]
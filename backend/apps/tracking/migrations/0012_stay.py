@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:48
+
+import apps.tracking.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('guards', '0004_guard_geofence_latitude_guard_geofence_longitude_and_more'),
+        ('tracking', '0011_locationlog_e7_swap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Stay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('latitude', apps.tracking.fields.E7CoordinateField()),
+                ('longitude', apps.tracking.fields.E7CoordinateField()),
+                ('point_count', models.PositiveIntegerField(default=1)),
+                ('accuracy', models.FloatField(blank=True, null=True)),
+                ('battery_level', models.IntegerField(blank=True, null=True)),
+                ('guard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stays', to='guards.guard')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stays', to='authentication.organization')),
+            ],
+            options={
+                'ordering': ['-start_time'],
+                'indexes': [models.Index(fields=['organization', '-end_time'], name='tracking_stay_org_end_idx'), models.Index(fields=['guard', '-end_time'], name='tracking_stay_guard_end_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,19 @@
 from django.db import models
+from django.utils import timezone
 from apps.guards.models import Guard
 from apps.authentication.models import Organization
+from apps.authentication.versioning import bump_version
+from .fields import E7CoordinateField
+
+
+class _LocationLogQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete the rows and bump the "locations" version of their organizations."""
+        organization_ids = set(self.values_list("organization_id", flat=True).distinct())
+        result = super().delete()
+        for organization_id in organization_ids:
+            bump_version(organization_id, "locations")
+        return result
 
 
 class LocationLog(models.Model):
@@ -11,17 +24,122 @@ class LocationLog(models.Model):
         Organization,
         on_delete=models.CASCADE,
         related_name="location_logs",
-        null=True,
-        blank=True,
     )
-    latitude = models.DecimalField(max_digits=12, decimal_places=8)
-    longitude = models.DecimalField(max_digits=12, decimal_places=8)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    latitude = E7CoordinateField()
+    longitude = E7CoordinateField()
+    timestamp = models.DateTimeField(default=timezone.now)
     accuracy = models.FloatField(null=True, blank=True)
     battery_level = models.IntegerField(null=True, blank=True)
+    # Set by devices replaying buffered points; (guard, device_id, sequence)
+    # is unique so retried uploads are ignored by the database.
+    device_id = models.CharField(max_length=64, null=True, blank=True)
+    sequence = models.PositiveBigIntegerField(null=True, blank=True)
+
+    # Deletes bump "locations" here rather than from a post_delete receiver,
+    # which would stop guard deletes from cascading to the logs in bulk.
+    objects = _LocationLogQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.guard.name} - {self.timestamp} - {self.organization.name}"
 
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_version(self.organization_id, "locations")
+        return result
+
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # Drives live_locations and its "changed since" delta mode.
+            models.Index(fields=["organization", "-timestamp"], name="tracking_loc_org_ts_idx"),
+            # Per-guard history (guard_track, latest fix for geofence checks).
+            models.Index(fields=["guard", "-timestamp"], name="tracking_loc_guard_ts_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["guard", "device_id", "sequence"], name="tracking_loc_device_seq_uniq"
+            ),
+        ]
+
+
+class DeviceCursor(models.Model):
+    """Highest contiguous sequence stored for a guard's device."""
+
+    guard = models.ForeignKey(
+        Guard, on_delete=models.CASCADE, related_name="device_cursors"
+    )
+    device_id = models.CharField(max_length=64)
+    acked_sequence = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.guard.name} - {self.device_id} - {self.acked_sequence}"
+
+    class Meta:
+        unique_together = ["guard", "device_id"]
+
+
+class TrackSegment(models.Model):
+    """A closed span of a guard's fixes packed into one compressed blob.
+
+    ``data`` holds the zlib-compressed run from ``codec.encode_run``; see
+    ``history.py`` for packing and reading.
+    """
+
+    guard = models.ForeignKey(
+        Guard, on_delete=models.CASCADE, related_name="track_segments"
+    )
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="track_segments"
+    )
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    point_count = models.PositiveIntegerField()
+    # Bounding box in 1e-7 degrees.
+    min_lat_e7 = models.IntegerField()
+    max_lat_e7 = models.IntegerField()
+    min_lng_e7 = models.IntegerField()
+    max_lng_e7 = models.IntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.guard.name} - {self.start_time} - {self.point_count} points"
+
+    class Meta:
+        ordering = ["-start_time"]
+        indexes = [
+            models.Index(fields=["guard", "start_time"], name="tracking_seg_guard_start_idx"),
+            models.Index(fields=["organization", "start_time"], name="tracking_seg_org_start_idx"),
+        ]
+
+
+class Stay(models.Model):
+    """A period a guard spent stationary, replacing the fixes it absorbed."""
+
+    guard = models.ForeignKey(Guard, on_delete=models.CASCADE, related_name="stays")
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="stays"
+    )
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    # Centroid of the absorbed fixes.
+    latitude = E7CoordinateField()
+    longitude = E7CoordinateField()
+    point_count = models.PositiveIntegerField(default=1)
+    accuracy = models.FloatField(null=True, blank=True)
+    battery_level = models.IntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.guard.name} - {self.start_time} to {self.end_time}"
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    class Meta:
+        ordering = ["-start_time"]
+        indexes = [
+            models.Index(fields=["organization", "-end_time"], name="tracking_stay_org_end_idx"),
+            models.Index(fields=["guard", "-end_time"], name="tracking_stay_guard_end_idx"),
+        ]
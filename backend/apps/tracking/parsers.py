@@ -0,0 +1,20 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .codec import CodecError, decode_upload
+
+
+class CompactTrackParser(BaseParser):
+    """Parse delta-encoded binary location uploads (see codec.py).
+
+    The result has the same shape as a JSON batch upload, so it goes through
+    the same serializer validation.
+    """
+
+    media_type = 'application/vnd.fieldwatch.track'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return decode_upload(stream.read())
+        except (CodecError, ValueError, OverflowError, OSError) as exc:
+            raise ParseError(f'Compact track parse error - {exc}')
@@ -0,0 +1,266 @@
+"""Processing applied to incoming location fixes before they are stored.
+
+``process`` takes unsaved ``LocationLog`` objects from any ingest path and
+returns the ones that should be written. Per-guard state lives in process
+memory, so a fix costs no extra database reads; a worker that has not seen a
+guard yet simply stores its first fix. State of guards that sent nothing for
+``LOCATION_STATE_IDLE_S`` seconds is dropped (closing any open stay), so
+memory follows the guards currently reporting.
+
+Noise filtering: fixes reporting an accuracy worse than
+``LOCATION_FILTER_MAX_ACCURACY_M`` are rejected, as are fixes that would
+require moving faster than ``LOCATION_FILTER_MAX_SPEED_MPS`` from the last
+accepted fix (less both fixes' accuracy). Rejections are counted per reason
+in ``stats`` and reported back to the caller. With ``LOCATION_FILTER_KALMAN``
+(off by default) accepted fixes are also run through a constant-position
+Kalman filter whose measurement noise is the reported accuracy; the estimate
+is what later fixes are speed-checked against and is set on the log as
+``filtered_position`` for the response, while the raw fix is what gets
+stored. Any threshold set to 0 is off.
+
+Dwell detection is off unless ``LOCATION_DWELL_RADIUS_M`` is set: while a
+guard stays within that many meters of the last stored fix, new fixes are
+folded into a ``Stay`` with a start time, end time and centroid instead of
+being inserted. The stay row is refreshed at most every
+``LOCATION_DWELL_PERSIST_INTERVAL`` seconds and is what keeps the guard's
+live position current. Moving away, or a gap longer than
+``LOCATION_DWELL_MAX_GAP``, closes the stay.
+
+Late fixes, older than the newest one seen for the guard, are only checked
+for accuracy and are otherwise stored as they are.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+
+from apps.authentication.versioning import bump_version
+from .geo import haversine_m
+from .models import Stay
+from .spatial import record_position
+
+# Accuracy assumed for fixes that do not report one, in meters.
+DEFAULT_ACCURACY_M = 20.0
+
+
+class GuardState:
+    __slots__ = (
+        "last_time", "last_position", "speed", "variance",
+        "anchor", "stay", "lat_sum", "lng_sum", "persisted_at", "seen_at",
+    )
+
+    def __init__(self):
+        self.last_time = None
+        self.last_position = None
+        self.speed = None
+        self.variance = None
+        self.anchor = None
+        self.stay = None
+        self.lat_sum = self.lng_sum = 0.0
+        self.persisted_at = None
+        self.seen_at = time.monotonic()
+
+
+_states = {}
+# Guards share a fixed pool of locks, so locks never need evicting.
+_locks = [threading.Lock() for _ in range(64)]
+_swept_at = time.monotonic()
+_sweep_lock = threading.Lock()
+
+# Fixes rejected since start-up, by reason ("accuracy", "speed").
+stats = Counter()
+
+
+def _lock_for(guard_id):
+    return _locks[guard_id % len(_locks)]
+
+
+def evict_idle(now=None):
+    """Drop the state of guards idle for ``LOCATION_STATE_IDLE_S``; returns how many were dropped."""
+    now = time.monotonic() if now is None else now
+    idle = settings.LOCATION_STATE_IDLE_S
+    evicted = 0
+    for guard_id in list(_states):
+        with _lock_for(guard_id):
+            state = _states.get(guard_id)
+            if state is None or now - state.seen_at < idle:
+                continue
+            if state.stay is not None and state.stay.end_time != state.persisted_at:
+                _persist(state)
+            del _states[guard_id]
+            evicted += 1
+    return evicted
+
+
+def _maybe_evict():
+    """Run ``evict_idle`` at most once per ``LOCATION_STATE_IDLE_S`` / 10 seconds."""
+    global _swept_at
+    now = time.monotonic()
+    if not settings.LOCATION_STATE_IDLE_S or now - _swept_at < settings.LOCATION_STATE_IDLE_S / 10:
+        return
+    if not _sweep_lock.acquire(blocking=False):
+        return
+    try:
+        _swept_at = now
+        evict_idle(now)
+    finally:
+        _sweep_lock.release()
+
+
+def recent_speed(guard_id):
+    """Last measured speed of a guard in m/s; 0 while in a stay, None if unknown."""
+    state = _states.get(guard_id)
+    if state is None:
+        return None
+    if state.stay is not None:
+        return 0.0
+    return state.speed
+
+
+def process(logs):
+    """Run fixes through the ingest stages.
+
+    Returns ``(stored, rejected)``: the logs to write and the number of fixes
+    dropped as noise.
+    """
+    stored = []
+    rejected = 0
+    ordered = sorted(logs, key=lambda log: (log.guard_id, log.timestamp))
+    for guard_id, fixes in groupby(ordered, key=lambda log: log.guard_id):
+        with _lock_for(guard_id):
+            state = _states.setdefault(guard_id, GuardState())
+            state.seen_at = time.monotonic()
+            for log in fixes:
+                reason = _reject_reason(state, log)
+                if reason:
+                    stats[reason] += 1
+                    rejected += 1
+                    continue
+                if state.last_time is not None and log.timestamp <= state.last_time:
+                    stored.append(log)
+                    continue
+                _smooth(state, log)
+                record_position(
+                    log.organization_id, guard_id,
+                    float(log.latitude), float(log.longitude), log.timestamp,
+                )
+                gap = log.timestamp - state.last_time if state.last_time else None
+                state.last_time = log.timestamp
+                if not _absorb_into_stay(state, log, gap):
+                    stored.append(log)
+    _maybe_evict()
+    return stored, rejected
+
+
+def _accuracy(log):
+    return log.accuracy if log.accuracy is not None and log.accuracy > 0 else DEFAULT_ACCURACY_M
+
+
+def _reject_reason(state, log):
+    max_accuracy = settings.LOCATION_FILTER_MAX_ACCURACY_M
+    if max_accuracy and log.accuracy is not None and log.accuracy > max_accuracy:
+        return "accuracy"
+    max_speed = settings.LOCATION_FILTER_MAX_SPEED_MPS
+    if not max_speed or state.last_position is None or log.timestamp <= state.last_time:
+        return None
+    last_lat, last_lng, last_accuracy = state.last_position
+    distance = haversine_m(last_lat, last_lng, float(log.latitude), float(log.longitude))
+    distance -= last_accuracy + _accuracy(log)
+    elapsed = (log.timestamp - state.last_time).total_seconds()
+    if distance > max_speed * elapsed:
+        return "speed"
+    return None
+
+
+def _smooth(state, log):
+    """Remember the fix as the last accepted one, Kalman-smoothed when enabled.
+
+    The log keeps its raw coordinates; the estimate goes to ``log.filtered_position``.
+    """
+    lat, lng = float(log.latitude), float(log.longitude)
+    accuracy = _accuracy(log)
+    if state.last_position is None:
+        state.variance = accuracy ** 2
+    else:
+        elapsed = (log.timestamp - state.last_time).total_seconds()
+        last_lat, last_lng, _ = state.last_position
+        state.speed = haversine_m(last_lat, last_lng, lat, lng) / elapsed
+        if settings.LOCATION_FILTER_KALMAN:
+            state.variance += elapsed * settings.LOCATION_FILTER_KALMAN_NOISE_MPS ** 2
+            gain = state.variance / (state.variance + accuracy ** 2)
+            lat = last_lat + gain * (lat - last_lat)
+            lng = last_lng + gain * (lng - last_lng)
+            state.variance *= 1 - gain
+            log.filtered_position = (lat, lng)
+    state.last_position = (lat, lng, accuracy)
+
+
+def _absorb_into_stay(state, log, gap):
+    """Fold a stationary fix into the guard's stay; False when it must be stored."""
+    radius = settings.LOCATION_DWELL_RADIUS_M
+    if not radius:
+        return False
+    lat, lng = float(log.latitude), float(log.longitude)
+    max_gap = timedelta(seconds=settings.LOCATION_DWELL_MAX_GAP)
+    if state.anchor is None or gap > max_gap:
+        _start_moving(state, lat, lng, log.timestamp)
+        return False
+    anchor_lat, anchor_lng, anchor_time = state.anchor
+    if haversine_m(anchor_lat, anchor_lng, lat, lng) > radius:
+        _start_moving(state, lat, lng, log.timestamp)
+        return False
+    if state.stay is None:
+        state.lat_sum, state.lng_sum = anchor_lat + lat, anchor_lng + lng
+        state.stay = Stay(
+            guard_id=log.guard_id,
+            organization_id=log.organization_id,
+            start_time=anchor_time,
+            end_time=log.timestamp,
+            latitude=state.lat_sum / 2,
+            longitude=state.lng_sum / 2,
+            point_count=2,
+            accuracy=log.accuracy,
+            battery_level=log.battery_level,
+        )
+        _persist(state)
+        return True
+    stay = state.stay
+    state.lat_sum += lat
+    state.lng_sum += lng
+    stay.point_count += 1
+    stay.end_time = log.timestamp
+    stay.latitude = state.lat_sum / stay.point_count
+    stay.longitude = state.lng_sum / stay.point_count
+    stay.accuracy = log.accuracy
+    stay.battery_level = log.battery_level
+    interval = timedelta(seconds=settings.LOCATION_DWELL_PERSIST_INTERVAL)
+    if log.timestamp - state.persisted_at >= interval:
+        _persist(state)
+    return True
+
+
+def _start_moving(state, lat, lng, timestamp):
+    if state.stay is not None and state.stay.end_time != state.persisted_at:
+        _persist(state)
+    state.stay = None
+    state.anchor = (lat, lng, timestamp)
+
+
+def _persist(state):
+    stay = state.stay
+    if stay.pk is None:
+        stay.save()
+    else:
+        Stay.objects.filter(pk=stay.pk).update(
+            end_time=stay.end_time,
+            latitude=stay.latitude,
+            longitude=stay.longitude,
+            point_count=stay.point_count,
+            accuracy=stay.accuracy,
+            battery_level=stay.battery_level,
+        )
+    state.persisted_at = stay.end_time
+    bump_version(stay.organization_id, "locations")
@@ -0,0 +1,148 @@
+"""Time-synchronized playback of several guards' tracks.
+
+Each guard's fixes come from three sources read with keyset pagination in
+time order: ``LocationLog`` rows (``(timestamp, id)`` over the per-guard
+index), compacted ``TrackSegment`` blobs and ``Stay`` rows. Pages are plain
+bounded queries rather than open server-side cursors, so any number of
+per-guard streams can be interleaved on one connection. The per-source
+streams are merged per guard and then across guards with ``heapq.merge``;
+at any moment only one page per stream is held in memory.
+
+Frames are ``(timestamp, guard_id, fields)`` tuples; a stay is a single frame
+at its start with an ``until`` field.
+"""
+import heapq
+import json
+
+from django.db.models import Q
+
+from .codec import E7, from_millis, to_millis
+from .history import unpack_segment
+from .models import LocationLog, Stay, TrackSegment
+
+PAGE_SIZE = 500
+SEGMENT_PAGE_SIZE = 5
+# Frames written to the response per chunk.
+FRAMES_PER_CHUNK = 200
+
+
+def _paged(queryset, time_field, page_size):
+    """Yield rows of ``queryset`` ordered by ``(time_field, id)``, one page at a time."""
+    after = Q()
+    while True:
+        page = list(queryset.filter(after).order_by(time_field, "id")[:page_size])
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+        moment = getattr(last, time_field)
+        after = Q(**{f"{time_field}__gt": moment}) | Q(**{time_field: moment, "id__gt": last.id})
+
+
+def _row_frames(guard_id, start, end):
+    rows = LocationLog.objects.filter(
+        guard_id=guard_id, timestamp__gte=start, timestamp__lt=end
+    ).only("id", "timestamp", "latitude", "longitude", "accuracy", "battery_level")
+    for log in _paged(rows, "timestamp", PAGE_SIZE):
+        yield log.timestamp, guard_id, {
+            "latitude": log.latitude,
+            "longitude": log.longitude,
+            "accuracy": log.accuracy,
+            "battery_level": log.battery_level,
+        }
+
+
+def _segment_frames(guard_id, start, end):
+    low, high = to_millis(start), to_millis(end)
+    segments = TrackSegment.objects.filter(
+        guard_id=guard_id, start_time__lt=end, end_time__gte=start
+    )
+    for segment in _paged(segments, "start_time", SEGMENT_PAGE_SIZE):
+        for t_ms, lat, lng, accuracy, battery in unpack_segment(segment):
+            if low <= t_ms < high:
+                yield from_millis(t_ms), guard_id, {
+                    "latitude": lat / E7,
+                    "longitude": lng / E7,
+                    "accuracy": None if accuracy is None else accuracy / 10,
+                    "battery_level": battery,
+                }
+
+
+def _stay_frames(guard_id, start, end):
+    stays = Stay.objects.filter(guard_id=guard_id, start_time__lt=end, end_time__gte=start)
+    for stay in _paged(stays, "start_time", PAGE_SIZE):
+        yield max(stay.start_time, start), guard_id, {
+            "latitude": stay.latitude,
+            "longitude": stay.longitude,
+            "accuracy": stay.accuracy,
+            "battery_level": stay.battery_level,
+            "until": stay.end_time.isoformat(),
+        }
+
+
+def _frame_key(frame):
+    return frame[0], frame[1]
+
+
+def playback_frames(guard_ids, start, end):
+    """All frames of ``guard_ids`` in [start, end), ordered by time then guard."""
+    streams = [
+        heapq.merge(
+            _row_frames(guard_id, start, end),
+            _segment_frames(guard_id, start, end),
+            _stay_frames(guard_id, start, end),
+            key=_frame_key,
+        )
+        for guard_id in guard_ids
+    ]
+    return heapq.merge(*streams, key=_frame_key)
+
+
+def guards_in_bbox(filters, bbox, start, end):
+    """Ids of guards with any fix inside ``(min_lng, min_lat, max_lng, max_lat)`` in [start, end).
+
+    Boxes crossing the antimeridian are not supported here.
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    area = {
+        "latitude__gte": min_lat, "latitude__lte": max_lat,
+        "longitude__gte": min_lng, "longitude__lte": max_lng,
+    }
+    guard_ids = set(
+        LocationLog.objects.filter(timestamp__gte=start, timestamp__lt=end, **area, **filters)
+        .values_list("guard_id", flat=True)
+        .distinct()
+    )
+    guard_ids.update(
+        Stay.objects.filter(start_time__lt=end, end_time__gte=start, **area, **filters)
+        .values_list("guard_id", flat=True)
+        .distinct()
+    )
+    # Segments only keep their bounding box; treat an overlapping box as a hit.
+    guard_ids.update(
+        TrackSegment.objects.filter(
+            start_time__lt=end,
+            end_time__gte=start,
+            min_lat_e7__lte=round(max_lat * E7),
+            max_lat_e7__gte=round(min_lat * E7),
+            min_lng_e7__lte=round(max_lng * E7),
+            max_lng_e7__gte=round(min_lng * E7),
+            **filters,
+        )
+        .values_list("guard_id", flat=True)
+        .distinct()
+    )
+    return sorted(guard_ids)
+
+
+def ndjson_chunks(header, frames):
+    """Encode a header line and then one line per frame, several frames per chunk."""
+    yield json.dumps(header, default=str) + "\n"
+    lines = []
+    for timestamp, guard_id, fields in frames:
+        lines.append(json.dumps({"guard_id": guard_id, "timestamp": timestamp.isoformat(), **fields}))
+        if len(lines) == FRAMES_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -1,16 +1,45 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import LocationLog
+from .models import LocationLog, Stay
 from apps.guards.serializers import GuardSerializer
 
+class CoordinateField(serializers.DecimalField):
+    """Keeps the decimal API shape of coordinates stored as fixed-point integers.
+
+    ``limit`` bounds the value to [-limit, limit] degrees: 90 for latitude,
+    180 for longitude.
+    """
+
+    def __init__(self, limit, **kwargs):
+        super().__init__(max_digits=12, decimal_places=8, min_value=-limit, max_value=limit, **kwargs)
+
 class LocationLogSerializer(serializers.ModelSerializer):
     guard = GuardSerializer(read_only=True)
+    latitude = CoordinateField(90)
+    longitude = CoordinateField(180)
     
     class Meta:
         model = LocationLog
         fields = ['id', 'guard', 'latitude', 'longitude', 'timestamp', 'accuracy', 'battery_level']
 
+class StaySerializer(serializers.ModelSerializer):
+    latitude = CoordinateField(90)
+    longitude = CoordinateField(180)
+    duration = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Stay
+        fields = ['id', 'latitude', 'longitude', 'start_time', 'end_time', 'point_count', 'accuracy', 'battery_level', 'duration']
+
+    def get_duration(self, obj):
+        return int(obj.duration.total_seconds())
+
 class LocationLogCreateSerializer(serializers.ModelSerializer):
     guard_id = serializers.IntegerField()
+    latitude = CoordinateField(90)
+    longitude = CoordinateField(180)
     
     class Meta:
         model = LocationLog
@@ -19,15 +48,50 @@ class LocationLogCreateSerializer(serializers.ModelSerializer):
     def validate_guard_id(self, value):
         from apps.guards.models import Guard
         try:
-            guard = Guard.objects.get(id=value, organization=self.context['request'].user.organization)
+            self.guard = Guard.objects.select_related('organization').get(
+                id=value, organization=self.context['request'].user.organization
+            )
             return value
         except Guard.DoesNotExist:
             raise serializers.ValidationError("Guard not found or not in your organization.")
 
-    def create(self, validated_data):
-        from apps.guards.models import Guard
-        guard_id = validated_data.pop('guard_id')
-        guard = Guard.objects.get(id=guard_id)
-        validated_data['guard'] = guard
-        return super().create(validated_data)
+    def build(self):
+        """Unsaved LocationLog for the validated ping, stamped with the current time."""
+        data = dict(self.validated_data)
+        data.pop('guard_id')
+        return LocationLog(guard=self.guard, organization_id=self.guard.organization_id, **data)
+
+
+
+class LocationPointSerializer(serializers.ModelSerializer):
+    sequence = serializers.IntegerField(min_value=1)
+    latitude = CoordinateField(90)
+    longitude = CoordinateField(180)
+    timestamp = serializers.DateTimeField(required=False)
+
+    class Meta:
+        model = LocationLog
+        fields = ['sequence', 'latitude', 'longitude', 'timestamp', 'accuracy', 'battery_level']
+
+    def validate_timestamp(self, value):
+        if value > timezone.now() + timedelta(minutes=5):
+            raise serializers.ValidationError("Timestamp is in the future.")
+        return value
+
+
+class LocationBatchSerializer(serializers.Serializer):
+    """Sequence-numbered points replayed by a device after being offline."""
+
+    guard_id = serializers.IntegerField()
+    device_id = serializers.CharField(max_length=64)
+    points = LocationPointSerializer(many=True, max_length=1000)
 
+    def validate_guard_id(self, value):
+        from apps.guards.models import Guard
+        try:
+            self.guard = Guard.objects.select_related('organization').get(
+                id=value, organization=self.context['request'].user.organization
+            )
+            return value
+        except Guard.DoesNotExist:
+            raise serializers.ValidationError("Guard not found or not in your organization.")
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.attendance.models import Attendance
+from apps.authentication.versioning import bump_version, organization_id_for
+from .models import LocationLog
+from .spatial import record_duty
+
+
+# Saves only: a delete receiver would stop guard deletes from cascading to
+# location logs in bulk. Deletes bump "locations" in LocationLog.delete and
+# its queryset's delete; guard deletes bump it once (see guards/signals.py).
+@receiver(post_save, sender=LocationLog)
+def bump_locations_version(sender, instance, **kwargs):
+    bump_version(organization_id_for(instance), "locations")
+
+
+# Keeps on-duty membership in the spatial index; the bulk attendance services
+# call record_duty themselves.
+@receiver(post_save, sender=Attendance)
+def track_duty(sender, instance, **kwargs):
+    attendance_id = None if instance.checkout_time else instance.id
+    record_duty(organization_id_for(instance), instance.guard_id, attendance_id)
@@ -0,0 +1,211 @@
+"""In-memory grid index over the current position of each guard.
+
+Positions are bucketed per organization into square cells of
+``LOCATION_INDEX_CELL_DEG`` degrees. The ingest pipeline updates the index for
+every accepted fix, so lookups never touch the location tables. A nearest
+query walks rings of cells outwards from the query point and stops once the
+k-th best distance is inside the area already scanned; for sparse data it
+falls back to checking every bucket.
+
+Each index also holds which guards are on duty (their open attendance),
+kept current by check-in and check-out (see ``signals.py`` and the bulk
+attendance services), so a lookup runs no queries at all.
+
+Positions whose last fix is older than ``LOCATION_INDEX_TTL_S`` are evicted
+when a query reaches them and on every reload, so a guard whose session was
+closed behind the index's back (a bulk update, an inactive guard) drops out
+once their fixes stop rather than lingering until the next resync.
+
+The index only knows the fixes and check-ins this process has handled. It is
+loaded from the database on first use per organization; after that a
+background thread reloads it every ``LOCATION_INDEX_RESYNC_S`` seconds to
+pick up what other workers handled, while lookups keep using the current
+contents (see ``live.nearest_guards``).
+"""
+import heapq
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .geo import haversine_m
+
+# Meters per degree of latitude.
+METERS_PER_DEGREE = 111320
+
+
+class GridIndex:
+    def __init__(self, cell_deg):
+        self.cell_deg = cell_deg
+        self.buckets = {}
+        self.positions = {}
+        self.on_duty = {}
+        self.duty_changed = {}
+        self.loaded_at = None
+        self.resyncing = False
+        self.lock = threading.Lock()
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def update(self, guard_id, lat, lng, timestamp):
+        """Move a guard to a new position; older fixes than the indexed one are ignored."""
+        with self.lock:
+            self._update(guard_id, lat, lng, timestamp)
+
+    def _update(self, guard_id, lat, lng, timestamp):
+        current = self.positions.get(guard_id)
+        if current is not None:
+            if current[2] >= timestamp:
+                return
+            self._discard(guard_id, current)
+        position = (lat, lng, timestamp)
+        self.positions[guard_id] = position
+        self.buckets.setdefault(self._cell(lat, lng), {})[guard_id] = position
+
+    def set_duty(self, guard_id, attendance_id):
+        """Mark a guard on duty in ``attendance_id``, or off duty when it is None."""
+        with self.lock:
+            if attendance_id is None:
+                self.on_duty.pop(guard_id, None)
+            else:
+                self.on_duty[guard_id] = attendance_id
+            self.duty_changed[guard_id] = time.monotonic()
+
+    def load(self, positions, on_duty, started, stale_before=None):
+        """Merge a database snapshot read since ``started`` (``time.monotonic()``).
+
+        ``positions`` are ``(guard_id, lat, lng, timestamp)`` rows and
+        ``on_duty`` maps guard id to open attendance id. Duty changes made
+        here after ``started`` are newer than the snapshot and are kept.
+        Positions fixed at or before ``stale_before`` are evicted.
+        """
+        with self.lock:
+            for guard_id, lat, lng, timestamp in positions:
+                self._update(guard_id, lat, lng, timestamp)
+            if stale_before is not None:
+                self._evict([
+                    guard_id for guard_id, position in self.positions.items() if position[2] <= stale_before
+                ])
+            recent = {guard_id for guard_id, changed in self.duty_changed.items() if changed > started}
+            merged = {guard_id: attendance_id for guard_id, attendance_id in on_duty.items() if guard_id not in recent}
+            merged.update((guard_id, self.on_duty[guard_id]) for guard_id in recent if guard_id in self.on_duty)
+            self.on_duty = merged
+            self.duty_changed = {guard_id: self.duty_changed[guard_id] for guard_id in recent}
+            self.loaded_at = time.monotonic()
+
+    def remove(self, guard_id):
+        with self.lock:
+            self._evict([guard_id])
+
+    def _evict(self, guard_ids):
+        for guard_id in guard_ids:
+            current = self.positions.pop(guard_id, None)
+            if current is not None:
+                self._discard(guard_id, current)
+
+    def _discard(self, guard_id, position):
+        cell = self._cell(position[0], position[1])
+        entries = self.buckets[cell]
+        entries.pop(guard_id, None)
+        if not entries:
+            del self.buckets[cell]
+
+    def _ring(self, center, radius):
+        ci, cj = center
+        if radius == 0:
+            yield center
+            return
+        for dj in range(-radius, radius + 1):
+            yield (ci - radius, cj + dj)
+            yield (ci + radius, cj + dj)
+        for di in range(-radius + 1, radius):
+            yield (ci + di, cj - radius)
+            yield (ci + di, cj + radius)
+
+    def nearest(self, lat, lng, k, accept=None, stale_before=None):
+        """Up to ``k`` ``(distance_m, guard_id, (lat, lng, timestamp))`` tuples, closest first.
+
+        ``accept(guard_id, position)`` filters candidates, e.g. to on-duty
+        guards. Positions fixed at or before ``stale_before`` that the query
+        reaches are evicted instead.
+        """
+        with self.lock:
+            stale = []
+            if stale_before is not None:
+                accept = self._evicting(accept, stale_before, stale)
+            try:
+                return self._nearest(lat, lng, k, accept)
+            finally:
+                self._evict(stale)
+
+    @staticmethod
+    def _evicting(accept, stale_before, stale):
+        def check(guard_id, position):
+            if position[2] <= stale_before:
+                stale.append(guard_id)
+                return False
+            return accept is None or accept(guard_id, position)
+        return check
+
+    def _nearest(self, lat, lng, k, accept):
+        buckets = self.buckets
+        if k <= 0 or not buckets:
+            return []
+        # Smallest extent of a cell in meters; longitude shrinks with latitude.
+        cell_m = self.cell_deg * METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+        center = self._cell(lat, lng)
+        best = []
+        scanned = set()
+        radius = 0
+        while (2 * radius + 1) ** 2 <= len(buckets):
+            for cell in self._ring(center, radius):
+                scanned.add(cell)
+                self._collect(best, k, buckets.get(cell, {}), lat, lng, accept)
+            if len(best) == k and -best[0][0] <= radius * cell_m:
+                return self._ordered(best)
+            radius += 1
+        for cell, entries in buckets.items():
+            if cell not in scanned:
+                self._collect(best, k, entries, lat, lng, accept)
+        return self._ordered(best)
+
+    def _collect(self, best, k, entries, lat, lng, accept):
+        for guard_id, position in entries.items():
+            if accept is not None and not accept(guard_id, position):
+                continue
+            distance = haversine_m(lat, lng, position[0], position[1])
+            item = (-distance, guard_id, position)
+            if len(best) < k:
+                heapq.heappush(best, item)
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, item)
+
+    def _ordered(self, best):
+        return [
+            (-distance, guard_id, position)
+            for distance, guard_id, position in sorted(best, reverse=True)
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(organization_id):
+    with _indexes_lock:
+        index = _indexes.get(organization_id)
+        if index is None:
+            index = _indexes[organization_id] = GridIndex(settings.LOCATION_INDEX_CELL_DEG)
+        return index
+
+
+def record_position(organization_id, guard_id, lat, lng, timestamp):
+    index_for(organization_id).update(guard_id, lat, lng, timestamp)
+
+
+def record_duty(organization_id, guard_id, attendance_id):
+    """Note a check-in (``attendance_id``) or a check-out (None) once the transaction commits."""
+    transaction.on_commit(lambda: index_for(organization_id).set_duty(guard_id, attendance_id))
@@ -0,0 +1,276 @@
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import Organization, User
+from apps.authentication.versioning import get_versions
+from apps.guards.models import Guard
+from .codec import CodecError, decode_run, decode_upload, encode_run, encode_upload, to_e7, to_millis
+from . import pipeline
+from .models import LocationLog, Stay
+from .spatial import GridIndex
+
+
+class CoordinateBoundsTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_out_of_range_coordinates_are_rejected(self):
+        for latitude, longitude in ((91, 0), (0, 180.5), (-9999, 0)):
+            response = self.client.post(
+                "/api/tracking/locations/",
+                {"guard_id": self.guard.id, "latitude": latitude, "longitude": longitude},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400, (latitude, longitude))
+        self.assertFalse(LocationLog.objects.exists())
+
+
+class E7CoordinateFieldTests(SimpleTestCase):
+    def test_values_beyond_180_degrees_are_not_stored(self):
+        field = LocationLog._meta.get_field("longitude")
+        self.assertEqual(field.get_prep_value("-180"), -1_800_000_000)
+        with self.assertRaises(ValueError):
+            field.get_prep_value(9999)
+
+
+class LocationVersionTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        self.logs = [
+            LocationLog.objects.create(guard=self.guard, organization=self.org, latitude=1, longitude=2)
+            for _ in range(3)
+        ]
+
+    def version(self):
+        return get_versions(self.org.id, ["locations"])[0]
+
+    def test_single_and_queryset_deletes_bump_the_version(self):
+        before = self.version()
+        self.logs[0].delete()
+        after_single = self.version()
+        self.assertNotEqual(after_single, before)
+        LocationLog.objects.filter(id=self.logs[1].id).delete()
+        self.assertNotEqual(self.version(), after_single)
+
+    def test_guard_delete_still_removes_logs_in_bulk(self):
+        table = LocationLog._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            self.guard.delete()
+        source = f"FROM {connection.ops.quote_name(table)}"
+        reads = [query["sql"] for query in queries if query["sql"].startswith("SELECT") and source in query["sql"]]
+        self.assertEqual(reads, [])
+        self.assertFalse(LocationLog.objects.exists())
+
+
+class GridIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.index = GridIndex(0.01)
+        # Guards 1..5 spread north of the origin, 1 km apart.
+        for guard_id in range(1, 6):
+            self.index.update(guard_id, guard_id * 0.009, 0.0, self.now)
+
+    def ids(self, results):
+        return [guard_id for _, guard_id, _ in results]
+
+    def test_nearest_orders_by_distance_and_filters(self):
+        self.assertEqual(self.ids(self.index.nearest(0.0, 0.0, 3)), [1, 2, 3])
+        self.assertEqual(self.ids(self.index.nearest(0.046, 0.0, 2)), [5, 4])
+        odd = self.index.nearest(0.0, 0.0, 2, accept=lambda guard_id, position: guard_id % 2)
+        self.assertEqual(self.ids(odd), [1, 3])
+
+    def test_older_fixes_do_not_move_a_guard(self):
+        self.index.update(1, 1.0, 1.0, self.now - timedelta(seconds=1))
+        self.assertEqual(self.index.positions[1][:2], (0.009, 0.0))
+        self.index.update(1, 1.0, 1.0, self.now + timedelta(seconds=1))
+        self.assertEqual(self.ids(self.index.nearest(1.0, 1.0, 1)), [1])
+
+    def test_stale_positions_are_evicted_by_queries_and_reloads(self):
+        # Only guard 1 has a fix after ``stale_before``.
+        self.index.update(1, 0.009, 0.0, self.now + timedelta(seconds=1))
+        stale_before = self.now
+        self.assertEqual(self.ids(self.index.nearest(0.0, 0.0, 5, stale_before=stale_before)), [1])
+        self.assertEqual(set(self.index.positions), {1})
+
+        self.index.update(2, 0.018, 0.0, self.now)
+        self.index.load([], {}, time.monotonic(), stale_before=stale_before)
+        self.assertEqual(set(self.index.positions), {1})
+
+    def test_load_keeps_duty_changes_newer_than_the_snapshot(self):
+        started = time.monotonic()
+        self.index.set_duty(1, 10)
+        self.index.set_duty(2, None)
+        self.index.load([], {2: 20, 3: 30}, started)
+        self.assertEqual(self.index.on_duty, {1: 10, 3: 30})
+
+
+class CodecTests(SimpleTestCase):
+    points = [
+        (1_792_000_000_000, to_e7("12.9716"), to_e7("-77.5946"), 50, 80),
+        (1_792_000_005_000, to_e7("12.9719"), to_e7("-77.5950"), None, None),
+        (1_791_999_990_000, to_e7("-0.0000001"), to_e7("180"), 0, 0),
+    ]
+
+    def test_run_round_trips(self):
+        data = encode_run(self.points)
+        self.assertEqual(decode_run(bytes(data)), (self.points, len(data)))
+
+    def test_upload_decodes_to_sequenced_points(self):
+        upload = decode_upload(encode_upload(7, "phone", 41, self.points[:2]))
+        self.assertEqual((upload["guard_id"], upload["device_id"]), (7, "phone"))
+        first, second = upload["points"]
+        self.assertEqual((first["sequence"], second["sequence"]), (41, 42))
+        self.assertEqual((str(first["latitude"]), first["accuracy"], first["battery_level"]), ("12.9716", 5.0, 80))
+        self.assertEqual((second["accuracy"], second["battery_level"]), (None, None))
+        self.assertEqual(to_millis(second["timestamp"]), 1_792_000_005_000)
+
+    def test_malformed_uploads_are_rejected(self):
+        body = encode_upload(7, "phone", 1, self.points)
+        for data in (b"", b"\x02" + body[1:], body[:-1], body + b"\x00", encode_upload(7, "phone", 0, self.points)):
+            with self.assertRaises(CodecError):
+                decode_upload(data)
+        with self.assertRaises(CodecError):
+            decode_upload(encode_upload(7, "phone", 1, [(2 ** 62, 0, 0, None, None)]))
+
+
+class CompactUploadTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def post(self, body):
+        return self.client.post(
+            "/api/tracking/locations/batch/", body, content_type="application/vnd.fieldwatch.track"
+        )
+
+    def test_binary_batches_are_stored_once(self):
+        start = to_millis(timezone.now() - timedelta(hours=1))
+        points = [(start + i * 5000, to_e7("12.9716") + i * 30, to_e7("77.5946"), 50, 80) for i in range(10)]
+        body = encode_upload(self.guard.id, "phone", 1, points)
+        response = self.post(body)
+        self.assertEqual((response.status_code, response.data["acked_sequence"]), (200, 10))
+        self.assertEqual(self.post(body).data["acked_sequence"], 10)
+        self.assertEqual(LocationLog.objects.filter(guard=self.guard).count(), 10)
+        latest = LocationLog.objects.get(guard=self.guard, sequence=10)
+        self.assertAlmostEqual(latest.latitude, 12.9716 + 9 * 30 / 1e7)
+
+    def test_corrupt_body_is_a_bad_request(self):
+        body = encode_upload(self.guard.id, "phone", 1, [(to_millis(timezone.now()), 0, 0, None, None)])
+        self.assertEqual(self.post(body[:-1]).status_code, 400)
+        self.assertFalse(LocationLog.objects.exists())
+
+
+class PipelineTestCase(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        self.start = timezone.now() - timedelta(hours=1)
+        pipeline._states.clear()
+        self.addCleanup(pipeline._states.clear)
+
+    def fix(self, seconds, lat, lng=0.0, accuracy=5.0):
+        return LocationLog(
+            guard=self.guard, organization=self.org, latitude=lat, longitude=lng,
+            timestamp=self.start + timedelta(seconds=seconds), accuracy=accuracy,
+        )
+
+
+@override_settings(LOCATION_DWELL_RADIUS_M=30, LOCATION_DWELL_PERSIST_INTERVAL=60, LOCATION_DWELL_MAX_GAP=900)
+class DwellTests(PipelineTestCase):
+    def test_stationary_fixes_fold_into_a_stay(self):
+        # About 1 m apart, every 10 s for two minutes, then 1 km away a minute later.
+        fixes = [self.fix(10 * i, 0.00001 * (i % 2)) for i in range(13)] + [self.fix(180, 0.009)]
+        stored, rejected = pipeline.process(fixes)
+        self.assertEqual(rejected, 0)
+        self.assertEqual([log.timestamp for log in stored], [fixes[0].timestamp, fixes[-1].timestamp])
+        stay = Stay.objects.get(guard=self.guard)
+        self.assertEqual(
+            (stay.start_time, stay.end_time, stay.point_count), (fixes[0].timestamp, fixes[12].timestamp, 13)
+        )
+        self.assertAlmostEqual(stay.latitude, 0.0000046, places=6)
+
+    def test_idle_guards_are_evicted_with_their_stay_persisted(self):
+        pipeline.process([self.fix(0, 0.0), self.fix(10, 0.0), self.fix(20, 0.0)])
+        self.assertEqual(Stay.objects.get(guard=self.guard).point_count, 2)
+        later = pipeline._states[self.guard.id].seen_at + 3601
+        with self.settings(LOCATION_STATE_IDLE_S=3600):
+            self.assertEqual(pipeline.evict_idle(later), 1)
+        self.assertNotIn(self.guard.id, pipeline._states)
+        self.assertEqual(Stay.objects.get(guard=self.guard).point_count, 3)
+
+    def test_dwell_is_off_by_default(self):
+        with self.settings(LOCATION_DWELL_RADIUS_M=0):
+            stored, _ = pipeline.process([self.fix(10 * i, 0.0) for i in range(5)])
+        self.assertEqual(len(stored), 5)
+        self.assertFalse(Stay.objects.exists())
+
+
+@override_settings(LOCATION_DWELL_RADIUS_M=0, LOCATION_FILTER_MAX_ACCURACY_M=100, LOCATION_FILTER_MAX_SPEED_MPS=60)
+class NoiseFilterTests(PipelineTestCase):
+    def test_inaccurate_and_impossible_fixes_are_rejected(self):
+        rejected_before = dict(pipeline.stats)
+        fixes = [
+            self.fix(0, 0.0),
+            self.fix(10, 0.0001, accuracy=500),  # too inaccurate
+            self.fix(20, 0.1),  # 11 km in 20 s
+            self.fix(30, 0.001),  # 111 m in 30 s
+        ]
+        stored, rejected = pipeline.process(fixes)
+        self.assertEqual(rejected, 2)
+        self.assertEqual([log.timestamp for log in stored], [fixes[0].timestamp, fixes[3].timestamp])
+        # A late fix from a later batch is only checked for accuracy.
+        late = self.fix(5, 0.1)
+        self.assertEqual(pipeline.process([late]), ([late], 0))
+        self.assertEqual(pipeline.stats["accuracy"] - rejected_before.get("accuracy", 0), 1)
+        self.assertEqual(pipeline.stats["speed"] - rejected_before.get("speed", 0), 1)
+
+    @override_settings(LOCATION_FILTER_KALMAN=True, LOCATION_FILTER_KALMAN_NOISE_MPS=0)
+    def test_kalman_estimate_is_reported_and_raw_fix_stored(self):
+        first, second = self.fix(0, 0.0, accuracy=10), self.fix(10, 0.0001, accuracy=10)
+        stored, _ = pipeline.process([first, second])
+        self.assertEqual(len(stored), 2)
+        # Equal accuracies and no process noise: the estimate lands halfway.
+        self.assertAlmostEqual(second.filtered_position[0], 0.00005)
+        self.assertEqual(second.latitude, 0.0001)
+
+    def test_fixes_are_not_smoothed_by_default(self):
+        second = self.fix(10, 0.0001)
+        pipeline.process([self.fix(0, 0.0), second])
+        self.assertFalse(hasattr(second, "filtered_position"))
+
+
+@override_settings(LOCATION_DWELL_RADIUS_M=0, LOCATION_FILTER_KALMAN=True, LOCATION_FILTER_KALMAN_NOISE_MPS=0)
+class FilteredResponseTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org")
+        self.admin = User.objects.create_user(username="admin", password="x", organization=self.org, role="admin")
+        self.guard = Guard.objects.create(name="G1", phone="1", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        pipeline._states.clear()
+        self.addCleanup(pipeline._states.clear)
+
+    def test_response_carries_the_estimate_next_to_the_stored_fix(self):
+        for latitude in ("0.00000000", "0.00010000"):
+            response = self.client.post(
+                "/api/tracking/locations/",
+                {"guard_id": self.guard.id, "latitude": latitude, "longitude": "0", "accuracy": 10},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertAlmostEqual(response.data["filtered_latitude"], 0.00005)
+        self.assertEqual(LocationLog.objects.latest("timestamp").latitude, 0.0001)
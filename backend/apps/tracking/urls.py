@@ -7,7 +7,11 @@ urlpatterns = [
         views.LocationLogListCreateView.as_view(),
         name="location-list-create",
     ),
+    path("locations/batch/", views.upload_locations, name="location-batch-upload"),
     path("live/", views.live_locations, name="live-locations"),
     path("live-locations/", views.live_locations, name="live-locations-alias"),
+    path("playback/", views.track_playback, name="track-playback"),
+    path("heatmap/", views.location_heatmap, name="location-heatmap"),
+    path("nearest/", views.nearest_guards_view, name="nearest-guards"),
     path("guard/<int:guard_id>/", views.guard_track, name="guard-track"),
 ]
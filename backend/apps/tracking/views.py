@@ -1,11 +1,31 @@
-from rest_framework import generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.http import StreamingHttpResponse
 from datetime import timedelta
-from .models import LocationLog
-from .serializers import LocationLogSerializer, LocationLogCreateSerializer
+from .models import LocationLog, Stay
+from .serializers import (
+    LocationLogSerializer, LocationLogCreateSerializer, LocationBatchSerializer, StaySerializer,
+)
+from .ingest import IngestQueueFull, get_buffer, ingest_sequenced, is_buffered
+from .history import track_history
+from .parsers import CompactTrackParser
+from .pipeline import process
+from .cadence import next_interval
+from .heatmap import build_heatmap
+from .playback import guards_in_bbox, ndjson_chunks, playback_frames
+from .clustering import CLUSTER_MAX_ZOOM, cluster_positions, parse_bbox
+from .live import LIVE_ETAG_BUCKET, LIVE_WINDOW, decode_cursor, latest_locations, live_changes, nearest_guards
 from apps.guards.models import Guard
+from apps.guards.serializers import GuardSerializer
+from apps.authentication.versioning import etag_for, every
+
+HEATMAP_MAX_RANGE = timedelta(days=93)
+PLAYBACK_MAX_RANGE = timedelta(hours=24)
+PLAYBACK_MAX_GUARDS = 200
 
 # Helper to get the guard object for the logged-in user
 def get_guard_for_user(user):
@@ -22,33 +42,123 @@ class LocationLogListCreateView(generics.ListCreateAPIView):
         if user.role == 'guard':
             guard = get_guard_for_user(user)
             return LocationLog.objects.filter(guard=guard)
-        return LocationLog.objects.filter(guard__organization=user.organization)
+        return LocationLog.objects.filter(organization=user.organization)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return LocationLogCreateSerializer
         return LocationLogSerializer
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        log = serializer.build()
+        if is_buffered():
+            try:
+                get_buffer().put(log)
+            except IngestQueueFull:
+                return Response(
+                    {'error': 'Location ingest is saturated, retry later.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': '1'},
+                )
+            return Response(
+                {**serializer.data, 'next_interval_s': next_interval(log.guard, log)},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        stored, rejected = process([log])
+        for stored_log in stored:
+            stored_log.save()
+        data = {
+            **serializer.data,
+            'rejected': bool(rejected),
+            'next_interval_s': next_interval(log.guard, log),
+        }
+        # Set when LOCATION_FILTER_KALMAN smoothed the fix; the raw fix is what was stored.
+        filtered = getattr(log, 'filtered_position', None)
+        if filtered:
+            data['filtered_latitude'] = round(filtered[0], 8)
+            data['filtered_longitude'] = round(filtered[1], 8)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes(list(api_settings.DEFAULT_PARSER_CLASSES) + [CompactTrackParser])
+def upload_locations(request):
+    """Store a batch of sequence-numbered points; replays are ignored.
+
+    Returns the highest contiguous sequence stored for the device so the
+    client can drop everything up to it from its local buffer. Accepts JSON
+    or the compact ``application/vnd.fieldwatch.track`` encoding.
+    """
+    serializer = LocationBatchSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    user = request.user
+    guard = serializer.guard
+    if user.role == 'guard' and guard.user_id != user.id:
+        return Response({'error': 'You can only upload your own locations.'}, status=403)
+    data = serializer.validated_data
+    acked, rejected = ingest_sequenced(guard, data['device_id'], data['points'])
+    response = {
+        'device_id': data['device_id'],
+        'received': len(data['points']),
+        'rejected': rejected,
+        'acked_sequence': acked,
+    }
+    if data['points']:
+        newest = max(data['points'], key=lambda point: point.get('timestamp') or timezone.now())
+        response['next_interval_s'] = next_interval(guard, LocationLog(**newest))
+    return Response(response)
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@etag_for("locations", "guards", bucket=every(LIVE_ETAG_BUCKET))
 def live_locations(request):
-    """Get latest location for each guard (within last 30 minutes)"""
-    thirty_minutes_ago = timezone.now() - timedelta(minutes=30)
+    """Get latest location for each guard (within last 30 minutes)
+
+    With ``?since=<cursor>`` only guards whose position changed after the cursor
+    are returned, together with the guards that left the window and a new cursor.
+    An empty or expired cursor returns a full snapshot.
+
+    With ``?bbox=min_lng,min_lat,max_lng,max_lat&zoom=<z>`` only guards inside
+    the viewport are returned, grouped into ``clusters`` below street level
+    zoom, with the remaining single guards under ``locations``.
+    """
     user = request.user
     if user.role == 'guard':
         guard = get_guard_for_user(user)
-        latest_log = guard.location_logs.filter(timestamp__gte=thirty_minutes_ago).first()
-        if latest_log:
-            return Response([LocationLogSerializer(latest_log).data])
-        return Response([])
-    # For admin/manager, show all guards
-    latest_locations = []
-    guards = user.organization.guards.filter(is_active=True)
-    for guard in guards:
-        latest_log = guard.location_logs.filter(timestamp__gte=thirty_minutes_ago).first()
-        if latest_log:
-            latest_locations.append(LocationLogSerializer(latest_log).data)
-    return Response(latest_locations)
+        logs = LocationLog.objects.filter(guard=guard)
+        stays = Stay.objects.filter(guard=guard)
+    else:
+        # For admin/manager, show all active guards
+        logs = LocationLog.objects.filter(organization=user.organization, guard__is_active=True)
+        stays = Stay.objects.filter(organization=user.organization, guard__is_active=True)
+    if 'bbox' in request.GET:
+        if 'since' in request.GET:
+            return Response({'error': 'bbox cannot be combined with since'}, status=400)
+        try:
+            bbox = parse_bbox(request.GET['bbox'])
+            zoom = int(request.GET.get('zoom', CLUSTER_MAX_ZOOM))
+        except ValueError:
+            return Response({'error': 'Invalid bbox or zoom'}, status=400)
+        if not 0 <= zoom <= 22:
+            return Response({'error': 'zoom must be between 0 and 22'}, status=400)
+        latest = latest_locations(logs, timezone.now() - LIVE_WINDOW, stays)
+        clusters, points = cluster_positions(latest, bbox, zoom)
+        return Response({
+            'clusters': clusters,
+            'locations': LocationLogSerializer(points, many=True).data,
+        })
+    if 'since' in request.GET:
+        try:
+            cursor = decode_cursor(request.GET['since']) if request.GET['since'] else None
+        except (ValueError, OverflowError, OSError):
+            return Response({'error': 'Invalid cursor'}, status=400)
+        changes = live_changes(logs, cursor, stays)
+        changes['locations'] = LocationLogSerializer(changes['locations'], many=True).data
+        return Response(changes)
+    latest = latest_locations(logs, timezone.now() - LIVE_WINDOW, stays)
+    return Response(LocationLogSerializer(latest, many=True).data)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -67,10 +177,123 @@ def guard_track(request, guard_id):
     # Get locations from last 24 hours by default
     hours = int(request.GET.get('hours', 24))
     since = timezone.now() - timedelta(hours=hours)
-    locations = guard.location_logs.filter(timestamp__gte=since)
+    locations = track_history(guard, since)
     serializer = LocationLogSerializer(locations, many=True)
+    stays = Stay.objects.filter(guard=guard, end_time__gte=since)
     return Response({
         'guard': guard.name,
-        'locations': serializer.data
+        'locations': serializer.data,
+        'stays': StaySerializer(stays, many=True).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def nearest_guards_view(request):
+    """Get the k on-duty guards nearest to a point, e.g. for dispatching to an alert"""
+    user = request.user
+    if user.role == 'guard':
+        return Response({'error': 'Only admins and managers can dispatch guards.'}, status=403)
+    try:
+        latitude = float(request.GET['latitude'])
+        longitude = float(request.GET['longitude'])
+        k = int(request.GET.get('k', 5))
+    except (KeyError, ValueError):
+        return Response({'error': 'latitude and longitude are required; k must be an integer'}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or not 1 <= k <= 100:
+        return Response({'error': 'Coordinates out of range or k not between 1 and 100'}, status=400)
+    nearest = nearest_guards(user.organization, latitude, longitude, k)
+    guards = Guard.objects.select_related('user').in_bulk([guard_id for _, guard_id, _, _ in nearest])
+    return Response([
+        {
+            'guard': GuardSerializer(guards[guard_id]).data,
+            'attendance_id': attendance_id,
+            'latitude': round(lat, 7),
+            'longitude': round(lng, 7),
+            'timestamp': timestamp,
+            'distance_m': round(distance, 1),
+        }
+        for distance, guard_id, attendance_id, (lat, lng, timestamp) in nearest
+        if guard_id in guards
+    ])
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def location_heatmap(request):
+    """Get fix counts and dwell time per grid cell over a time range (default: last 7 days)"""
+    user = request.user
+    if user.role == 'guard':
+        return Response({'error': 'Only admins and managers can view heatmaps.'}, status=403)
+    now = timezone.now()
+    try:
+        end = parse_datetime(request.GET['end']) if 'end' in request.GET else now
+        start = parse_datetime(request.GET['start']) if 'start' in request.GET else end - timedelta(days=7)
+        cell = float(request.GET.get('cell', 0.001))
+        guard_id = int(request.GET['guard_id']) if 'guard_id' in request.GET else None
+    except ValueError:
+        return Response({'error': 'Invalid start, end, cell or guard_id'}, status=400)
+    if start is None or end is None or timezone.is_naive(start) or timezone.is_naive(end):
+        return Response({'error': 'start and end must be ISO 8601 datetimes with a timezone'}, status=400)
+    if not start < end <= start + HEATMAP_MAX_RANGE:
+        return Response({'error': 'start must precede end by at most 93 days'}, status=400)
+    if not 0.0001 <= cell <= 1:
+        return Response({'error': 'cell must be between 0.0001 and 1 degrees'}, status=400)
+    filters = {'organization': user.organization}
+    if guard_id is not None:
+        filters['guard_id'] = guard_id
+    cells = build_heatmap(filters, start, end, cell)
+    return Response({
+        'start': start,
+        'end': end,
+        'cell': cell,
+        'cells': [
+            {
+                'latitude': round((row + 0.5) * cell, 7),
+                'longitude': round((col + 0.5) * cell, 7),
+                'count': count,
+                'dwell_s': round(dwell),
+            }
+            for (row, col), (count, dwell) in cells.items()
+        ],
     })
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def track_playback(request):
+    """Stream the fixes of several guards over one time window, merged in time order.
+
+    Takes ``start``, ``end`` and either ``guard_ids=1,2,3`` or
+    ``bbox=min_lng,min_lat,max_lng,max_lat`` (guards with any fix inside it).
+    The response is NDJSON: a header line with the guards and window, then one
+    frame per line.
+    """
+    user = request.user
+    try:
+        start = parse_datetime(request.GET.get('start', ''))
+        end = parse_datetime(request.GET.get('end', ''))
+        guard_ids = [int(part) for part in request.GET['guard_ids'].split(',')] if 'guard_ids' in request.GET else None
+        bbox = parse_bbox(request.GET['bbox']) if 'bbox' in request.GET else None
+    except ValueError:
+        return Response({'error': 'Invalid start, end, guard_ids or bbox'}, status=400)
+    if start is None or end is None or timezone.is_naive(start) or timezone.is_naive(end):
+        return Response({'error': 'start and end must be ISO 8601 datetimes with a timezone'}, status=400)
+    if not start < end <= start + PLAYBACK_MAX_RANGE:
+        return Response({'error': 'start must precede end by at most 24 hours'}, status=400)
+    if (guard_ids is None) == (bbox is None):
+        return Response({'error': 'Pass either guard_ids or bbox'}, status=400)
+    guards = Guard.objects.filter(organization=user.organization)
+    if user.role == 'guard':
+        guards = guards.filter(user=user)
+    if bbox is not None:
+        if bbox[0] > bbox[2]:
+            return Response({'error': 'bbox must not cross the antimeridian'}, status=400)
+        filters = {'organization': user.organization}
+        if user.role == 'guard':
+            filters['guard__user'] = user
+        guard_ids = guards_in_bbox(filters, bbox, start, end)
+    guards = list(guards.filter(id__in=guard_ids).order_by('id').values('id', 'name'))
+    if len(guards) > PLAYBACK_MAX_GUARDS:
+        return Response({'error': f'At most {PLAYBACK_MAX_GUARDS} guards per playback'}, status=400)
+    header = {'start': start.isoformat(), 'end': end.isoformat(), 'guards': guards}
+    frames = playback_frames([guard['id'] for guard in guards], start, end)
+    return StreamingHttpResponse(ndjson_chunks(header, frames), content_type='application/x-ndjson')
@@ -27,6 +27,8 @@ INSTALLED_APPS = [
     'apps.attendance',
     'apps.tracking',
     'apps.reports',
+    'apps.patrols',
+    'apps.sync',
 ]
 
 MIDDLEWARE = [
@@ -95,6 +97,75 @@ DATABASES = {
 #     }
 # }
 
+# MySQL ignores the partial unique constraint on open attendance sessions;
+# check-in locks the guard row instead (apps/attendance/services.py).
+SILENCED_SYSTEM_CHECKS = ["models.W036"]
+
+# Shared cache backing the per-organization change versions used for ETags.
+# Use a shared backend (e.g. Redis) when running more than one worker process.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get("CACHE_LOCATION", ''),
+    }
+}
+
+# Location ingest: "sync" writes each ping in its own transaction, "buffered"
+# queues validated pings and writes them in batches (see apps/tracking/ingest.py).
+LOCATION_INGEST_MODE = os.environ.get("LOCATION_INGEST_MODE", "sync")
+LOCATION_INGEST_BATCH_SIZE = int(os.environ.get("LOCATION_INGEST_BATCH_SIZE", "500"))
+LOCATION_INGEST_FLUSH_INTERVAL = float(os.environ.get("LOCATION_INGEST_FLUSH_INTERVAL", "1.0"))
+LOCATION_INGEST_QUEUE_SIZE = int(os.environ.get("LOCATION_INGEST_QUEUE_SIZE", "10000"))
+LOCATION_INGEST_ENQUEUE_TIMEOUT = float(os.environ.get("LOCATION_INGEST_ENQUEUE_TIMEOUT", "0.1"))
+
+# Dwell detection (apps/tracking/pipeline.py): fixes within this many meters of
+# the last stored fix extend a Stay instead of being stored. Off (0) by default.
+LOCATION_DWELL_RADIUS_M = float(os.environ.get("LOCATION_DWELL_RADIUS_M", "0"))
+LOCATION_DWELL_MAX_GAP = int(os.environ.get("LOCATION_DWELL_MAX_GAP", "900"))
+LOCATION_DWELL_PERSIST_INTERVAL = int(os.environ.get("LOCATION_DWELL_PERSIST_INTERVAL", "60"))
+
+# Noise filtering of incoming fixes (apps/tracking/pipeline.py); 0 disables a check.
+LOCATION_FILTER_MAX_ACCURACY_M = float(os.environ.get("LOCATION_FILTER_MAX_ACCURACY_M", "100"))
+LOCATION_FILTER_MAX_SPEED_MPS = float(os.environ.get("LOCATION_FILTER_MAX_SPEED_MPS", "60"))
+LOCATION_FILTER_KALMAN = os.environ.get("LOCATION_FILTER_KALMAN", "False") == "True"
+LOCATION_FILTER_KALMAN_NOISE_MPS = float(os.environ.get("LOCATION_FILTER_KALMAN_NOISE_MPS", "3"))
+# Seconds without fixes after which a guard's in-memory ingest state is dropped.
+LOCATION_STATE_IDLE_S = int(os.environ.get("LOCATION_STATE_IDLE_S", "3600"))
+
+# Ping interval recommended to devices (apps/tracking/cadence.py), in seconds.
+LOCATION_INTERVAL_MIN_S = int(os.environ.get("LOCATION_INTERVAL_MIN_S", "5"))
+LOCATION_INTERVAL_MAX_S = int(os.environ.get("LOCATION_INTERVAL_MAX_S", "300"))
+LOCATION_INTERVAL_TARGET_M = float(os.environ.get("LOCATION_INTERVAL_TARGET_M", "50"))
+# Shortest interval each organization plan may be told to use.
+LOCATION_PLAN_MIN_INTERVAL_S = {
+    "basic": 30,
+    "pro": 15,
+    "enterprise": 5,
+}
+
+# In-memory grid index of current guard positions (apps/tracking/spatial.py).
+LOCATION_INDEX_CELL_DEG = float(os.environ.get("LOCATION_INDEX_CELL_DEG", "0.01"))
+LOCATION_INDEX_RESYNC_S = int(os.environ.get("LOCATION_INDEX_RESYNC_S", "60"))
+# Positions whose last fix is older than this are evicted from the index.
+LOCATION_INDEX_TTL_S = int(os.environ.get("LOCATION_INDEX_TTL_S", "1800"))
+
+# Attendance day classification (apps/attendance/classification.py), in minutes.
+ATTENDANCE_LATE_GRACE_MIN = int(os.environ.get("ATTENDANCE_LATE_GRACE_MIN", "10"))
+ATTENDANCE_EARLY_LEAVE_GRACE_MIN = int(os.environ.get("ATTENDANCE_EARLY_LEAVE_GRACE_MIN", "10"))
+ATTENDANCE_OVERTIME_MIN = int(os.environ.get("ATTENDANCE_OVERTIME_MIN", "15"))
+# A closed day worked for less than this share of its shift is a half day.
+ATTENDANCE_HALF_DAY_RATIO = float(os.environ.get("ATTENDANCE_HALF_DAY_RATIO", "0.5"))
+# Minutes after a rostered shift starts before a missing check-in is a no-show
+# (apps/attendance/absences.py).
+ATTENDANCE_NO_SHOW_GRACE_MIN = int(os.environ.get("ATTENDANCE_NO_SHOW_GRACE_MIN", "30"))
+
+# Incremental sync (apps/sync): cursors older than the tombstone lifetime get a
+# full snapshot, paged by this many rows; each cursor overlaps the previous
+# sync by a few seconds.
+SYNC_TOMBSTONE_TTL_DAYS = int(os.environ.get("SYNC_TOMBSTONE_TTL_DAYS", "30"))
+SYNC_CURSOR_OVERLAP_S = int(os.environ.get("SYNC_CURSOR_OVERLAP_S", "5"))
+SYNC_PAGE_SIZE = int(os.environ.get("SYNC_PAGE_SIZE", "1000"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -174,7 +245,9 @@ CORS_ALLOWED_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',
 ]
+CORS_EXPOSE_HEADERS = ['etag']
 CORS_ALLOWED_METHODS = [
     'DELETE',
     'GET',
@@ -10,6 +10,8 @@ urlpatterns = [
     path("api/attendance/", include("apps.attendance.urls")),
     path("api/tracking/", include("apps.tracking.urls")),
     path("api/reports/", include("apps.reports.urls")),
+    path("api/patrols/", include("apps.patrols.urls")),
+    path("api/sync/", include("apps.sync.urls")),
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),